@@ -0,0 +1,159 @@
+"""
+Benchmark bout en bout du pipeline contre le faux serveur (benchmarks/fake_youtube_api.py): 0 quota réel.
+
+Pour chaque scénario (nb de mots-clés x pages par mot-clé), dans un interpréteur neuf et un
+dossier d'état vide (cache SQLite, quota):
+- temps total, temps jusqu'au 1er résultat (1er classement provisoire) et jusqu'à l'affichage final
+- appels API, unités de quota (par endpoint), résultats validés par unité de quota
+- requêtes / erreurs / octets vus côté serveur
+--warm relance chaque scénario sur le même dossier d'état (caches chauds).
+
+    python benchmarks/bench_pipeline.py [--keywords 1,3,6] [--pages 1,3] [--latency-ms 60] [--json out.json]
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from fake_youtube_api import ENDPOINTS, FakeApiConfig, FakeYouTubeApi, Latency  # noqa: E402
+
+KEYWORDS = [
+    "trump epstein", "ice raids", "climate summit", "bitcoin crash", "ai regulation",
+    "world cup", "election debate", "housing crisis", "space launch", "oil prices",
+]
+
+WORKER_SNIPPET = """
+import json, sys, time
+params = json.loads(sys.argv[1])
+t0 = time.perf_counter()
+from yt_engine import iter_pipeline, key_pool
+pool = key_pool()
+# le ledger du dossier d'état cumule la journée: on ne compte que ce run
+used0, endpoint0 = pool.used(), dict(pool.breakdown()["endpoint"])
+marks = {}
+for ev in iter_pipeline(params):
+    if ev.kind in ("ranking", "display") and ev.kind not in marks:
+        marks[ev.kind] = time.perf_counter() - t0
+    if ev.kind == "done":
+        run = ev.data
+wall = time.perf_counter() - t0
+print(json.dumps({
+    "wall_s": wall,
+    "first_result_s": marks.get("ranking"),
+    "display_s": marks.get("display"),
+    "api": run.api_stats,
+    "quota_units": pool.used() - used0,
+    "quota_by_endpoint": {
+        ep: u - endpoint0.get(ep, 0) for ep, u in pool.breakdown()["endpoint"].items() if u > endpoint0.get(ep, 0)
+    },
+    "ids_found": run.stats["ids_found"],
+    "results": run.stats["passed_total"],
+    "displayed": len(run.display),
+}))
+"""
+
+
+def run_worker(params: dict, api_url: str, state_dir: str) -> Dict[str, object]:
+    env = {
+        **os.environ,
+        "YT_RESEARCH_API_ENDPOINT": api_url,
+        "YT_RESEARCH_STATE_DIR": state_dir,
+        "YOUTUBE_API_KEY": "bench-key",
+    }
+    env.pop("YOUTUBE_API_KEYS", None)
+    out = subprocess.run(
+        [sys.executable, "-c", WORKER_SNIPPET, json.dumps(params)],
+        cwd=ROOT, capture_output=True, text=True, env=env,
+    )
+    if out.returncode != 0:
+        raise RuntimeError(f"worker en échec:\n{out.stderr[-2000:]}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def run_scenario(api: FakeYouTubeApi, n_keywords: int, pages: int, args, state_dir: str, label: str) -> Dict[str, object]:
+    params = {
+        "keywords": KEYWORDS[:n_keywords],
+        "language": args.language,
+        "pages": pages,
+        "per_page": args.per_page,
+        "max_display": args.max_display,
+        "deadline_seconds": args.deadline or None,
+    }
+    api.reset_stats()
+    r = run_worker(params, api.url, state_dir)
+    units = r["quota_units"]
+    r.update({
+        "scenario": label,
+        "keywords": n_keywords,
+        "pages": pages,
+        "results_per_unit": (r["results"] / units) if units else None,
+        "server": {ep: dict(v) for ep, v in api.stats.items()},
+    })
+    return r
+
+
+def fmt_s(x) -> str:
+    return "   -  " if x is None else f"{x:6.2f}"
+
+
+def print_table(rows: List[Dict[str, object]]):
+    print(f"{'scénario':<16}{'kw':>3}{'pages':>6}{'total s':>9}{'1er rés.':>9}{'affich.':>9}"
+          f"{'appels':>8}{'quota':>7}{'validées':>9}{'rés/unité':>10}{'erreurs':>8}")
+    for r in rows:
+        errors = sum(v.get("errors", 0) for v in r["server"].values())
+        rpu = "-" if r["results_per_unit"] is None else f"{r['results_per_unit']:.3f}"
+        print(f"{r['scenario']:<16}{r['keywords']:>3}{r['pages']:>6}{fmt_s(r['wall_s']):>9}{fmt_s(r['first_result_s']):>9}"
+              f"{fmt_s(r['display_s']):>9}{r['api']['calls']:>8}{r['quota_units']:>7}{r['results']:>9}{rpu:>10}{errors:>8}")
+    print()
+    print("quota par endpoint:")
+    for r in rows:
+        parts = ", ".join(f"{ep}={u}" for ep, u in sorted(r["quota_by_endpoint"].items()))
+        print(f"  {r['scenario']:<16}{r['keywords']:>3} kw x {r['pages']} p: {parts}")
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument("--keywords", default="1,3,6", help="nb de mots-clés par scénario (liste)")
+    p.add_argument("--pages", default="1,3", help="pages search.list par mot-clé (liste)")
+    p.add_argument("--per-page", type=int, default=50)
+    p.add_argument("--language", default="French")
+    p.add_argument("--max-display", type=int, default=15)
+    p.add_argument("--deadline", type=float, default=0, help="secondes, 0 = pas de coupure")
+    p.add_argument("--latency-ms", type=float, default=60.0, help="latence médiane du faux serveur")
+    p.add_argument("--tail-rate", type=float, default=0.02, help="part de requêtes lentes (x8)")
+    p.add_argument("--error-rate", type=float, default=0.0, help="part de 503 backendError")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--warm", action="store_true", help="relance chaque scénario avec caches chauds")
+    p.add_argument("--json", help="écrit les résultats bruts dans ce fichier")
+    args = p.parse_args()
+
+    config = FakeApiConfig(
+        seed=args.seed, error_rate=args.error_rate,
+        latency={ep: Latency(median_ms=args.latency_ms, tail_rate=args.tail_rate) for ep in ENDPOINTS},
+    )
+    rows: List[Dict[str, object]] = []
+    with FakeYouTubeApi(config) as api:
+        for n_keywords in (int(x) for x in args.keywords.split(",")):
+            for pages in (int(x) for x in args.pages.split(",")):
+                with tempfile.TemporaryDirectory() as state_dir:
+                    rows.append(run_scenario(api, n_keywords, pages, args, state_dir, "froid"))
+                    if args.warm:
+                        rows.append(run_scenario(api, n_keywords, pages, args, state_dir, "chaud"))
+
+    print_table(rows)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""
+Benchmark de démarrage à froid (chaque mesure dans un interpréteur neuf):
+- import du moteur (yt_engine) et du CLI (yt_cli)
+- 1er rendu de l'app Streamlit (AppTest: import + exécution du script, sans LANCER)
+Vérifie aussi qu'aucun module lourd (googleapiclient) n'est chargé avant LANCER.
+
+    python benchmarks/bench_startup.py [--runs 5] [--max-render-ms 1500]
+
+Code retour 1 si le médian du 1er rendu dépasse --max-render-ms ou si un import lourd fuit.
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("googleapiclient.discovery", "httplib2")
+
+IMPORT_SNIPPET = """
+import json, sys, time
+t0 = time.perf_counter()
+import {module}
+dt = time.perf_counter() - t0
+print(json.dumps({{"ms": dt * 1000, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+RENDER_SNIPPET = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file("streamlit_app.py", default_timeout=60)
+at.secrets["YOUTUBE_API_KEY"] = "bench-key"
+t0 = time.perf_counter()
+at.run()
+dt = time.perf_counter() - t0
+print(json.dumps({{
+    "ms": dt * 1000,
+    "heavy": [m for m in {heavy!r} if m in sys.modules],
+    "errors": [str(e.value) for e in at.exception] + [e.value for e in at.error],
+}}))
+"""
+
+
+def run_snippet(code: str, state_dir: str) -> Dict[str, object]:
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True,
+        env={**os.environ, "YT_RESEARCH_STATE_DIR": state_dir},
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def measure(name: str, code: str, runs: int, state_dir: str) -> Dict[str, object]:
+    samples: List[Dict[str, object]] = [run_snippet(code, state_dir) for _ in range(runs)]
+    ms = [s["ms"] for s in samples]
+    return {
+        "name": name,
+        "median_ms": statistics.median(ms),
+        "min_ms": min(ms),
+        "max_ms": max(ms),
+        "heavy": sorted({m for s in samples for m in s["heavy"]}),
+        "errors": sorted({e for s in samples for e in s.get("errors", [])}),
+    }
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument("--runs", type=int, default=5)
+    p.add_argument("--max-render-ms", type=float, default=0, help="0 = pas de seuil")
+    args = p.parse_args()
+
+    # fichiers d'état (quota, cache) dans un dossier jetable: ne touche pas au quota réel
+    with tempfile.TemporaryDirectory() as tmp:
+        results = [
+            measure("import yt_engine", IMPORT_SNIPPET.format(module="yt_engine", heavy=HEAVY_MODULES), args.runs, tmp),
+            measure("import yt_cli", IMPORT_SNIPPET.format(module="yt_cli", heavy=HEAVY_MODULES), args.runs, tmp),
+            measure("streamlit 1er rendu", RENDER_SNIPPET.format(heavy=HEAVY_MODULES), args.runs, tmp),
+        ]
+
+    failed = False
+    for r in results:
+        print(f"{r['name']:<22} médian {r['median_ms']:7.1f} ms  (min {r['min_ms']:.1f}, max {r['max_ms']:.1f})")
+        if r["heavy"]:
+            print(f"  !! modules lourds chargés: {', '.join(r['heavy'])}")
+            failed = True
+        for e in r["errors"]:
+            print(f"  !! erreur au rendu: {e}")
+            failed = True
+    render = results[-1]
+    if args.max_render_ms and render["median_ms"] > args.max_render_ms:
+        print(f"!! 1er rendu {render['median_ms']:.1f} ms > seuil {args.max_render_ms:.0f} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,407 @@
+"""
+Faux serveur YouTube Data API v3 (local, 0 quota) pour benchmarks et essais hors ligne.
+
+Endpoints servis (mêmes chemins que googleapis.com): search.list, videos.list, channels.list,
+commentThreads.list, + POST /batch (multipart/mixed, sous-requêtes traitées en parallèle).
+Le moteur s'y branche via YT_RESEARCH_API_ENDPOINT=<url>.
+
+- corpus synthétique déterministe (seed): IDs, titres (mots de la requête), langues, vues,
+  abonnés, durées, dates, commentaires; les requêtes qui partagent des mots partagent des vidéos
+- latence par endpoint: loi log-normale (médiane, sigma) + queue lente (probabilité, facteur)
+- injection d'erreurs: 503 backendError, 403 rateLimitExceeded, 403 quotaExceeded (clés listées)
+
+    python benchmarks/fake_youtube_api.py --port 8765 --latency-ms 80 --error-rate 0.02
+    YT_RESEARCH_API_ENDPOINT=http://127.0.0.1:8765 streamlit run streamlit_app.py
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from email.parser import BytesParser
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlparse
+
+ENDPOINTS = ("search", "videos", "channels", "commentThreads")
+
+# Phrases courtes par langue: assez de texte pour l'identification n-grammes du moteur
+PHRASES = {
+    "fr": [
+        "ce que personne ne vous dit sur", "la vérité sur l'affaire", "il faut absolument voir ça",
+        "je vous explique pourquoi c'est important", "les dernières nouvelles de la semaine",
+        "une analyse complète et sans filtre", "ce qui s'est vraiment passé hier soir",
+    ],
+    "en": [
+        "what nobody tells you about", "the truth about the whole story", "you need to see this right now",
+        "here is why it matters for everyone", "the latest news of the week",
+        "a complete breakdown without any filter", "what really happened last night",
+    ],
+    "es": [
+        "lo que nadie te cuenta sobre", "la verdad sobre todo el asunto", "tienes que ver esto ahora mismo",
+        "te explico por qué es tan importante", "las últimas noticias de la semana",
+        "un análisis completo y sin filtros", "lo que realmente pasó anoche",
+    ],
+    "de": [
+        "was dir niemand über die sache erzählt", "die wahrheit über die ganze geschichte",
+        "das musst du dir jetzt ansehen", "ich erkläre dir warum das wichtig ist",
+        "die neuesten nachrichten der woche", "eine vollständige analyse ohne filter",
+    ],
+}
+COMMENTS = {
+    "fr": [
+        "je pense que c'est vraiment une situation très difficile pour nous tous",
+        "merci pour cette vidéo, on n'en parle pas assez dans les médias",
+        "franchement je ne savais pas du tout que c'était aussi grave",
+        "c'est exactement ce que je disais à mes amis la semaine dernière",
+    ],
+    "en": [
+        "i think this is a really difficult situation for all of us",
+        "thank you for this video, nobody is talking about it enough",
+        "honestly i had no idea it was this bad until now",
+        "this is exactly what i was telling my friends last week",
+    ],
+    "es": [
+        "creo que es una situación muy difícil para todos nosotros",
+        "gracias por este video, nadie habla de esto lo suficiente",
+        "la verdad es que no sabía que era tan grave",
+        "es exactamente lo que les decía a mis amigos la semana pasada",
+    ],
+    "de": [
+        "ich glaube das ist eine wirklich schwierige situation für uns alle",
+        "danke für das video, niemand spricht genug darüber",
+        "ehrlich gesagt wusste ich nicht dass es so schlimm ist",
+        "genau das habe ich meinen freunden letzte woche gesagt",
+    ],
+}
+LANG_WEIGHTS = (("en", 0.45), ("fr", 0.25), ("es", 0.2), ("de", 0.1))
+
+
+@dataclass
+class Latency:
+    """Latence d'un endpoint: log-normale de médiane median_ms, x tail_factor avec probabilité tail_rate."""
+    median_ms: float = 60.0
+    sigma: float = 0.35
+    tail_rate: float = 0.02
+    tail_factor: float = 8.0
+
+    def sample(self, rng: random.Random) -> float:
+        if self.median_ms <= 0:
+            return 0.0
+        ms = rng.lognormvariate(math.log(self.median_ms), self.sigma)
+        if rng.random() < self.tail_rate:
+            ms *= self.tail_factor
+        return ms / 1000.0
+
+
+@dataclass
+class FakeApiConfig:
+    seed: int = 0
+    latency: Dict[str, Latency] = field(default_factory=lambda: {ep: Latency() for ep in ENDPOINTS})
+    error_rate: float = 0.0          # 503 backendError (transitoire, retry côté moteur)
+    rate_limit_rate: float = 0.0     # 403 rateLimitExceeded (transitoire)
+    exhausted_keys: Set[str] = field(default_factory=set)  # 403 quotaExceeded (bascule de clé)
+    results_min: int = 60            # nb de résultats search par requête: [results_min, results_max]
+    results_max: int = 400
+    meta_lang_rate: float = 0.5      # part des vidéos avec defaultAudioLanguage
+    comments_per_video: int = 20
+
+    @classmethod
+    def uniform_latency(cls, median_ms: float, **kwargs) -> "FakeApiConfig":
+        return cls(latency={ep: Latency(median_ms=median_ms) for ep in ENDPOINTS}, **kwargs)
+
+
+def _h(*parts) -> int:
+    return int.from_bytes(hashlib.blake2b("\x1f".join(map(str, parts)).encode(), digest_size=8).digest(), "big")
+
+def _video_id(seed: int, word: str, slot: int) -> str:
+    return hashlib.blake2b(f"{seed}:{word}:{slot}".encode(), digest_size=8).hexdigest()[:11]
+
+def _error_body(code: int, reason: str, message: str) -> dict:
+    return {"error": {"code": code, "message": message, "errors": [{"reason": reason, "domain": "youtube", "message": message}]}}
+
+
+class FakeCorpus:
+    """
+    Corpus déterministe: chaque mot a sa liste de vidéos (slots); une requête alterne entre les
+    listes de ses mots -> "trump epstein" et "epstein" remontent en partie les mêmes vidéos.
+    Le contenu d'une vidéo dépend de son ID et des mots de la 1re requête qui l'a remontée.
+    """
+
+    def __init__(self, config: FakeApiConfig):
+        self.config = config
+        self._origin: Dict[str, Tuple[Tuple[str, ...], Optional[str]]] = {}
+        self._lists: Dict[tuple, List[str]] = {}
+        self._lock = threading.Lock()
+        self.now = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+    def _age_days(self, vid: str) -> int:
+        return _h(self.config.seed, "age", vid) % 730
+
+    def search(self, q: str, published_after: Optional[str], relevance_language: Optional[str]) -> List[str]:
+        key = (q, published_after, relevance_language)
+        with self._lock:
+            if key in self._lists:
+                return self._lists[key]
+        words = tuple(w for w in q.lower().replace("+", " ").replace('"', " ").split() if w) or ("video",)
+        cfg = self.config
+        total = cfg.results_min + _h(cfg.seed, "total", q) % max(1, cfg.results_max - cfg.results_min + 1)
+        max_age = None
+        if published_after:
+            after = datetime.fromisoformat(published_after.replace("Z", "+00:00"))
+            max_age = (self.now - after).days
+        out: List[str] = []
+        seen: Set[str] = set()
+        g = 0
+        while len(out) < total and g < total * 20:
+            word = words[g % len(words)]
+            vid = _video_id(cfg.seed, word, g // len(words))
+            g += 1
+            if vid in seen or (max_age is not None and self._age_days(vid) > max_age):
+                continue
+            seen.add(vid)
+            out.append(vid)
+        with self._lock:
+            for vid in out:
+                self._origin.setdefault(vid, (words, relevance_language))
+            self._lists[key] = out
+        return out
+
+    def _lang(self, vid: str) -> str:
+        _, relevance_language = self._origin.get(vid, ((), None))
+        r = random.Random(_h(self.config.seed, "lang", vid))
+        if relevance_language in PHRASES and r.random() < 0.7:
+            return relevance_language
+        x = r.random()
+        for lang, w in LANG_WEIGHTS:
+            x -= w
+            if x <= 0:
+                return lang
+        return "en"
+
+    def video(self, vid: str) -> dict:
+        cfg = self.config
+        words, _ = self._origin.get(vid, (("video",), None))
+        r = random.Random(_h(cfg.seed, "video", vid))
+        lang = self._lang(vid)
+        phrases = PHRASES[lang]
+        kept = [w for w in words if r.random() < 0.85] or list(words[:1])
+        title = f"{r.choice(phrases)} {' '.join(kept)}".strip()
+        desc = ". ".join(r.choice(phrases) for _ in range(r.randint(2, 6))) + f" {' '.join(words)}"
+        snippet = {
+            "title": title.capitalize(),
+            "description": desc,
+            "tags": list(words) + [lang],
+            "channelId": "UC" + hashlib.blake2b(f"{cfg.seed}:ch:{r.randrange(5000)}".encode(), digest_size=11).hexdigest()[:22],
+            "channelTitle": f"Chaîne {r.randrange(5000)}",
+            "publishedAt": (self.now - timedelta(days=self._age_days(vid), hours=r.randrange(24))).isoformat().replace("+00:00", "Z"),
+            "thumbnails": {"high": {"url": f"https://i.ytimg.com/vi/{vid}/hqdefault.jpg"}},
+        }
+        if r.random() < cfg.meta_lang_rate:
+            snippet["defaultAudioLanguage"] = lang
+        minutes = int(r.expovariate(1 / 12))
+        return {
+            "id": vid,
+            "snippet": snippet,
+            "statistics": {"viewCount": str(int(r.lognormvariate(10, 2)))},
+            "contentDetails": {"duration": f"PT{minutes // 60}H{minutes % 60}M{r.randrange(60)}S"},
+        }
+
+    def channel(self, channel_id: str) -> dict:
+        r = random.Random(_h(self.config.seed, "channel", channel_id))
+        if r.random() < 0.03:
+            return {"id": channel_id, "statistics": {"hiddenSubscriberCount": True}}
+        return {"id": channel_id, "statistics": {"subscriberCount": str(int(r.lognormvariate(9, 2.2)))}}
+
+    def comments(self, vid: str, max_results: int) -> List[str]:
+        r = random.Random(_h(self.config.seed, "comments", vid))
+        n = min(max_results, r.randint(0, self.config.comments_per_video))
+        pool = COMMENTS[self._lang(vid)]
+        return [r.choice(pool) for _ in range(n)]
+
+
+class FakeYouTubeApi:
+    """Serveur HTTP (thread) + compteurs: requêtes, erreurs injectées, octets par endpoint."""
+
+    def __init__(self, config: Optional[FakeApiConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or FakeApiConfig()
+        self.corpus = FakeCorpus(self.config)
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeYouTubeApi":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-youtube-api", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeYouTubeApi":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = {}
+
+    def _count(self, endpoint: str, name: str, n: int = 1):
+        with self._lock:
+            ep = self.stats.setdefault(endpoint, {"requests": 0, "errors": 0, "bytes": 0})
+            ep[name] = ep.get(name, 0) + n
+
+    def _draw(self, endpoint: str) -> Tuple[float, float]:
+        with self._lock:
+            return self.config.latency.get(endpoint, Latency()).sample(self._rng), self._rng.random()
+
+    def handle(self, endpoint: str, qs: Dict[str, str]) -> Tuple[int, dict]:
+        """(statut HTTP, corps JSON) d'une requête GET /youtube/v3/<endpoint>."""
+        self._count(endpoint, "requests")
+        delay, x = self._draw(endpoint)
+        time.sleep(delay)
+        cfg = self.config
+        if qs.get("key") in cfg.exhausted_keys:
+            self._count(endpoint, "errors")
+            return 403, _error_body(403, "quotaExceeded", "The request cannot be completed because you have exceeded your quota.")
+        if x < cfg.error_rate:
+            self._count(endpoint, "errors")
+            return 503, _error_body(503, "backendError", "Backend Error")
+        if x < cfg.error_rate + cfg.rate_limit_rate:
+            self._count(endpoint, "errors")
+            return 403, _error_body(403, "rateLimitExceeded", "Rate Limit Exceeded")
+
+        if endpoint == "search":
+            ids = self.corpus.search(qs.get("q", ""), qs.get("publishedAfter"), qs.get("relevanceLanguage"))
+            per_page = min(50, int(qs.get("maxResults") or 5))
+            start = int(qs.get("pageToken") or 0)
+            body = {"items": [{"id": {"kind": "youtube#video", "videoId": v}} for v in ids[start:start + per_page]]}
+            if start + per_page < len(ids):
+                body["nextPageToken"] = str(start + per_page)
+            return 200, body
+        if endpoint == "videos":
+            items = [self.corpus.video(v) for v in qs.get("id", "").split(",")[:50] if v]
+            if qs.get("part") == "statistics":
+                items = [{"id": it["id"], "statistics": it["statistics"]} for it in items]
+            return 200, {"items": items}
+        if endpoint == "channels":
+            return 200, {"items": [self.corpus.channel(c) for c in qs.get("id", "").split(",")[:50] if c]}
+        if endpoint == "commentThreads":
+            texts = self.corpus.comments(qs.get("videoId", ""), int(qs.get("maxResults") or 20))
+            return 200, {"items": [{"snippet": {"topLevelComment": {"snippet": {"textDisplay": t}}}} for t in texts]}
+        return 404, _error_body(404, "notFound", f"Unknown endpoint {endpoint}")
+
+    def handle_batch(self, content_type: str, body: bytes) -> Tuple[str, bytes]:
+        """
+        POST /batch: sous-requêtes (application/http) servies en parallèle => latence ~ la plus lente.
+        Retourne (Content-Type, corps multipart/mixed) avec 1 partie par sous-requête (Content-ID repris).
+        """
+        self._count("batch", "requests")
+        msg = BytesParser().parsebytes(b"Content-Type: " + content_type.encode() + b"\r\n\r\n" + body)
+        parts = [(part["Content-ID"], part.get_payload()) for part in msg.get_payload()]
+
+        def _one(payload: str) -> Tuple[int, dict]:
+            u = urlparse(payload.split("\n", 1)[0].split(" ")[1])
+            qs = {k: v[0] for k, v in parse_qs(u.query).items()}
+            return self.handle(u.path.rstrip("/").rsplit("/", 1)[-1], qs)
+
+        with ThreadPoolExecutor(max_workers=max(1, len(parts))) as pool:
+            replies = list(pool.map(_one, [payload for _, payload in parts]))
+        boundary = f"batch_{self._rng.getrandbits(64):016x}"
+        chunks = []
+        for (content_id, _), (status, reply) in zip(parts, replies):
+            chunks.append(
+                f"--{boundary}\r\nContent-Type: application/http\r\n"
+                f"Content-ID: <response-{content_id.strip('<>')}>\r\n\r\n"
+                f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                f"Content-Type: application/json; charset=UTF-8\r\n\r\n{json.dumps(reply)}\r\n"
+            )
+        data = ("".join(chunks) + f"--{boundary}--\r\n").encode()
+        self._count("batch", "bytes", len(data))
+        return f"multipart/mixed; boundary={boundary}", data
+
+    def _handler_class(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def handle(self):
+                try:
+                    super().handle()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # client parti avant la réponse (requête hedgée perdante coupée par le moteur)
+
+            def do_GET(self):
+                u = urlparse(self.path)
+                qs = {k: v[0] for k, v in parse_qs(u.query).items()}
+                endpoint = u.path.rstrip("/").rsplit("/", 1)[-1]
+                status, body = api.handle(endpoint, qs)
+                data = json.dumps(body).encode()
+                api._count(endpoint, "bytes", len(data))
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=UTF-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if urlparse(self.path).path.rstrip("/").rsplit("/", 1)[-1] != "batch":
+                    self.send_error(404)
+                    return
+                content_type, data = api.handle_batch(self.headers.get("Content-Type", ""), body)
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--latency-ms", type=float, default=60.0, help="latence médiane (tous endpoints)")
+    p.add_argument("--error-rate", type=float, default=0.0, help="part de 503 backendError")
+    p.add_argument("--rate-limit-rate", type=float, default=0.0, help="part de 403 rateLimitExceeded")
+    p.add_argument("--exhausted-key", action="append", default=[], help="clé qui répond quotaExceeded (répétable)")
+    args = p.parse_args()
+
+    config = FakeApiConfig.uniform_latency(
+        args.latency_ms, seed=args.seed, error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate, exhausted_keys=set(args.exhausted_key),
+    )
+    api = FakeYouTubeApi(config, args.host, args.port)
+    print(f"Faux YouTube Data API sur {api.url} (YT_RESEARCH_API_ENDPOINT={api.url})")
+    try:
+        api._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Tests hors ligne: modules du dépôt importables, réseau coupé (seul 127.0.0.1 reste joignable,
+pour le faux serveur de benchmarks/fake_youtube_api.py), état du moteur isolé par test.
+"""
+from __future__ import annotations
+import os
+import socket
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+FIXTURES_DIR = os.path.join(ROOT, "tests", "fixtures")
+
+import yt_engine  # noqa: E402
+from fake_youtube_api import FakeApiConfig, FakeYouTubeApi  # noqa: E402
+
+# Instances par process recréées à chaque test (quota, cache SQLite, routeur, compteurs...)
+ENGINE_SINGLETONS = (
+    yt_engine.key_pool, yt_engine.api_call_stats, yt_engine.meta_cache, yt_engine.single_flight,
+    yt_engine.cache_stats, yt_engine.backend_router, yt_engine.comments_cache,
+)
+LOCAL_HOSTS = {"127.0.0.1", "localhost", "::1"}
+
+
+@pytest.fixture(autouse=True)
+def no_network(monkeypatch):
+    connect = socket.socket.connect
+
+    def guarded(sock, address):
+        host = address[0] if isinstance(address, tuple) else address
+        if isinstance(host, str) and host not in LOCAL_HOSTS and not host.startswith("/"):
+            raise OSError(f"réseau coupé pendant les tests: {address}")
+        return connect(sock, address)
+
+    monkeypatch.setattr(socket.socket, "connect", guarded)
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    """yt_engine avec un dossier d'état vide, 1 clé API factice et des singletons neufs."""
+    monkeypatch.setattr(yt_engine, "STATE_DIR", str(tmp_path))
+    monkeypatch.setattr(yt_engine, "BACKEND_MODE", "auto")
+    monkeypatch.setattr(yt_engine, "API_ENDPOINT", None)
+    yt_engine.set_key_source({"YOUTUBE_API_KEY": "test-key-1"})
+    for get in ENGINE_SINGLETONS:
+        get.clear()
+    yield yt_engine
+    for get in ENGINE_SINGLETONS:
+        get.clear()
+    yt_engine.set_key_source(os.environ)
+
+
+@pytest.fixture
+def api():
+    """Faux serveur YouTube Data API sans latence (config modifiable pendant le test: api.config)."""
+    with FakeYouTubeApi(FakeApiConfig.uniform_latency(0)) as server:
+        yield server
+
+
+@pytest.fixture
+def api_engine(engine, api, monkeypatch):
+    """yt_engine branché sur le faux serveur; backoff court, pas de doublons hedgés (compteurs exacts)."""
+    monkeypatch.setattr(engine, "API_ENDPOINT", api.url)
+    monkeypatch.setattr(engine, "API_BACKOFF_BASE", 0.01)
+    monkeypatch.setattr(engine, "API_HEDGE_ENABLED", False)
+    return engine
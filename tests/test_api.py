@@ -0,0 +1,184 @@
+"""Couche d'exécution API contre le faux serveur: retries + backoff, bascule de clé sur quotaExceeded, batch, doublon hedgé gagnant."""
+from __future__ import annotations
+import re
+import time
+
+import pytest
+
+import yt_http
+from fake_youtube_api import _error_body
+
+
+def _channels(yt):
+    return yt.channels().list(part="statistics", id="UCa,UCb")
+
+
+def _failing(api, monkeypatch, fail):
+    """fail(endpoint, qs) -> (statut, raison) pour injecter une erreur précise, None = réponse normale."""
+    handle = api.handle
+
+    def patched(endpoint, qs):
+        err = fail(endpoint, qs)
+        if err is None:
+            return handle(endpoint, qs)
+        api._count(endpoint, "requests")
+        api._count(endpoint, "errors")
+        return err[0], _error_body(err[0], err[1], err[1])
+
+    monkeypatch.setattr(api, "handle", patched)
+
+
+def test_transient_errors_are_retried_with_backoff(api_engine, api, monkeypatch):
+    left = {"n": 2}
+
+    def fail(endpoint, qs):
+        if left["n"]:
+            left["n"] -= 1
+            return 503, "backendError"
+
+    _failing(api, monkeypatch, fail)
+    monkeypatch.setattr(api_engine.random, "uniform", lambda lo, hi: hi)  # jitter au maximum
+    logs = []
+    res = api_engine.api_execute("channels.list", _channels, 1, logs=logs)
+    assert [it["id"] for it in res["items"]] == ["UCa", "UCb"]
+    assert api.stats["channels"]["requests"] == 3
+
+    stats = api_engine.api_call_stats().snapshot()
+    assert (stats["calls"], stats["attempts"], stats["retries"], stats["retryable_errors"]) == (1, 3, 2, 2)
+    assert stats["gave_up"] == 0
+    # backoff exponentiel: BASE * 2**n avant la tentative n+1 (jitter au maximum)
+    delays = [float(d) for d in re.findall(r"\[RETRY\] channels.list tentative \d dans ([\d.]+)s", "\n".join(logs))]
+    assert delays == [0.02, 0.04]
+    # 1 unité facturée par tentative partie
+    assert api_engine.key_pool().used() == 3
+
+
+def test_gives_up_after_max_retries(api_engine, api):
+    from googleapiclient.errors import HttpError
+
+    api.config.error_rate = 1.0
+    with pytest.raises(HttpError):
+        api_engine.api_execute("channels.list", _channels, 1, logs=[])
+    assert api.stats["channels"]["requests"] == api_engine.API_MAX_RETRIES + 1
+    assert api_engine.api_call_stats().snapshot()["gave_up"] == 1
+
+
+def test_no_retry_past_deadline(api_engine, api, monkeypatch):
+    from googleapiclient.errors import HttpError
+
+    api.config.error_rate = 1.0
+    monkeypatch.setattr(api_engine, "API_BACKOFF_BASE", 1.0)
+    monkeypatch.setattr(api_engine.random, "uniform", lambda lo, hi: hi)
+    with pytest.raises(HttpError):  # 2s d'attente > deadline: abandon sans dormir
+        api_engine.api_execute("channels.list", _channels, 1, logs=[], deadline_t=time.monotonic() + 1.0)
+    assert api.stats["channels"]["requests"] == 1
+
+
+def test_fatal_error_is_not_retried(api_engine, api, monkeypatch):
+    from googleapiclient.errors import HttpError
+
+    _failing(api, monkeypatch, lambda endpoint, qs: (400, "badRequest"))
+    with pytest.raises(HttpError):
+        api_engine.api_execute("channels.list", _channels, 1, logs=[])
+    assert api.stats["channels"]["requests"] == 1
+    assert api_engine.api_call_stats().snapshot()["fatal_errors"] == 1
+
+
+def test_winning_hedge_cuts_the_primary_connection(api_engine, api, monkeypatch):
+    monkeypatch.setattr(api_engine, "API_HEDGE_ENABLED", True)
+    stats = api_engine.api_call_stats()
+    for _ in range(api_engine.API_HEDGE_MIN_SAMPLES):
+        stats.record_latency("channels.list", 0.05)  # p95 connu -> doublon après 50 ms
+    handle = api.handle
+    stalled = {"n": 1}
+
+    def patched(endpoint, qs):
+        if stalled["n"]:  # la requête principale reste bloquée côté serveur
+            stalled["n"] -= 1
+            time.sleep(2)
+        return handle(endpoint, qs)
+
+    monkeypatch.setattr(api, "handle", patched)
+    cut = []
+    shutdown = yt_http._shutdown
+
+    def recording(conn):
+        cut.append(conn.sock)
+        shutdown(conn)
+
+    monkeypatch.setattr(yt_http, "_shutdown", recording)
+
+    t0 = time.monotonic()
+    res = api_engine.api_execute("channels.list", _channels, 1, logs=[])
+    assert time.monotonic() - t0 < 1.0  # la principale coupée ne retient pas l'appelant
+    assert [it["id"] for it in res["items"]] == ["UCa", "UCb"]
+    snap = stats.snapshot()
+    assert (snap["hedges"], snap["hedge_wins"]) == (1, 1)
+    # socket de la principale coupé, puis fermé par urllib3 au lieu de retourner au pool
+    assert len(cut) == 1 and cut[0].fileno() == -1
+    assert api_engine.key_pool().used() == 2
+
+
+@pytest.fixture
+def two_keys(api_engine):
+    api_engine.set_key_source({"YOUTUBE_API_KEY": "key-1", "YOUTUBE_API_KEYS": "key-2"})
+    api_engine.key_pool.clear()
+    return api_engine
+
+
+def test_quota_exceeded_fails_over_to_next_key(two_keys, api):
+    engine = two_keys
+    api.config.exhausted_keys.add("key-1")
+    logs = []
+    res = engine.api_execute("channels.list", _channels, 1, logs=logs)
+    assert len(res["items"]) == 2
+    assert engine.api_call_stats().snapshot()["key_failovers"] == 1
+    assert any(line.startswith("[WARN] clé …ey-1: quota épuisé") for line in logs)
+
+    pool = engine.key_pool()
+    assert [k.api_key for k in pool.available()] == ["key-2"]
+    # clé écartée pour la journée: plus aucune requête dessus
+    engine.api_execute("channels.list", _channels, 1, logs=logs)
+    assert engine.api_call_stats().snapshot()["key_failovers"] == 1
+    assert api.stats["channels"] == {"requests": 3, "errors": 1, "bytes": api.stats["channels"]["bytes"]}
+
+
+def test_all_keys_exhausted_raises(two_keys, api):
+    engine = two_keys
+    api.config.exhausted_keys.update({"key-1", "key-2"})
+    with pytest.raises(engine.QuotaExhaustedError):
+        engine.api_execute("channels.list", _channels, 1, logs=[])
+    assert engine.api_call_stats().snapshot()["key_failovers"] == 2
+    assert engine.key_pool().remaining() == 0
+
+
+def test_batch_fails_over_to_next_key(two_keys, api):
+    engine = two_keys
+    api.config.exhausted_keys.add("key-1")
+    vids = ["vid00000001", "vid00000002", "vid00000003"]
+    out = engine.api_fetch_top_comments_batch(vids, logs=[])
+    assert out == {vid: api.corpus.comments(vid, 20) for vid in vids}
+    assert api.stats["batch"]["requests"] == 2  # lot refusé sur key-1, rejoué en entier sur key-2
+    assert engine.api_call_stats().snapshot()["key_failovers"] == 1
+
+
+def test_batch_replies_are_matched_to_their_ids(api_engine, api, monkeypatch):
+    vids = [f"vid0000000{i}" for i in range(6)]
+    _failing(api, monkeypatch, lambda endpoint, qs: (403, "commentsDisabled") if qs.get("videoId") == vids[2] else None)
+    out = api_engine.api_fetch_top_comments_batch(vids, logs=[])
+
+    assert list(out) == vids
+    expected = {vid: api.corpus.comments(vid, 20) for vid in vids}
+    expected[vids[2]] = []
+    assert out == expected
+    assert len({tuple(c) for c in out.values() if c}) > 1  # réponses distinctes, pas 1 réponse recopiée
+    assert api.stats["batch"]["requests"] == 1
+    assert api.stats["commentThreads"]["requests"] == len(vids)
+    stats = api_engine.api_call_stats().snapshot()
+    assert (stats["calls"], stats["batches"], stats["fatal_errors"], stats["retries"]) == (len(vids), 1, 1, 0)
+
+    # réponses mises en cache par vidéo (sauf l'échec): seule la vidéo en échec repart
+    again = api_engine.api_fetch_top_comments_batch(vids, logs=[])
+    assert again == out
+    assert api.stats["commentThreads"]["requests"] == len(vids) + 1
+    assert api.stats["batch"]["requests"] == 1  # 1 seule sous-requête -> appel simple
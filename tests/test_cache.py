@@ -0,0 +1,116 @@
+"""Caches mémoire (TTLCache) et persistant (MetaCache): expiration, éviction LRU, fraîcheur lente / rapide."""
+from __future__ import annotations
+import time
+
+import pytest
+
+
+class Clock:
+    """Horloge de yt_engine avancée à la main (time.time et time.monotonic); le reste du module time inchangé."""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self) -> float:
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+
+@pytest.fixture
+def clock(engine, monkeypatch):
+    c = Clock()
+    monkeypatch.setattr(engine, "time", c)
+    return c
+
+
+def test_ttl_cache_expires_entries(engine, clock):
+    cache = engine.TTLCache(60, 10)
+    cache.put("a", 1)
+    clock.now += 60
+    assert cache.get("a") == (True, 1)
+    clock.now += 1
+    assert cache.get("a") == (False, None)
+    assert len(cache) == 0
+
+
+def test_ttl_cache_evicts_least_recently_used(engine):
+    cache = engine.TTLCache(float("inf"), 2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == (True, 1)  # "b" devient la plus ancienne
+    cache.put("c", 3)
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, 1) and cache.get("c") == (True, 3)
+
+
+def test_ttl_cache_bounded_by_bytes(engine):
+    cache = engine.TTLCache(float("inf"), 100, maxbytes=10, sizeof=len)
+    cache.put("a", "x" * 6)
+    cache.put("b", "y" * 3)
+    assert (len(cache), cache.nbytes) == (2, 9)
+    cache.put("c", "z" * 4)
+    assert cache.get("a") == (False, None)
+    assert (len(cache), cache.nbytes) == (2, 7)
+    cache.put("b", "y")  # remplacement: ancienne taille rendue
+    assert cache.nbytes == 5
+    # une valeur plus grosse que la limite reste seule en cache (jamais vide après put)
+    cache.put("d", "w" * 50)
+    assert (len(cache), cache.nbytes) == (1, 50)
+
+
+def _video(vid: str, views: int) -> dict:
+    return {
+        "id": vid,
+        "snippet": {"title": f"titre {vid}", "channelId": "UCa"},
+        "contentDetails": {"duration": "PT1M"},
+        "statistics": {"viewCount": str(views)},
+    }
+
+
+def test_meta_cache_slow_and_fast_freshness(engine, clock, tmp_path):
+    cache = engine.MetaCache(str(tmp_path / "meta.sqlite"))
+    cache.put_videos([_video("v1", 10)])
+
+    fresh, stale, misses = cache.get_videos(["v1", "v2"])
+    assert fresh["v1"]["statistics"] == {"viewCount": "10"} and not stale and misses == ["v2"]
+
+    # vues périmées: seule la partie lente est servie, il ne manque que statistics
+    clock.now += engine.VIDEO_FAST_TTL + 1
+    fresh, stale, misses = cache.get_videos(["v1"])
+    assert not fresh and misses == []
+    assert stale["v1"]["snippet"]["title"] == "titre v1" and "statistics" not in stale["v1"]
+
+    cache.put_video_stats([{"id": "v1", "statistics": {"viewCount": "25"}}])
+    fresh, _, _ = cache.get_videos(["v1"])
+    assert fresh["v1"]["statistics"] == {"viewCount": "25"}
+
+    # partie lente périmée: tout est à recharger
+    clock.now += engine.VIDEO_SLOW_TTL
+    assert cache.get_videos(["v1"]) == ({}, {}, ["v1"])
+
+
+def test_meta_cache_memory_front_falls_back_to_sqlite(engine, monkeypatch, tmp_path):
+    monkeypatch.setattr(engine, "META_MEMORY_ROWS", 2)
+    cache = engine.MetaCache(str(tmp_path / "meta.sqlite"))
+    vids = ["v1", "v2", "v3"]
+    cache.put_videos([_video(vid, i) for i, vid in enumerate(vids)])
+    assert len(cache._mem["videos"]) == 2  # "v1" évincée de la mémoire...
+
+    fresh, _, misses = cache.get_videos(vids)
+    assert sorted(fresh) == vids and misses == []  # ... mais relue depuis SQLite
+    assert fresh["v1"]["statistics"] == {"viewCount": "0"}
+    assert len(cache._mem["videos"]) == 2
+
+
+def test_meta_cache_search_page_ttl(engine, clock, tmp_path):
+    cache = engine.MetaCache(str(tmp_path / "meta.sqlite"))
+    cache.put_search_page("k", ["v1", "v2"], "tok")
+    assert cache.get_search_page("k", ttl=60) == (["v1", "v2"], "tok")
+    clock.now += 61
+    assert cache.get_search_page("k", ttl=60) is None
+    assert cache.get_search_page("k", ttl=3600) == (["v1", "v2"], "tok")
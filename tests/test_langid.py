@@ -0,0 +1,71 @@
+"""Identification de langue (yt_langid) sur des titres étiquetés: tests/fixtures/langid/titles.tsv."""
+from __future__ import annotations
+import gzip
+import hashlib
+import os
+from collections import Counter
+
+import pytest
+
+import yt_langid
+from conftest import FIXTURES_DIR
+from yt_langid import get_identifier, identify_languages, load_profiles
+
+TITLES_PATH = os.path.join(FIXTURES_DIR, "langid", "titles.tsv")
+# sha256 du JSON décompressé de yt_langid_profiles.json.gz (à mettre à jour en regénérant les profils)
+PROFILES_SHA256 = "b1bd647d7975172ba8ae786c3fa6736b321c07449594c70fe537c26e330be53b"
+
+
+def load_titles():
+    """[(langue, titre)] du fichier étiqueté (lignes "#" = commentaires)."""
+    with open(TITLES_PATH, encoding="utf-8") as f:
+        return [tuple(line.rstrip("\n").split("\t", 1)) for line in f if line.strip() and not line.startswith("#")]
+
+
+def test_accuracy_on_labelled_titles():
+    titles = load_titles()
+    preds = identify_languages([t for _, t in titles])
+    wrong = [(lang, pred, title) for (lang, title), (pred, _) in zip(titles, preds) if pred != lang]
+    assert len(wrong) <= len(titles) * 0.03, wrong
+    # au moins 90% par langue
+    per_lang = Counter(lang for lang, _ in titles)
+    for lang, n in per_lang.items():
+        assert sum(1 for w in wrong if w[0] == lang) <= n * 0.1, lang
+
+
+def test_short_spanish_headline():
+    lang, conf = get_identifier().identify("Trump anuncia nuevas sanciones contra China")
+    assert lang == "es" and conf > 0.5
+
+
+def test_batch_matches_single_texts(monkeypatch):
+    titles = [t for _, t in load_titles()]
+    batch = identify_languages(titles)
+    # lot découpé en plusieurs produits matriciels: mêmes verdicts
+    monkeypatch.setattr(yt_langid, "SCORE_BLOCK", 50)
+    assert identify_languages(titles) == pytest.approx(batch)
+    for title, expected in list(zip(titles, batch))[::10]:
+        assert get_identifier().identify(title) == pytest.approx(expected)
+
+
+def test_no_verdict():
+    assert identify_languages(["", "ok", "https://youtu.be/xV3k9Lq2mPA 2025", "短い日本語のタイトルです"]) == [(None, 0.0)] * 4
+
+
+def test_other_scripts_are_not_target_languages():
+    for text, lang in [
+        ("Путин заявил о новых санкциях против Запада", "ru"),
+        ("ترامب يعلن عقوبات جديدة على الصين", "ar"),
+        ("Ο Τραμπ ανακοινώνει νέες κυρώσεις κατά της Κίνας", "el"),
+    ]:
+        assert identify_languages([text])[0][0] == lang
+
+
+def test_shipped_profiles_checksum():
+    with gzip.open(yt_langid.PROFILES_PATH, "rb") as f:
+        assert hashlib.sha256(f.read()).hexdigest() == PROFILES_SHA256
+
+
+def test_shipped_profiles_match_build():
+    pytest.importorskip("langdetect")  # requirements-dev.txt
+    assert load_profiles() == yt_langid.build_profiles()
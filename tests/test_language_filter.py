@@ -0,0 +1,88 @@
+"""Filtre langue: seuils du texte calibrés sur titres étiquetés, commentaires avant un rejet incertain."""
+from __future__ import annotations
+import os
+import zlib
+
+import pytest
+
+import yt_index
+from conftest import FIXTURES_DIR
+from fake_youtube_api import FakeApiConfig, FakeYouTubeApi
+from yt_engine import LANG_TEXT_MIN_CONFIDENCE, LANG_TEXT_REJECT_CONFIDENCE, new_run_stats, run_snapshot
+from yt_langid import identify_languages
+
+CALIBRATION_MARGIN = 0.15  # écart minimal entre la pire erreur et le seuil d'acceptation
+
+
+def labelled_titles():
+    titles = []
+    for name in ("titles.tsv", "short_titles.tsv"):
+        with open(os.path.join(FIXTURES_DIR, "langid", name), encoding="utf-8") as f:
+            titles += [tuple(line.rstrip("\n").split("\t", 1)) for line in f if line.strip() and not line.startswith("#")]
+    return titles
+
+
+def test_text_thresholds_are_calibrated():
+    titles = labelled_titles()
+    guesses = identify_languages([t for _, t in titles])
+    scored = [(pred == lang, conf) for (lang, _), (pred, conf) in zip(titles, guesses)]
+    worst_error = max((conf for ok, conf in scored if not ok), default=0.0)
+    covered = [ok for ok, conf in scored if conf >= LANG_TEXT_MIN_CONFIDENCE]
+    # aucune erreur au-dessus du seuil, avec de la marge, et >= 85% des titres tranchés sans commentaires
+    assert all(covered)
+    assert worst_error <= LANG_TEXT_MIN_CONFIDENCE - CALIBRATION_MARGIN
+    assert len(covered) >= 0.85 * len(titles)
+    assert LANG_TEXT_REJECT_CONFIDENCE >= 0.95
+
+
+def _candidate(vid: str) -> dict:
+    return {"video_id": vid, "default_audio_language": None, "default_language": None, "lang_text": vid}
+
+
+@pytest.mark.parametrize("guess, verdict", [
+    (("fr", 0.85), "accepted"),   # langue cible, au-dessus du seuil
+    (("es", 0.90), "pending"),    # autre langue mais incertain -> commentaires
+    (("es", 0.97), "rejected"),   # autre langue, sûr
+    (("fr", 0.50), "pending"),    # trop faible dans les deux sens
+])
+def test_precheck_sends_uncertain_rejections_to_comments(engine, monkeypatch, guess, verdict):
+    monkeypatch.setattr(engine, "identify_languages", lambda texts: [guess] * len(texts))
+    stats = new_run_stats()
+    accepted, pending = engine.precheck_languages([_candidate("v1")], "fr", True, stats)
+    got = "accepted" if accepted else "pending" if pending else "rejected"
+    assert got == verdict
+    assert stats["filtered_language"] == (verdict == "rejected")
+    assert stats["lang_from_text"] == (verdict != "pending")
+
+
+def _blurred_langid(texts):
+    """Verdicts réels, dégradés selon le texte: inférences faibles, erreurs sûres ou incertaines."""
+    out = []
+    for text, (lang, conf) in zip(texts, identify_languages(texts)):
+        bucket = zlib.crc32(text.encode()) % 4
+        if bucket == 1:
+            lang, conf = "de", 0.9     # autre langue, incertain -> commentaires
+        elif bucket == 2:
+            lang, conf = "de", 0.97    # autre langue, sûr -> rejet
+        elif bucket == 3 and lang:
+            conf = 0.9                 # bonne langue, confiance moyenne
+        out.append((lang, conf))
+    return out
+
+
+def test_index_refilter_matches_pipeline(engine, monkeypatch):
+    monkeypatch.setattr(engine, "identify_languages", _blurred_langid)
+    monkeypatch.setattr(yt_index, "identify_languages", _blurred_langid)
+    params = {
+        "keywords": ["trump epstein"], "language": "French", "require_proof": True, "pages": 1, "per_page": 50,
+        "min_views": 0, "max_display": None, "deadline_seconds": None,
+    }
+    with FakeYouTubeApi(FakeApiConfig.uniform_latency(0, meta_lang_rate=0.2)) as api:
+        monkeypatch.setattr(engine, "API_ENDPOINT", api.url)
+        run = engine.run_pipeline(params, fetch_comments=False)
+    assert run.stats["lang_comment_checks"] > 0 and run.stats["filtered_language"] > 0
+
+    again = yt_index.refilter_run(run_snapshot(params, run), params)
+    assert [v["video_id"] for v in again.results] == [v["video_id"] for v in run.results]
+    for key in ("filtered_language", "lang_from_text", "passed_total"):
+        assert again.stats[key] == run.stats[key], key
@@ -0,0 +1,104 @@
+"""Planner de recherche (budget quota), fermeture de iter_pipeline en cours de recherche, runs coupés à la deadline."""
+from __future__ import annotations
+import time
+
+import yt_trace
+
+KEYWORDS = ["trump", "epstein", "ice"]
+
+
+def _search_many(engine, quota_remaining, logs):
+    return engine.api_search_many(
+        KEYWORDS, pages=5, per_page=50, relevance_language=None, region_code=None, published_after=None,
+        deadline_t=time.monotonic() + 60, logs=logs, quota_remaining=quota_remaining,
+    )
+
+
+def test_planner_spends_only_its_page_budget(api_engine, api):
+    budget = 4
+    logs = []
+    ids_by_kw = _search_many(api_engine, api_engine.PLANNER_QUOTA_RESERVE + 100 * budget, logs)
+    assert f"[PLAN] budget: {budget} pages payantes" in logs[0]
+    # tour 1: 1 page par mot-clé, tour 2: la page restante au mot-clé le plus rentable
+    assert api.stats["search"]["requests"] == budget
+    assert all(ids_by_kw[kw] for kw in KEYWORDS)
+    assert sorted(len(ids) for ids in ids_by_kw.values()) == [50, 50, 100]
+    stops = [line for line in logs if "budget quota épuisé" in line]
+    assert len(stops) == len(KEYWORDS)
+
+    # sans budget: les pages en cache restent gratuites, rien ne part
+    logs = []
+    assert _search_many(api_engine, api_engine.PLANNER_QUOTA_RESERVE, logs) == ids_by_kw
+    assert "[PLAN] budget: 0 pages payantes" in logs[0]
+    assert api.stats["search"]["requests"] == budget
+
+
+def test_planner_budget_defaults_to_key_pool_headroom(api_engine, api):
+    api_engine.key_pool().keys[0].ledger.charge("search.list", api_engine.DAILY_LIMIT - 300)
+    logs = []
+    _search_many(api_engine, None, logs)
+    assert "[PLAN] budget: 1 pages payantes (quota restant 300)" in logs[0]
+    assert api.stats["search"]["requests"] == 1
+
+
+def _slow_and_fast_search(api, monkeypatch, delay):
+    """"fast": 1 seule page; "slow": des dizaines de pages, chacune servie en delay secondes."""
+    handle = api.handle
+
+    def patched(endpoint, qs):
+        if endpoint == "search" and qs.get("q") == "slow":
+            time.sleep(delay)
+        status, body = handle(endpoint, qs)
+        if endpoint == "search" and qs.get("q") == "fast":
+            body.pop("nextPageToken", None)
+        return status, body
+
+    monkeypatch.setattr(api, "handle", patched)
+
+
+def test_closing_iter_pipeline_stops_search(api_engine, api, monkeypatch):
+    api.config.results_min = api.config.results_max = 400
+    _slow_and_fast_search(api, monkeypatch, delay=0.05)
+    params = {
+        "keywords": ["fast", "slow"], "pages": 50, "per_page": 5, "require_proof": False, "deadline_seconds": None,
+    }
+    events = api_engine.iter_pipeline(params, fetch_comments=False)
+    for ev in events:
+        if ev.kind == "keyword":
+            assert ev.data[0] == "fast"
+            break
+    t0 = time.monotonic()
+    events.close()
+
+    # le planner s'arrête au tour suivant au lieu de parcourir les 50 pages de "slow"
+    assert time.monotonic() - t0 < 1.0
+    assert api.stats["search"]["requests"] <= 1 + 3
+    assert "videos" not in api.stats and "channels" not in api.stats
+    assert yt_trace._tracer.get() is None  # tracer du run non fuité dans le contexte appelant
+
+    # le moteur reste utilisable après l'abandon
+    run = api_engine.run_pipeline({**params, "keywords": ["fast"]}, fetch_comments=False)
+    assert run.stats["ids_found"] == 5
+    assert api.stats["videos"]["requests"] >= 1
+
+
+def test_deadline_cut_run_only_serves_stricter_filters(api_engine, api, monkeypatch):
+    _slow_and_fast_search(api, monkeypatch, delay=0.1)
+    params = {
+        "keywords": ["fast", "slow"], "pages": 50, "per_page": 5, "min_views": 1000, "min_duration": "2 min",
+        "require_proof": False, "deadline_seconds": 0.5,
+    }
+    run = api_engine.run_pipeline(params, fetch_comments=False)
+    assert run.stats["deadline_cut"] == 1
+    snapshot = api_engine.run_snapshot(params, run)
+    assert snapshot["partial"]
+    assert api_engine.snapshot_covers(snapshot, params)
+    stricter = {"min_views": 5000, "min_duration": "10 min", "require_proof": True, "match_in": "Titre seulement"}
+    assert api_engine.snapshot_covers(snapshot, {**params, **stricter})
+    # filtre plus large: des vidéos jamais cherchées / hydratées pourraient passer -> relancer
+    for broader in ({"min_views": 0}, {"min_duration": "Toutes"}):
+        assert not api_engine.snapshot_covers(snapshot, {**params, **broader})
+
+    full = api_engine.run_snapshot(params, run._replace(stats={**run.stats, "deadline_cut": 0}))
+    assert not full["partial"]
+    assert api_engine.snapshot_covers(full, {**params, "min_views": 0, "min_duration": "Toutes"})
@@ -0,0 +1,16 @@
+"""Jour de quota: minuit heure du Pacifique, heure d'été comprise."""
+from __future__ import annotations
+from datetime import datetime, timezone
+
+
+def test_quota_day_follows_pacific_daylight_time(engine):
+    assert not engine.QUOTA_TZ_FALLBACK  # tzdata (requirements.txt) ou base tz du système
+    # 07:30 UTC en juillet = 00:30 PDT (UTC-7): nouveau jour de quota, 23:30 la veille en UTC-8 fixe
+    assert engine.quota_day(datetime(2026, 7, 1, 7, 30, tzinfo=timezone.utc)) == "2026-07-01"
+    assert engine.quota_day(datetime(2026, 1, 1, 7, 30, tzinfo=timezone.utc)) == "2025-12-31"
+
+
+def test_fixed_offset_fallback_is_logged(engine, monkeypatch):
+    monkeypatch.setattr(engine, "QUOTA_TZ_FALLBACK", True)
+    run = engine.run_pipeline({"keywords": [], "deadline_seconds": None}, fetch_comments=False)
+    assert any(line.startswith("[WARN] fuseau America/Los_Angeles") for line in run.logs)
@@ -0,0 +1,84 @@
+"""Watchlists contre le faux serveur: watermark exact, rafraîchissement toujours sur la Data API."""
+from __future__ import annotations
+
+import pytest
+
+from conftest import FIXTURES_DIR
+from yt_watch import new_watchlist, refresh_watchlist
+
+PARAMS = {
+    "keywords": ["trump epstein"], "language": "Auto (no language filter)", "pages": 2, "per_page": 20,
+    "min_views": 0, "require_proof": False, "deadline_seconds": None,
+}
+
+
+@pytest.fixture
+def watch_engine(engine, api, monkeypatch):
+    # yt-dlp utilisable (fixtures): le rafraîchissement ne doit pas s'en servir pour autant
+    monkeypatch.setenv("YT_RESEARCH_YTDLP_FIXTURES", f"{FIXTURES_DIR}/ytdlp")
+    monkeypatch.setattr(engine, "API_ENDPOINT", api.url)
+    return engine
+
+
+def _searches(api, monkeypatch):
+    sent = []
+    search = api.corpus.search
+
+    def recording(q, published_after, relevance_language):
+        sent.append(published_after)
+        return search(q, published_after, relevance_language)
+
+    monkeypatch.setattr(api.corpus, "search", recording)
+    return sent
+
+
+def test_refresh_sends_exact_watermark(watch_engine, api, monkeypatch):
+    run = watch_engine.run_pipeline(PARAMS, fetch_comments=False)
+    watchlist = new_watchlist("w", PARAMS, run)
+    state = watchlist["keywords"]["trump epstein"]
+    assert set(state) == {"watermark"}
+    assert state["watermark"] == max(it["snippet"]["publishedAt"] for it in run.videos.values())
+    assert not state["watermark"].endswith("T00:00:00Z")  # pas arrondi au jour
+
+    watermark = state["watermark"]
+    sent = _searches(api, monkeypatch)
+    diff = refresh_watchlist(watchlist, deadline_seconds=None)
+    assert sent == [watermark]
+    assert diff.units >= 100 + 1  # 1 page search + 1 lot videos.list statistics (+ hydratation des nouvelles)
+    assert diff.units_by_endpoint["search.list"] == 100
+    assert diff.refreshed == len(watchlist["videos"]) - len(diff.run.videos)
+
+
+def test_refresh_reports_only_its_own_units(watch_engine, api, monkeypatch):
+    run = watch_engine.run_pipeline(PARAMS, fetch_comments=False)
+    watchlist = new_watchlist("w", PARAMS, run)
+    handle = api.handle
+    others = []
+
+    def busy_process(endpoint, qs):
+        # une autre session du process consomme pendant le rafraîchissement
+        watch_engine.key_pool().keys[0].ledger.charge("search.list", 100)
+        others.append(100)
+        return handle(endpoint, qs)
+
+    monkeypatch.setattr(api, "handle", busy_process)
+    used0 = watch_engine.key_pool().used()
+    diff = refresh_watchlist(watchlist, deadline_seconds=None)
+    assert others
+    assert watch_engine.key_pool().used() - used0 == diff.units + sum(others)
+    assert diff.units == sum(diff.units_by_endpoint.values())
+    assert diff.units_by_endpoint["search.list"] == 100
+
+
+def test_refresh_never_falls_back_to_ytdlp(watch_engine, api, monkeypatch):
+    run = watch_engine.run_pipeline(PARAMS, fetch_comments=False)
+    watchlist = new_watchlist("w", PARAMS, run)
+    assert watch_engine.backend_router().free() is not None
+
+    api.config.exhausted_keys.add("test-key-1")
+    diff = refresh_watchlist(watchlist, deadline_seconds=None)
+    assert not any(k.startswith("ytdlp.") for k in watch_engine.backend_router().snapshot())
+    assert not any("via ytdlp" in line for line in diff.run.logs)
+    assert diff.new == [] and diff.refreshed == 0
+    # hors watchlist, le repli yt-dlp reste actif
+    assert watch_engine.backend_router().pick("search", 100) is watch_engine.backend_router().free()
@@ -0,0 +1,158 @@
+"""
+Backend yt-dlp rejoué sur les fixtures de tests/fixtures/ytdlp (aucun accès réseau).
+Fixtures = sorties brutes d'extract_info enregistrées par YT_RESEARCH_YTDLP_RECORD=1.
+"""
+from __future__ import annotations
+import json
+import os
+
+import pytest
+
+from conftest import FIXTURES_DIR
+from yt_ytdlp import YtDlpExtractor, audio_language, normalize_channel, normalize_video
+
+YTDLP_FIXTURES = os.path.join(FIXTURES_DIR, "ytdlp")
+QUERY = "epstein trump"  # build_stable_api_query("trump epstein")
+N_RESULTS = 12
+
+
+@pytest.fixture
+def extractor():
+    return YtDlpExtractor(fixtures_dir=YTDLP_FIXTURES)
+
+
+@pytest.fixture
+def ytdlp_engine(engine, monkeypatch):
+    monkeypatch.setenv("YT_RESEARCH_YTDLP_FIXTURES", YTDLP_FIXTURES)
+    monkeypatch.delenv("YT_RESEARCH_YTDLP_RECORD", raising=False)
+    monkeypatch.setattr(engine, "BACKEND_MODE", "ytdlp")
+    return engine
+
+
+def test_replay_search(extractor):
+    assert extractor.replay and extractor.available()
+    ids = extractor.search(QUERY, 50)
+    assert len(ids) == N_RESULTS
+    assert extractor.search(QUERY, 5) == ids[:5]
+    by_date = extractor.search(QUERY, 50, by_date=True)
+    assert len(by_date) == 5 and set(by_date) <= set(ids)
+
+
+def _raw(extractor, kind, key):
+    with open(extractor._fixture_path(kind, key), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_raw_search_dump_shape(extractor):
+    raw = _raw(extractor, "search", f"ytsearchdate:{QUERY}")
+    assert raw["_type"] == "playlist" and raw["extractor_key"] == "YoutubeSearchURL"
+    assert raw["webpage_url"].endswith("&sp=CAISAhAB")  # tri par date
+    assert extractor.search(QUERY, 50, by_date=True) == [e["id"] for e in raw["entries"]]
+
+
+def test_raw_video_dump_language_from_audio_tracks(extractor):
+    raw = _raw(extractor, "video", "b7TqR2nWfYc")
+    assert "language" not in raw  # la page ne donne la langue que par piste audio
+    tracks = {f["language"]: f["language_preference"] for f in raw["formats"] if f.get("language")}
+    assert tracks == {"fr": 10, "en-US": -1}  # originale + doublage
+    assert extractor.video("b7TqR2nWfYc")["language"] == "fr"
+    assert audio_language(_raw(extractor, "video", "xV3k9Lq2mPA")["formats"]) is None  # piste sans langue
+
+
+def test_record_then_replay(extractor, tmp_path, monkeypatch):
+    pytest.importorskip("yt_dlp")
+    raws = {("search", f"ytsearch:{QUERY}"): _raw(extractor, "search", f"ytsearch:{QUERY}")}
+    raws.update({("video", v): _raw(extractor, "video", v) for v in extractor.search(QUERY, 50)})
+    calls = []
+
+    def fake_extract(url, limit=None):  # extract_info hors réseau: renvoie la sortie brute enregistrée
+        calls.append(url)
+        if url.startswith("ytsearch"):
+            return dict(raws["search", f"ytsearch:{QUERY}"])
+        return dict(raws["video", url.rsplit("=", 1)[1]])
+
+    recorder = YtDlpExtractor(fixtures_dir=str(tmp_path), record=True)
+    monkeypatch.setattr(recorder, "_extract", fake_extract)
+    ids = recorder.search(QUERY, 5, prefetch=50)
+    assert calls == [f"ytsearch50:{QUERY}"] and ids == extractor.search(QUERY, 5)
+    live = {v: recorder.video(v) for v in extractor.search(QUERY, 50)}
+    assert live == {v: extractor.video(v) for v in live}  # live et replay: même réduction
+
+    replayed = YtDlpExtractor(fixtures_dir=str(tmp_path))
+    assert replayed.search(QUERY, 50) == extractor.search(QUERY, 50)
+    assert {v: replayed.video(v) for v in live} == live
+
+
+def test_replay_unknown_video_is_unavailable(extractor):
+    assert extractor.video("AAAAAAAAAAA") is None
+
+
+def test_normalize_video_matches_data_api_shape(extractor):
+    info = extractor.video("xV3k9Lq2mPA")
+    item = normalize_video(info)
+    assert item["id"] == "xV3k9Lq2mPA"
+    snippet = item["snippet"]
+    assert snippet["title"] == "Affaire Epstein : ce que Donald Trump savait vraiment"
+    assert snippet["channelTitle"] == "Franceinfo"
+    assert snippet["channelId"] == info["channel_id"]
+    assert snippet["publishedAt"] == "2025-09-04T15:33:20Z"  # timestamp -> RFC 3339 UTC
+    assert snippet["tags"] == ["epstein", "trump", "franceinfo"]
+    assert snippet["thumbnails"]["high"]["url"].endswith("/hqdefault.jpg")
+    assert "defaultAudioLanguage" not in snippet  # pas de langue dans cette page
+    assert item["statistics"] == {"viewCount": "2410000"}
+    assert item["contentDetails"] == {"duration": "PT0H5M0S"}
+
+
+def test_normalize_video_language_and_duration(extractor):
+    item = normalize_video(extractor.video("b7TqR2nWfYc"))
+    assert item["snippet"]["defaultAudioLanguage"] == "fr"
+    assert item["contentDetails"]["duration"] == "PT0H6M37S"
+
+
+def test_normalize_channel(extractor):
+    info = extractor.video("b7TqR2nWfYc")
+    assert normalize_channel(info) == {"id": info["channel_id"], "statistics": {"subscriberCount": "241000"}}
+    assert normalize_channel(extractor.video("Ht5pQe9Rw3M")) is None  # abonnés absents de la page
+
+
+def test_backend_pages_are_sliced_from_one_search(ytdlp_engine):
+    backend = ytdlp_engine.YtDlpBackend()
+    pages, token, index = [], None, 0
+    while True:
+        ids, token = backend.search_page(QUERY, index, token, 5, "fr", "FR", None, float("inf"), [])
+        pages.append(ids)
+        if token is None:
+            break
+        assert token == f"{ytdlp_engine.YTDLP_TOKEN_PREFIX}{index + 1}"
+        index += 1
+    assert [len(p) for p in pages] == [5, 5, 2]
+    assert sum(pages, []) == YtDlpExtractor(fixtures_dir=YTDLP_FIXTURES).search(QUERY, 50)
+
+
+def test_backend_videos_and_channels(ytdlp_engine):
+    backend = ytdlp_engine.YtDlpBackend()
+    ids = backend.extractor.search(QUERY, 50)
+    videos, channels = backend.videos(ids + ["AAAAAAAAAAA"], float("inf"), [])
+    assert list(videos) == ids  # indisponible ignorée, ordre conservé
+    assert all(v == normalize_video(backend.extractor.video(vid)) for vid, v in videos.items())
+    assert len(channels) == N_RESULTS - 1  # 1 page sans abonnés
+    for ch in channels.values():
+        assert int(ch["statistics"]["subscriberCount"]) > 0
+
+
+def test_pipeline_on_ytdlp_backend(ytdlp_engine, extractor):
+    # chaîne sans abonnés dans sa page: channels.list passe par la Data API -> servie par le cache ici
+    channel_id = extractor.video("Ht5pQe9Rw3M")["channel_id"]
+    ytdlp_engine.meta_cache().put_channels([{"id": channel_id, "statistics": {"subscriberCount": "88000"}}])
+    run = ytdlp_engine.run_pipeline(
+        {"keywords": ["trump epstein"], "language": "Auto (no language filter)", "pages": 3, "per_page": 5,
+         "min_views": 100000, "deadline_seconds": None},
+        fetch_comments=False,
+    )
+    assert run.stats["ids_found"] == N_RESULTS
+    assert run.api_stats["calls"] == 0  # 0 unité: tout vient des fixtures
+    assert ytdlp_engine.key_pool().used() == 0
+    assert len(run.videos) == N_RESULTS
+    assert len(run.results) == N_RESULTS - 1  # 1 vidéo sous 100000 vues
+    assert all(v["views"] >= 100000 for v in run.results)
+    assert all(v["subs"] for v in run.results)
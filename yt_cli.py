@@ -0,0 +1,210 @@
+"""
+Recherche YouTube en batch (cron): fichiers de mots-clés -> JSONL ou CSV.
+
+    python yt_cli.py keywords.txt [autres.txt ...] --language French --min-views 100000 -o out.jsonl
+
+1 requête par ligne (même syntaxe que l'app), lignes vides et "# ..." ignorées.
+Clés API: YOUTUBE_API_KEY / YOUTUBE_API_KEYS (environnement), sinon --secrets (secrets.toml Streamlit).
+Quota et cache SQLite partagés avec l'app (même dossier d'état, --state-dir).
+Pas d'import Streamlit; google-api-python-client n'est chargé qu'au 1er appel API.
+"""
+from __future__ import annotations
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from typing import Dict, Iterator, List, Optional, Set
+
+import yt_engine
+from yt_engine import (
+    LANGUAGE_CONFIG,
+    MAX_PAGES,
+    PERIOD_DAYS,
+    SEARCH_CACHE_TTL,
+    date_limit_for_period,
+    key_pool,
+    load_api_keys,
+    run_pipeline,
+    set_key_source,
+)
+from yt_trace import chrome_trace
+
+try:
+    import tomllib
+except ModuleNotFoundError:  # Python < 3.11
+    tomllib = None
+
+CSV_FIELDS = [
+    "keyword_file", "video_id", "title", "url", "channel_title", "views", "subs", "ratio",
+    "matched_kw", "lang_reason", "comments",
+]
+DURATIONS = {"0": "Toutes", "2": "2 min", "5": "5 min", "10": "10 min"}
+
+
+def read_keyword_file(path: str) -> List[str]:
+    """1 requête par ligne, sans doublons (ordre conservé); '-' = stdin."""
+    f = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        lines = [line.strip() for line in f]
+    finally:
+        if f is not sys.stdin:
+            f.close()
+    return list(dict.fromkeys(line for line in lines if line and not line.startswith("#")))
+
+def resolve_language(value: str) -> str:
+    """Libellé de LANGUAGE_CONFIG ('French') ou code ('fr'); 'auto' = pas de filtre."""
+    for label, cfg in LANGUAGE_CONFIG.items():
+        if value.lower() in (label.lower(), (cfg["code"] or "auto")):
+            return label
+    raise argparse.ArgumentTypeError(f"langue inconnue: {value}")
+
+def load_secrets_file(path: str) -> Dict[str, object]:
+    if tomllib is None or not os.path.exists(path):
+        return {}
+    with open(path, "rb") as f:
+        return tomllib.load(f)
+
+def chunks(items: List[str], size: int) -> Iterator[List[str]]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def to_row(v: dict, keyword_file: str, comments: Optional[List[str]]) -> dict:
+    return {
+        "keyword_file": keyword_file,
+        "video_id": v["video_id"],
+        "title": v["title"],
+        "url": v["url"],
+        "channel_title": v["channel_title"],
+        "views": v["views"],
+        "subs": v["subs"],
+        "ratio": round(v["ratio"], 4) if v["ratio"] is not None else None,
+        "matched_kw": v["matched_kw"],
+        "lang_reason": v["lang_reason"],
+        "comments": comments,
+    }
+
+
+class RowWriter:
+    """JSONL (1 objet par ligne) ou CSV (commentaires joints par des sauts de ligne); flush à chaque lot."""
+
+    def __init__(self, out, fmt: str):
+        self.out = out
+        self.fmt = fmt
+        self._csv: Optional[csv.DictWriter] = None
+        if fmt == "csv":
+            self._csv = csv.DictWriter(out, fieldnames=CSV_FIELDS)
+            self._csv.writeheader()
+
+    def write(self, row: dict):
+        if self._csv is not None:
+            comments = row["comments"]
+            self._csv.writerow({**row, "comments": "\n".join(comments) if comments else ""})
+        else:
+            self.out.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    def flush(self):
+        self.out.flush()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description="Recherche YouTube en batch (sans Streamlit).")
+    p.add_argument("keyword_files", nargs="+", help="fichiers de mots-clés (1 requête par ligne, '-' = stdin)")
+    p.add_argument("-o", "--output", default="-", help="fichier de sortie ('-' = stdout)")
+    p.add_argument("-f", "--format", choices=["jsonl", "csv"], help="défaut: d'après l'extension, sinon jsonl")
+    p.add_argument("--language", type=resolve_language, default=resolve_language("auto"),
+                   help="French/English/Spanish, fr/en/es ou auto")
+    p.add_argument("--no-require-proof", dest="require_proof", action="store_false",
+                   help="accepter les vidéos sans preuve de langue")
+    p.add_argument("--min-views", type=int, default=100000)
+    p.add_argument("--min-duration", choices=list(DURATIONS), default="0", help="minutes")
+    p.add_argument("--period", choices=list(PERIOD_DAYS), default="Tout")
+    p.add_argument("--pages", type=int, choices=range(1, MAX_PAGES + 1), default=MAX_PAGES, metavar=f"1-{MAX_PAGES}")
+    p.add_argument("--per-page", type=int, default=50)
+    p.add_argument("--title-only", action="store_true", help="mots-clés cherchés dans le titre seulement")
+    p.add_argument("--max-results", type=int, default=0, help="par lot de mots-clés, 0 = toutes les validées")
+    p.add_argument("--comments", action="store_true", help="inclure les 20 top commentaires (1 unité/vidéo)")
+    p.add_argument("--chunk", type=int, default=20, help="mots-clés par lancement du pipeline")
+    p.add_argument("--deadline", type=float, default=0, help="secondes par lot, 0 = pas de coupure")
+    p.add_argument("--search-cache-hours", type=float, default=SEARCH_CACHE_TTL / 3600)
+    p.add_argument("--backend", choices=["auto", "api", "ytdlp"], default=yt_engine.BACKEND_MODE,
+                   help="search/videos: auto = Data API puis yt-dlp (0 unité) quand le quota est épuisé")
+    p.add_argument("--state-dir", default=yt_engine.STATE_DIR, help="dossier du quota et du cache SQLite")
+    p.add_argument("--secrets", default=".streamlit/secrets.toml", help="secrets.toml si pas de clé dans l'environnement")
+    p.add_argument("--trace", help="écrit la trace des runs (format Chrome trace JSON) dans ce fichier")
+    p.add_argument("-v", "--verbose", action="store_true", help="logs du pipeline sur stderr")
+    return p
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    yt_engine.STATE_DIR = args.state_dir
+    yt_engine.BACKEND_MODE = args.backend
+    if not load_api_keys(os.environ):
+        set_key_source(load_secrets_file(args.secrets))
+    try:
+        key_pool()
+    except RuntimeError as ex:
+        print(f"[ERROR] {ex}", file=sys.stderr)
+        return 2
+
+    fmt = args.format or ("csv" if args.output.endswith(".csv") else "jsonl")
+    params = {
+        "language": args.language,
+        "require_proof": args.require_proof,
+        "min_views": args.min_views,
+        "min_duration": DURATIONS[args.min_duration],
+        "date_limit": date_limit_for_period(args.period),
+        "pages": args.pages,
+        "per_page": args.per_page,
+        "deadline_seconds": args.deadline or None,
+        "max_display": args.max_results or None,
+        "search_cache_ttl": args.search_cache_hours * 3600,
+        "match_in": "Titre seulement" if args.title_only else "Titre + Description + Tags",
+    }
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+    writer = RowWriter(out, fmt)
+    written: Set[str] = set()  # 1 ligne par vidéo: le 1er lot qui la valide gagne
+    spans: List[dict] = []      # traces des lots, décalées sur l'horloge du CLI
+    t0 = time.monotonic()
+    try:
+        for path in args.keyword_files:
+            keywords = read_keyword_file(path)
+            for batch in chunks(keywords, max(1, args.chunk)):
+                offset = time.monotonic() - t0
+                run = run_pipeline({**params, "keywords": batch}, fetch_comments=args.comments)
+                spans += [{**s, "start": s["start"] + offset, "end": s["end"] + offset} for s in run.spans or []]
+                for v in run.display:
+                    if v["video_id"] in written:
+                        continue
+                    written.add(v["video_id"])
+                    comments = run.comments_by_video.get(v["video_id"]) if args.comments else None
+                    writer.write(to_row(v, path, comments))
+                writer.flush()
+                if args.verbose:
+                    print("\n".join(run.logs), file=sys.stderr)
+                print(
+                    f"[INFO] {path}: {len(batch)} mots-clés, {run.stats['ids_found']} ids, "
+                    f"{run.stats['passed_total']} validées, {run.api_stats['calls']} appels API",
+                    file=sys.stderr,
+                )
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        key_pool().flush()
+        if args.trace:
+            with open(args.trace, "w", encoding="utf-8") as f:
+                json.dump(chrome_trace(spans), f)
+
+    pool = key_pool()
+    print(
+        f"[INFO] {len(written)} vidéos écrites en {time.monotonic() - t0:.1f}s, quota {pool.used()} / {pool.limit()}",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,3137 @@
+"""
+Moteur de recherche YouTube sans UI: search -> hydratation -> filtre -> score -> commentaires.
+
+Importable sans Streamlit (app Streamlit, CLI batch yt_cli.py, cron).
+google-api-python-client n'est importé qu'au 1er appel API.
+"""
+from __future__ import annotations
+import abc
+import contextvars
+import functools
+import hashlib
+import heapq
+import importlib.util
+import json
+import os
+import queue
+import random
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterator, List, Mapping, NamedTuple, Optional, Tuple, Set
+
+from yt_langid import identify_languages
+from yt_http import PooledHttp, abortable, http_stats_delta, reuse_rows
+from yt_http import deadline as http_deadline
+from yt_trace import TracedExecutor, Tracer, annotate, span
+from yt_ytdlp import YtDlpExtractor, normalize_channel, normalize_video
+
+# Dossier des fichiers d'état (quota, cache SQLite); relatif au répertoire courant par défaut
+STATE_DIR = os.environ.get("YT_RESEARCH_STATE_DIR", ".")
+
+# Autre serveur que googleapis.com (ex: faux serveur local de benchmarks/fake_youtube_api.py)
+API_ENDPOINT = os.environ.get("YT_RESEARCH_API_ENDPOINT") or None
+
+def state_path(name: str) -> str:
+    return os.path.join(STATE_DIR, name)
+
+def _singleton(factory: Callable):
+    """
+    Instance unique par process, créée au 1er appel (thread-safe).
+    Rôle de st.cache_resource, sans Streamlit; une exception n'est pas mise en cache.
+    """
+    lock = threading.Lock()
+    box: list = []
+
+    @functools.wraps(factory)
+    def get():
+        if not box:
+            with lock:
+                if not box:
+                    box.append(factory())
+        return box[0]
+
+    get.clear = box.clear
+    return get
+
+
+# ----------------------
+# GESTIONNAIRE DE QUOTA (LEDGER)
+# ----------------------
+QUOTA_FILE = "quota_usage.json"
+DAILY_LIMIT = 10000  # Limite standard gratuite YouTube (Unités par jour)
+QUOTA_FLUSH_INTERVAL = 5.0  # secondes max entre 2 écritures disque
+QUOTA_FLUSH_UNITS = 500     # ... ou dès que ce nombre d'unités attend d'être écrit
+
+# Google remet le quota à zéro à minuit heure du Pacifique
+# (base tz du système, sinon paquet tzdata; sans les deux: UTC-8 fixe, 1 h d'écart en heure d'été)
+try:
+    from zoneinfo import ZoneInfo
+    QUOTA_TZ = ZoneInfo("America/Los_Angeles")
+    QUOTA_TZ_FALLBACK = False
+except Exception:
+    QUOTA_TZ = timezone(timedelta(hours=-8))
+    QUOTA_TZ_FALLBACK = True
+
+try:
+    import fcntl
+except ImportError:  # Windows: pas de verrou inter-process
+    fcntl = None
+
+def quota_day(now: Optional[datetime] = None) -> str:
+    """Jour de quota courant (date Pacifique)."""
+    return (now or datetime.now(timezone.utc)).astimezone(QUOTA_TZ).strftime("%Y-%m-%d")
+
+class QuotaLedger:
+    """
+    Compteur de quota en mémoire, thread-safe.
+    - charge() ne touche jamais le disque: les unités s'accumulent en "pending"
+    - flush() (thread de fond toutes les QUOTA_FLUSH_INTERVAL s, ou fin de run) fusionne le delta dans
+      QUOTA_FILE sous verrou fichier + écriture atomique => plusieurs sessions / process partagent le fichier
+    - fichier illisible (JSON corrompu) -> mis de côté en .corrupt, compteur du jour repart de ce process
+    - ventilation par endpoint et par mot-clé, remise à zéro à minuit Pacifique
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._day = quota_day()
+        self._used = 0
+        self._pending = 0
+        self._pending_endpoint: Dict[str, int] = {}
+        self._pending_keyword: Dict[str, int] = {}
+        self._by_endpoint: Dict[str, int] = {}
+        self._by_keyword: Dict[str, int] = {}
+        self._wake = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self.flush()
+
+    def _roll_day(self):
+        day = quota_day()
+        if day != self._day:
+            self._day = day
+            self._used = 0
+            self._pending = 0
+            self._pending_endpoint.clear()
+            self._pending_keyword.clear()
+            self._by_endpoint.clear()
+            self._by_keyword.clear()
+
+    def charge(self, endpoint: str, units: int, keyword: Optional[str] = None):
+        """À appeler juste avant d'émettre la requête (seules les requêtes réellement émises coûtent)."""
+        with self._lock:
+            self._roll_day()
+            self._used += units
+            self._pending += units
+            self._pending_endpoint[endpoint] = self._pending_endpoint.get(endpoint, 0) + units
+            self._by_endpoint[endpoint] = self._by_endpoint.get(endpoint, 0) + units
+            if keyword:
+                self._pending_keyword[keyword] = self._pending_keyword.get(keyword, 0) + units
+                self._by_keyword[keyword] = self._by_keyword.get(keyword, 0) + units
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, name="yt-quota-flush", daemon=True)
+                self._flusher.start()
+            if self._pending >= QUOTA_FLUSH_UNITS:
+                self._wake.set()  # écrit sans attendre la fin de l'intervalle, mais hors du thread appelant
+
+    def _flush_loop(self):
+        while True:
+            self._wake.wait(QUOTA_FLUSH_INTERVAL)
+            self._wake.clear()
+            with self._lock:
+                due = self._pending > 0
+            if due:
+                self.flush()
+
+    def used(self) -> int:
+        with self._lock:
+            self._roll_day()
+            return self._used
+
+    def remaining(self) -> int:
+        return max(0, DAILY_LIMIT - self.used())
+
+    def breakdown(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {"endpoint": dict(self._by_endpoint), "keyword": dict(self._by_keyword)}
+
+    def flush(self):
+        """Fusionne le delta en attente dans le fichier (et relit le total des autres sessions)."""
+        with self._lock:
+            self._roll_day()
+            day = self._day
+            delta = self._pending
+            d_endpoint, d_keyword = self._pending_endpoint, self._pending_keyword
+            self._pending = 0
+            self._pending_endpoint, self._pending_keyword = {}, {}
+
+        try:
+            with open(self.path + ".lock", "a") as lock_f:
+                if fcntl is not None:
+                    fcntl.flock(lock_f, fcntl.LOCK_EX)
+                try:
+                    data = self._read_locked()
+                    if data.get("date") != day:  # nouvelle journée
+                        data = {"date": day, "used": 0}
+                    if delta:
+                        data["used"] = int(data.get("used", 0)) + delta
+                        for field, part in (("by_endpoint", d_endpoint), ("by_keyword", d_keyword)):
+                            merged = data.setdefault(field, {})
+                            for k, v in part.items():
+                                merged[k] = merged.get(k, 0) + v
+                        tmp = f"{self.path}.{os.getpid()}.tmp"
+                        with open(tmp, "w") as f:
+                            json.dump(data, f)
+                        os.replace(tmp, self.path)
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_f, fcntl.LOCK_UN)
+        except (OSError, ValueError):
+            # Pas grave si on rate une sauvegarde locale: le delta est remis en attente
+            with self._lock:
+                if day == self._day:
+                    self._pending += delta
+                    for k, v in d_endpoint.items():
+                        self._pending_endpoint[k] = self._pending_endpoint.get(k, 0) + v
+                    for k, v in d_keyword.items():
+                        self._pending_keyword[k] = self._pending_keyword.get(k, 0) + v
+            return
+
+        with self._lock:
+            if day == self._day:
+                self._used = int(data.get("used", 0)) + self._pending
+
+    def _read_locked(self) -> dict:
+        """Contenu du fichier (verrou fichier tenu); illisible -> mis de côté, sinon chaque flush échouerait."""
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                int(data.get("used", 0))
+                return data
+        except (ValueError, TypeError):
+            pass
+        os.replace(self.path, self.path + ".corrupt")
+        return {}
+
+class QuotaScope:
+    """Unités facturées dans un bloc quota_scope(), par endpoint (thread-safe)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_endpoint: Dict[str, int] = {}
+
+    def add(self, endpoint: str, units: int):
+        with self._lock:
+            self._by_endpoint[endpoint] = self._by_endpoint.get(endpoint, 0) + units
+
+    def by_endpoint(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._by_endpoint)
+
+    def total(self) -> int:
+        with self._lock:
+            return sum(self._by_endpoint.values())
+
+# Porté par contextvars: suivi par les tâches d'un TracedExecutor lancées depuis le bloc
+_quota_scope: contextvars.ContextVar[Optional[QuotaScope]] = contextvars.ContextVar("yt_quota_scope", default=None)
+
+@contextmanager
+def quota_scope() -> Iterator[QuotaScope]:
+    """
+    Coût propre d'un bloc (ex: rafraîchissement de watchlist): seulement les requêtes émises depuis ce bloc,
+    contrairement à l'écart de key_pool().used() qui compte aussi les autres sessions du process.
+    """
+    scope = QuotaScope()
+    token = _quota_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _quota_scope.reset(token)
+
+def charge_quota(key: "ApiKey", endpoint: str, units: int, keyword: Optional[str] = None,
+                 scope: Optional[QuotaScope] = None):
+    """Facture la clé (ledger du jour) et le quota_scope() courant, ou scope si l'appel part d'un autre thread."""
+    key.ledger.charge(endpoint, units, keyword=keyword)
+    scope = scope or _quota_scope.get()
+    if scope is not None:
+        scope.add(endpoint, units)
+
+
+# ----------------------
+# SETTINGS
+# ----------------------
+DEADLINE_SECONDS = 10.0
+MAX_PAGES = 5
+
+# Nb max de mots-clés recherchés en parallèle (chaque mot-clé garde sa chaîne de pages)
+SEARCH_MAX_WORKERS = 4
+# Hydratation: chunks videos.list en vol simultanément / lots channels.list en parallèle
+HYDRATE_MAX_WORKERS = 6
+CHANNELS_MAX_WORKERS = 3
+# Fetch des top commentaires en parallèle (ordre = classement)
+COMMENTS_MAX_WORKERS = 8
+# commentThreads.list groupés par requête batch (1 aller-retour HTTP multipart, 1 unité par vidéo)
+COMMENTS_BATCH_SIZE = 10
+
+# Planner de recherche: arrêt d'un mot-clé si sa dernière page est à >= 80% de doublons
+PLANNER_DUP_THRESHOLD = 0.8
+PLANNER_QUOTA_RESERVE = 200  # unités gardées pour videos/channels/comments
+
+# Couche d'exécution API: retries (backoff exponentiel + jitter) et requêtes "hedgées"
+API_MAX_RETRIES = 3
+API_BACKOFF_BASE = 0.4   # secondes, doublé à chaque tentative
+API_BACKOFF_MAX = 4.0
+API_HEDGE_ENABLED = True  # doublon d'une requête à 1 unité qui dépasse son p95 (coûte 1 unité de plus)
+API_HEDGE_MIN_SAMPLES = 20
+
+# Backends search / videos: "auto" = Data API tant que le quota le permet, sinon yt-dlp (0 unité);
+# "api" = Data API seulement; "ytdlp" = yt-dlp seulement
+BACKEND_MODE = os.environ.get("YT_RESEARCH_BACKEND", "auto")
+BACKEND_LATENCY_ALPHA = 0.2  # poids de la dernière mesure dans la latence moyenne (EWMA) d'un backend
+YTDLP_MAX_WORKERS = 8        # pages vidéo extraites en parallèle par chunk
+
+# Cache disque des métadonnées (survit aux redémarrages)
+META_CACHE_DB = "yt_cache.sqlite"
+META_MEMORY_ROWS = 20000         # lignes gardées en mémoire (LRU) par table, devant SQLite...
+META_MEMORY_BYTES = 32 * 1024**2  # ... dans la limite de ~32 Mo par table (taille des chaînes JSON)
+VIDEO_SLOW_TTL = 7 * 24 * 3600   # titre, description, tags, channelId, durée, langues
+VIDEO_FAST_TTL = 30 * 60         # viewCount
+CHANNEL_TTL = 6 * 3600           # subscriberCount
+SEARCH_CACHE_TTL = 6 * 3600      # pages search.list (par défaut, réglable dans la sidebar)
+COMMENTS_CACHE_TTL = 3600        # top commentaires (mémoire du process)
+COMMENTS_CACHE_MAX = 5000        # vidéos gardées (LRU)
+RUN_STORE_TTL = 6 * 3600         # runs sauvegardés sur disque (re-filtrage sans API)
+
+LANGUAGE_CONFIG = {
+    "Auto (no language filter)": {"code": None, "relevanceLanguage": None, "regionCode": None},
+    "French":  {"code": "fr", "relevanceLanguage": "fr", "regionCode": "FR"},
+    "English": {"code": "en", "relevanceLanguage": "en", "regionCode": "US"},
+    "Spanish": {"code": "es", "relevanceLanguage": "es", "regionCode": "ES"},
+}
+
+# Langue détectée (n-grammes, yt_langid) retenue seulement au-dessus de cette confiance
+LANG_DETECT_MIN_CONFIDENCE = 0.6
+# Titre/description/tags (textes courts, souvent mélangés), seuils calibrés sur les titres étiquetés
+# de tests/fixtures/langid (cf. tests/test_language_filter.py):
+# - accepter une vidéo dans la langue cible dès LANG_TEXT_MIN_CONFIDENCE
+# - la rejeter (autre langue) seulement dès LANG_TEXT_REJECT_CONFIDENCE; entre les deux -> commentaires
+LANG_TEXT_MIN_CONFIDENCE = 0.8
+LANG_TEXT_REJECT_CONFIDENCE = 0.95
+
+ISO_DURATION_RE = re.compile(r"^PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?$")
+
+# Max de checks langue via commentaires (pour tenir 10s)
+MAX_LANG_COMMENT_CHECKS = 30
+
+
+# =========================
+# PROMPT (AUTO-TRAD)
+# =========================
+PROMPT_TEMPLATES = {
+    None: (
+        "analyse moi ces commentaires et relève les points suivant : "
+        "les idées qui reviennet le plus souvent, propose moi 3 sujets qui marcheront sur base des commentaire "
+        "et propose moi 3 sujets périphérique qui pourraient marcher par rapport aux commentaires !\n\n"
+        "Règles : 1 phrase MAX par ligne. Très court.\n\n"
+        "Idées qui reviennent le plus souvent (3) :\n"
+        "1) ...\n2) ...\n3) ...\n\n"
+        "Sujets qui pourraient marcher (3) :\n"
+        "1) ...\n2) ...\n3) ...\n\n"
+        "Sujets périphériques (3) :\n"
+        "1) ...\n2) ...\n3) ...\n\n"
+        "Voici les commentaires !\n"
+    ),
+    "fr": (
+        "analyse moi ces commentaires et relève les points suivant : "
+        "les idées qui reviennet le plus souvent, propose moi 3 sujets qui marcheront sur base des commentaire "
+        "et propose moi 3 sujets périphérique qui pourraient marcher par rapport aux commentaires !\n\n"
+        "Règles : 1 phrase MAX par ligne. Très court.\n\n"
+        "Idées qui reviennent le plus souvent (3) :\n"
+        "1) ...\n2) ...\n3) ...\n\n"
+        "Sujets qui pourraient marcher (3) :\n"
+        "1) ...\n2) ...\n3) ...\n\n"
+        "Sujets périphériques (3) :\n"
+        "1) ...\n2) ...\n3) ...\n\n"
+        "Voici les commentaires !\n"
+    ),
+    "en": (
+        "Analyze these comments and extract: the 3 most recurring ideas, 3 video topics that would work based on the comments, "
+        "and 3 related side-topics that could also work.\n\n"
+        "Rules: 1 sentence MAX per line. Very short.\n\n"
+        "Most recurring ideas (3):\n"
+        "1) ...\n2) ...\n3) ...\n\n"
+        "Topics that could work (3):\n"
+        "1) ...\n2) ...\n3) ...\n\n"
+        "Related side-topics (3):\n"
+        "1) ...\n2) ...\n3) ...\n\n"
+        "Here are the comments!\n"
+    ),
+    "es": (
+        "Analiza estos comentarios y extrae: las 3 ideas que más se repiten, 3 temas de vídeo que podrían funcionar según los comentarios "
+        "y 3 temas periféricos relacionados que también podrían funcionar.\n\n"
+        "Reglas: 1 frase MÁXIMA por línea. Muy corto.\n\n"
+        "Ideas más repetidas (3):\n"
+        "1) ...\n2) ...\n3) ...\n\n"
+        "Temas que podrían funcionar (3):\n"
+        "1) ...\n2) ...\n3) ...\n\n"
+        "Temas periféricos (3):\n"
+        "1) ...\n2) ...\n3) ...\n\n"
+        "¡Aquí están los comentarios!\n"
+    ),
+}
+
+LABELS = {
+    "fr": {"comments": "COMMENTAIRES", "video": "VIDEO", "title": "TITRE", "link": "LIEN"},
+    "en": {"comments": "COMMENTS", "video": "VIDEO", "title": "TITLE", "link": "LINK"},
+    "es": {"comments": "COMENTARIOS", "video": "VIDEO", "title": "TÍTULO", "link": "ENLACE"},
+    None: {"comments": "COMMENTAIRES", "video": "VIDEO", "title": "TITRE", "link": "LIEN"},
+}
+
+def get_prompt_for_language(target_code: Optional[str]) -> str:
+    return PROMPT_TEMPLATES.get(target_code) or PROMPT_TEMPLATES[None]
+
+def get_labels(target_code: Optional[str]) -> dict:
+    return LABELS.get(target_code) or LABELS[None]
+
+
+# =========================
+# CLIENT
+# =========================
+class QuotaExhaustedError(RuntimeError):
+    """Toutes les clés API ont épuisé leur quota du jour."""
+
+QUOTA_EXHAUSTED_REASONS = {"quotaExceeded", "dailyLimitExceeded"}
+
+# Source des clés: os.environ par défaut, st.secrets côté app (set_key_source)
+_key_source: Mapping = os.environ
+
+def set_key_source(source: Mapping):
+    global _key_source
+    _key_source = source
+
+def load_api_keys(source: Optional[Mapping] = None) -> List[str]:
+    """
+    YOUTUBE_API_KEY (clé principale) + YOUTUBE_API_KEYS (liste TOML ou "k1,k2,...").
+    Ordre conservé, doublons retirés.
+    """
+    source = _key_source if source is None else source
+    raw = source.get("YOUTUBE_API_KEYS") or []
+    if isinstance(raw, str):
+        raw = raw.split(",")
+    keys: List[str] = []
+    for k in [source.get("YOUTUBE_API_KEY"), *raw]:
+        k = (k or "").strip()
+        if k and k not in keys:
+            keys.append(k)
+    return keys
+
+class ApiKey:
+    """1 clé API = 1 client + 1 ledger de quota dédié."""
+
+    def __init__(self, api_key: str, ledger: Optional[QuotaLedger] = None):
+        self.api_key = api_key
+        self.fingerprint = hashlib.sha1(api_key.encode()).hexdigest()[:8]
+        self.label = f"…{api_key[-4:]}"
+        self.ledger = ledger
+        self.client = None
+        self.exhausted_day: Optional[str] = None  # quotaExceeded reçu ce jour-là (Pacifique)
+
+    def headroom(self) -> int:
+        return max(0, DAILY_LIMIT - self.ledger.used())
+
+class ApiKeyPool:
+    """
+    Pool de clés: chaque requête part sur la clé qui a le plus de marge.
+    Une clé qui renvoie quotaExceeded est écartée jusqu'au prochain minuit Pacifique.
+    Thread-safe (utilisé depuis les pools de threads).
+    """
+
+    def __init__(self, api_keys: List[str]):
+        self._lock = threading.Lock()
+        self.keys: List[ApiKey] = []
+        for i, k in enumerate(api_keys):
+            key = ApiKey(k)
+            # la clé principale garde QUOTA_FILE (historique du jour conservé)
+            key.ledger = QuotaLedger(state_path(QUOTA_FILE if i == 0 else f"quota_usage_{key.fingerprint}.json"))
+            self.keys.append(key)
+
+    def available(self) -> List[ApiKey]:
+        day = quota_day()
+        return [k for k in self.keys if k.exhausted_day != day]
+
+    def pick(self) -> ApiKey:
+        avail = self.available()
+        if not avail:
+            raise QuotaExhaustedError("Quota épuisé sur toutes les clés API (reset à minuit heure du Pacifique)")
+        return max(avail, key=lambda k: k.headroom())  # égalité -> 1re clé
+
+    def mark_exhausted(self, key: ApiKey):
+        with self._lock:
+            key.exhausted_day = quota_day()
+
+    def client(self, key: ApiKey):
+        with self._lock:
+            if key.client is None:
+                # document de découverte embarqué dans le paquet: ni réseau ni cache disque
+                key.client = _googleapi().build(
+                    "youtube", "v3", developerKey=key.api_key, static_discovery=True, cache_discovery=False,
+                    http=api_http(),
+                    client_options={"api_endpoint": API_ENDPOINT} if API_ENDPOINT else None,
+                )
+            return key.client
+
+    def used(self) -> int:
+        return sum(k.ledger.used() for k in self.keys)
+
+    def limit(self) -> int:
+        return DAILY_LIMIT * len(self.keys)
+
+    def remaining(self) -> int:
+        return sum(k.headroom() for k in self.available())
+
+    def breakdown(self) -> Dict[str, Dict[str, int]]:
+        merged: Dict[str, Dict[str, int]] = {"endpoint": {}, "keyword": {}}
+        for k in self.keys:
+            for field, part in k.ledger.breakdown().items():
+                for name, units in part.items():
+                    merged[field][name] = merged[field].get(name, 0) + units
+        return merged
+
+    def flush(self):
+        for k in self.keys:
+            k.ledger.flush()
+
+
+def _googleapi():
+    """Import différé de googleapiclient.discovery (lourd) -> démarrage rapide du CLI."""
+    try:
+        from googleapiclient import discovery
+    except ModuleNotFoundError:
+        raise RuntimeError("Dépendance manquante: google-api-python-client (ajoute-le dans requirements.txt)") from None
+    return discovery
+
+@_singleton
+def key_pool() -> ApiKeyPool:
+    if importlib.util.find_spec("googleapiclient") is None:
+        raise RuntimeError("Dépendance manquante: google-api-python-client (ajoute-le dans requirements.txt)")
+    keys = load_api_keys()
+    if not keys:
+        raise RuntimeError(
+            "Secret manquant: YOUTUBE_API_KEY ou YOUTUBE_API_KEYS (Streamlit Secrets ou variables d'environnement)"
+        )
+    return ApiKeyPool(keys)
+
+def yt_client():
+    """Client de la clé qui a le plus de marge."""
+    pool = key_pool()
+    return pool.client(pool.pick())
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+RETRYABLE_REASONS = {"rateLimitExceeded", "userRateLimitExceeded", "backendError", "internalError"}
+
+def _http_error_reasons(ex: Exception) -> Set[str]:
+    try:
+        errors = (json.loads(ex.content.decode("utf-8")).get("error") or {}).get("errors") or []
+    except (ValueError, AttributeError):
+        return set()
+    return {e.get("reason") for e in errors if isinstance(e, dict)}
+
+def classify_api_error(ex: Exception) -> str:
+    """
+    "quota"     -> clé épuisée, rejouer sur une autre clé
+    "retryable" -> erreur transitoire (5xx, 429, rate limit, réseau/timeout)
+    "fatal"     -> inutile de réessayer (400, 404, 403 hors quota...)
+    """
+    # googleapiclient / httplib2 / requests pas encore importés => l'erreur ne peut pas en venir
+    errors = sys.modules.get("googleapiclient.errors")
+    httplib2 = sys.modules.get("httplib2")
+    requests_errors = sys.modules.get("requests.exceptions")
+    if errors is not None and isinstance(ex, errors.HttpError):
+        status = getattr(ex.resp, "status", None)
+        reasons = _http_error_reasons(ex)
+        if status == 403 and reasons & QUOTA_EXHAUSTED_REASONS:
+            return "quota"
+        if status in RETRYABLE_STATUS or (status == 403 and reasons & RETRYABLE_REASONS):
+            return "retryable"
+        return "fatal"
+    if requests_errors is not None and isinstance(ex, requests_errors.RequestException):
+        # RequestException hérite d'OSError: InvalidURL, MissingSchema, InvalidHeader... = config, pas réseau
+        if isinstance(ex, (requests_errors.ConnectionError, requests_errors.Timeout)):
+            return "retryable"
+        return "fatal"
+    if isinstance(ex, (TimeoutError, ConnectionError, OSError)):
+        return "retryable"
+    if httplib2 is not None and isinstance(ex, httplib2.HttpLib2Error):
+        return "retryable"
+    return "fatal"
+
+def is_quota_exhausted_error(ex: Exception) -> bool:
+    return classify_api_error(ex) == "quota"
+
+class ApiCallStats:
+    """Compteurs de la couche d'exécution + latences récentes par endpoint (pour le p95 du hedge)."""
+
+    FIELDS = ("calls", "attempts", "batches", "retries", "retryable_errors", "fatal_errors", "gave_up",
+              "key_failovers", "hedges", "hedge_wins")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[str, int] = {f: 0 for f in self.FIELDS}
+        self._latencies: Dict[str, deque] = {}
+
+    def incr(self, field: str, n: int = 1):
+        with self._lock:
+            self.counters[field] += n
+
+    def record_latency(self, endpoint: str, seconds: float):
+        with self._lock:
+            self._latencies.setdefault(endpoint, deque(maxlen=200)).append(seconds)
+
+    def p95(self, endpoint: str) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._latencies.get(endpoint) or [])
+        if len(samples) < API_HEDGE_MIN_SAMPLES:
+            return None
+        return samples[int(0.95 * (len(samples) - 1))]
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counters)
+
+
+@_singleton
+def api_call_stats() -> ApiCallStats:
+    return ApiCallStats()
+
+@_singleton
+def hedge_executor() -> ThreadPoolExecutor:
+    """Doublons hedgés seulement (les requêtes principales tournent dans le thread appelant)."""
+    return TracedExecutor(max_workers=16, thread_name_prefix="yt-hedge")
+
+class _Delayed:
+    __slots__ = ("fn",)
+
+    def __init__(self, fn: Callable[[], None]):
+        self.fn: Optional[Callable[[], None]] = fn
+
+    def cancel(self):
+        self.fn = None
+
+class DelayedCalls:
+    """Appels différés sur 1 seul thread pour tout le process (déclenchement des hedges au p95)."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._heap: List[Tuple[float, int, _Delayed]] = []
+        self._seq = 0
+        self._thread: Optional[threading.Thread] = None
+
+    def call_later(self, delay: float, fn: Callable[[], None]) -> _Delayed:
+        entry = _Delayed(fn)
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="yt-timer", daemon=True)
+                self._thread.start()
+            heapq.heappush(self._heap, (time.monotonic() + delay, self._seq, entry))
+            self._seq += 1
+            self._cond.notify()
+        return entry
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while not self._heap or self._heap[0][0] > time.monotonic():
+                    self._cond.wait(self._heap[0][0] - time.monotonic() if self._heap else None)
+                _, _, entry = heapq.heappop(self._heap)
+            fn = entry.fn
+            if fn is not None:
+                try:
+                    fn()
+                except Exception:
+                    pass  # un hedge qui ne part pas laisse la principale seule
+
+@_singleton
+def delayed_calls() -> DelayedCalls:
+    return DelayedCalls()
+
+def _execute_hedged(
+    pool: ApiKeyPool,
+    key: ApiKey,
+    make_request: Callable,
+    endpoint: str,
+    cost: int,
+    keyword: Optional[str],
+    stats: ApiCallStats,
+) -> dict:
+    """
+    Requête principale dans le thread appelant (aucun thread de plus tant que rien ne traîne).
+    Si elle dépasse le p95 de l'endpoint, un doublon part sur hedge_executor() (nouvelle requête,
+    même clé, coût imputé). Le premier succès gagne; un doublon gagnant coupe la connexion de la principale.
+    """
+    client = pool.client(key)
+    p95 = stats.p95(endpoint)
+    if p95 is None:
+        return make_request(client).execute(http=api_http())
+
+    ctx = contextvars.copy_context()  # span / deadline de l'appel, hors du bloc abortable de la principale
+    scope = _quota_scope.get()  # _launch tourne sur le thread des appels différés
+    lock = threading.Lock()
+    state: Dict[str, Any] = {"winner": None, "hedge": None}
+
+    def _run_hedge() -> dict:
+        annotate(hedged=True)
+        res = make_request(client).execute(http=api_http())
+        with lock:
+            won = state["winner"] is None
+            if won:
+                state["winner"] = "hedge"
+        if won:
+            stats.incr("hedge_wins")
+            annotate(hedge_won=True)
+            primary.abort()
+        return res
+
+    def _launch():
+        with lock:
+            if state["winner"] is not None:
+                return
+            stats.incr("hedges")
+            charge_quota(key, endpoint, cost, keyword=keyword, scope=scope)
+            state["hedge"] = hedge_executor().submit(ctx.run, _run_hedge)
+
+    error: Optional[Exception] = None
+    res = None
+    with abortable() as primary:
+        timer = delayed_calls().call_later(p95, _launch)
+        try:
+            res = make_request(client).execute(http=api_http())
+        except Exception as ex:
+            error = ex
+        timer.cancel()
+
+    with lock:
+        hedge = state["hedge"]
+        if state["winner"] is None and (error is None or hedge is None):
+            state["winner"] = "primary"  # plus de hedge possible après ce point
+        winner = state["winner"]
+    if winner == "primary":
+        if error is not None:
+            raise error
+        return res
+    # doublon gagnant (principale coupée), ou principale en échec pendant que le doublon est en vol
+    try:
+        return hedge.result()
+    except Exception:
+        if error is not None:
+            raise error from None
+        raise
+
+def api_execute(
+    endpoint: str,
+    make_request: Callable,
+    cost: int,
+    keyword: Optional[str] = None,
+    logs: Optional[List[str]] = None,
+    deadline_t: Optional[float] = None,
+    span_attrs: Optional[dict] = None,
+) -> dict:
+    """
+    Couche d'exécution commune à tous les appels API:
+    - make_request(client) sur la clé du pool qui a le plus de marge; coût imputé juste avant l'envoi
+    - quotaExceeded -> clé écartée, rejoué sur la suivante (QuotaExhaustedError s'il n'en reste plus)
+    - erreur transitoire -> retry avec backoff exponentiel + jitter, sans dépasser deadline_t
+    - erreur fatale -> levée tout de suite
+    - requêtes à 1 unité: doublon "hedgé" si la réponse tarde au-delà du p95 (API_HEDGE_ENABLED)
+    Tracé dans un span "api" (tentatives, retries, clé, octets) + span_attrs (ex: taille de chunk).
+    """
+    pool = key_pool()
+    stats = api_call_stats()
+    stats.incr("calls")
+    attrs = {"cost": cost, **({"keyword": keyword} if keyword else {}), **(span_attrs or {})}
+    with span(endpoint, cat="api", **attrs) as sp, http_deadline(deadline_t):
+        attempt = 0
+        while True:
+            key = pool.pick()
+            # 💰 facturé seulement si la requête part
+            charge_quota(key, endpoint, cost, keyword=keyword)
+            stats.incr("attempts")
+            sp["attempts"] = sp.get("attempts", 0) + 1
+            sp["key"] = key.label
+            t0 = time.monotonic()
+            try:
+                if API_HEDGE_ENABLED and cost <= 1:
+                    res = _execute_hedged(pool, key, make_request, endpoint, cost, keyword, stats)
+                else:
+                    res = make_request(pool.client(key)).execute(http=api_http())
+                stats.record_latency(endpoint, time.monotonic() - t0)
+                return res
+            except Exception as ex:
+                kind = classify_api_error(ex)
+                if kind == "quota":
+                    pool.mark_exhausted(key)
+                    stats.incr("key_failovers")
+                    sp["key_failovers"] = sp.get("key_failovers", 0) + 1
+                    if logs is not None:
+                        logs.append(f"[WARN] clé {key.label}: quota épuisé -> bascule sur une autre clé ({endpoint})")
+                    continue
+                if kind == "fatal":
+                    stats.incr("fatal_errors")
+                    raise
+
+                stats.incr("retryable_errors")
+                attempt += 1
+                delay = random.uniform(0, min(API_BACKOFF_MAX, API_BACKOFF_BASE * 2 ** attempt))
+                out_of_time = deadline_t is not None and time.monotonic() + delay > deadline_t
+                if attempt > API_MAX_RETRIES or out_of_time:
+                    stats.incr("gave_up")
+                    raise
+                stats.incr("retries")
+                sp["retries"] = attempt
+                if logs is not None:
+                    status = getattr(getattr(ex, "resp", None), "status", "")
+                    logs.append(f"[RETRY] {endpoint} tentative {attempt + 1} dans {delay:.2f}s ({type(ex).__name__} {status})")
+                time.sleep(delay)
+
+def _new_batch(client, callback: Callable):
+    """BatchHttpRequest du client; avec API_ENDPOINT, l'URL batch du document de découverte ne suit pas."""
+    if API_ENDPOINT:
+        from googleapiclient.http import BatchHttpRequest
+
+        return BatchHttpRequest(callback=callback, batch_uri=API_ENDPOINT.rstrip("/") + "/batch")
+    return client.new_batch_http_request(callback=callback)
+
+def api_execute_batch(
+    endpoint: str,
+    make_requests: Mapping[str, Callable],
+    cost: int,
+    logs: Optional[List[str]] = None,
+    deadline_t: Optional[float] = None,
+    span_attrs: Optional[dict] = None,
+) -> Dict[str, Any]:
+    """
+    Requêtes d'un même endpoint (1 par ID) en 1 aller-retour HTTP multipart (BatchHttpRequest).
+    - chaque sous-requête est facturée cost, comme un appel simple (calls += nb de sous-requêtes)
+    - réponse rattachée à son ID; échecs traités par sous-requête:
+      quota -> clé écartée, rejouée sur la suivante; transitoire -> rejouée (backoff) avec les autres
+      échecs du lot; fatale -> l'exception devient le résultat
+    - échec du lot entier (transport, 5xx) = échec de chacune de ses sous-requêtes
+    Une seule requête -> api_execute (pas d'enveloppe multipart, hedge possible).
+    Retourne {id: réponse ou exception}.
+    """
+    if len(make_requests) == 1:
+        (rid, make_request), = make_requests.items()
+        try:
+            return {rid: api_execute(endpoint, make_request, cost, logs=logs, deadline_t=deadline_t, span_attrs=span_attrs)}
+        except Exception as ex:
+            return {rid: ex}
+
+    pool = key_pool()
+    stats = api_call_stats()
+    stats.incr("calls", len(make_requests))
+    results: Dict[str, Any] = {}
+    pending = list(make_requests)
+    batch_span = span(f"{endpoint}[batch]", cat="api", items=len(pending), cost=cost, **(span_attrs or {}))
+    with batch_span as sp, http_deadline(deadline_t):
+        attempt = 0
+        while pending:
+            try:
+                key = pool.pick()
+            except QuotaExhaustedError as ex:
+                results.update((rid, ex) for rid in pending)
+                break
+            # 💰 facturé seulement si la requête part: cost par sous-requête
+            charge_quota(key, endpoint, cost * len(pending))
+            stats.incr("attempts")
+            stats.incr("batches")
+            sp["attempts"] = sp.get("attempts", 0) + 1
+            sp["key"] = key.label
+
+            replies: Dict[str, Any] = {}
+            client = pool.client(key)
+            batch = _new_batch(client, lambda rid, res, ex: replies.__setitem__(rid, res if ex is None else ex))
+            for rid in pending:
+                batch.add(make_requests[rid](client), request_id=rid)
+            t0 = time.monotonic()
+            try:
+                batch.execute(http=api_http())
+                stats.record_latency(f"{endpoint}[batch]", time.monotonic() - t0)
+            except Exception as ex:
+                replies = {rid: ex for rid in pending}
+
+            retry: List[str] = []
+            errors: Dict[str, Exception] = {}
+            quota_hit = False
+            for rid in pending:
+                out = replies.get(rid)
+                if not isinstance(out, Exception):
+                    results[rid] = out if out is not None else {}
+                    continue
+                kind = classify_api_error(out)
+                if kind == "fatal":
+                    stats.incr("fatal_errors")
+                    results[rid] = out
+                    continue
+                quota_hit = quota_hit or kind == "quota"
+                if kind == "retryable":
+                    stats.incr("retryable_errors")
+                    errors[rid] = out
+                retry.append(rid)
+            pending = retry
+            sp["failed"] = len(pending)
+
+            if quota_hit:
+                pool.mark_exhausted(key)
+                stats.incr("key_failovers")
+                sp["key_failovers"] = sp.get("key_failovers", 0) + 1
+                if logs is not None:
+                    logs.append(f"[WARN] clé {key.label}: quota épuisé -> bascule sur une autre clé ({endpoint} batch)")
+            if not errors:
+                continue  # rien de transitoire: rejoué tout de suite sur la clé suivante
+
+            attempt += 1
+            delay = random.uniform(0, min(API_BACKOFF_MAX, API_BACKOFF_BASE * 2 ** attempt))
+            out_of_time = deadline_t is not None and time.monotonic() + delay > deadline_t
+            if attempt > API_MAX_RETRIES or out_of_time:
+                stats.incr("gave_up")
+                results.update(errors)
+                pending = [rid for rid in pending if rid not in errors]
+                continue
+            stats.incr("retries")
+            sp["retries"] = attempt
+            if logs is not None:
+                logs.append(f"[RETRY] {endpoint} batch tentative {attempt + 1} dans {delay:.2f}s ({len(pending)} sous-requêtes)")
+            time.sleep(delay)
+    return results
+
+
+@_singleton
+def api_http() -> PooledHttp:
+    """
+    Transport HTTP commun à tous les clients et à tous les threads (pool keep-alive par hôte, gzip,
+    timeouts bornés par la deadline de l'appel en cours), passé à build() et à execute(http=...).
+    """
+    return PooledHttp()
+
+def make_executor(max_workers: int, name: str = "yt") -> ThreadPoolExecutor:
+    """
+    Pool de threads borné (les workers n'appellent jamais Streamlit: callbacks dans le thread appelant).
+    Les tâches héritent du tracer / span courant; name = préfixe des threads (lignes de la trace).
+    """
+    return TracedExecutor(max_workers=max_workers, thread_name_prefix=name)
+
+
+def http_error_to_text(ex: Exception) -> str:
+    errors = sys.modules.get("googleapiclient.errors")
+    if errors is not None and isinstance(ex, errors.HttpError):
+        return f"HttpError: {ex}"
+    return str(ex)
+
+
+# =========================
+# UTILS
+# =========================
+def now_utc() -> datetime:
+    return datetime.now(timezone.utc)
+
+def dt_to_rfc3339(dt: datetime) -> str:
+    return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def rfc3339_to_dt(s: str) -> Optional[datetime]:
+    if not s:
+        return None
+    try:
+        if s.endswith("Z"):
+            return datetime.fromisoformat(s.replace("Z", "+00:00"))
+        return datetime.fromisoformat(s)
+    except ValueError:
+        return None
+
+def parse_iso8601_duration_to_seconds(d: str) -> int:
+    if not d:
+        return 0
+    m = ISO_DURATION_RE.match(d.strip())
+    if not m:
+        return 0
+    h = int(m.group(1) or 0)
+    mi = int(m.group(2) or 0)
+    s = int(m.group(3) or 0)
+    return h * 3600 + mi * 60 + s
+
+def normalize_text(s: str) -> str:
+    s = (s or "").lower()
+    s = s.replace(".", "")  # I.C.E -> ice
+    s = re.sub(r"\s+", " ", s)
+    return s.strip()
+
+def parse_and_tokens(query: str) -> List[str]:
+    """
+    "ice + trump" => AND
+    "ice trump"   => AND
+    '"donald trump" ice' => phrase + mot
+    """
+    if not query:
+        return []
+    q = query.strip()
+    quoted = re.findall(r'"([^"]+)"', q)
+    q_wo_quotes = re.sub(r'"[^"]+"', " ", q)
+
+    if "+" in q_wo_quotes:
+        parts = [p.strip() for p in re.split(r"\s*\+\s*", q_wo_quotes) if p.strip()]
+    else:
+        parts = [p.strip() for p in re.split(r"\s+", q_wo_quotes) if p.strip()]
+
+    tokens = [*quoted, *parts]
+    return [normalize_text(t) for t in tokens if t.strip()]
+
+def token_present(text: str, token: str) -> bool:
+    t = normalize_text(text)
+    tok = normalize_text(token)
+    if not tok:
+        return True
+    if " " in tok:  # phrase
+        return tok in t
+    return re.search(rf"\b{re.escape(tok)}\b", t) is not None
+
+def tokens_all_present(text: str, tokens: List[str]) -> bool:
+    return all(token_present(text, tok) for tok in tokens)
+
+_WORD_RE = re.compile(r"\w+")
+
+class KeywordMatcher:
+    """
+    Matcher compilé 1 fois par run depuis kw_tokens (même sémantique que token_present):
+    - mot simple (\\w+): \\bmot\\b <=> le mot est un des mots du texte -> 1 seul findall + set
+    - phrase (avec espace): sous-chaîne du texte normalisé
+    - autre token (ponctuation: "c++", "l'ice"): regex \\b...\\b précompilée
+    Le texte de la vidéo n'est normalisé qu'une fois pour tous les mots-clés.
+    """
+
+    def __init__(self, kw_tokens: Dict[str, List[str]]):
+        self.keywords = list(kw_tokens)
+        self._checks: Dict[str, List[Tuple[str, object]]] = {}
+        compiled: Dict[str, re.Pattern] = {}
+        for kw, toks in kw_tokens.items():
+            checks: List[Tuple[str, object]] = []
+            for tok in toks:
+                if not tok:
+                    continue
+                if _WORD_RE.fullmatch(tok):
+                    checks.append(("word", tok))
+                elif " " in tok:
+                    checks.append(("phrase", tok))
+                else:
+                    if tok not in compiled:
+                        compiled[tok] = re.compile(rf"\b{re.escape(tok)}\b")
+                    checks.append(("regex", compiled[tok]))
+            self._checks[kw] = checks
+
+    def match(self, text: str, keywords: Optional[Set[str]] = None) -> List[str]:
+        """Tous les mots-clés (ordre de saisie) dont chaque token est présent; keywords limite les candidats."""
+        t = normalize_text(text)
+        words: Optional[Set[str]] = None
+        out: List[str] = []
+        for kw in self.keywords:
+            if keywords is not None and kw not in keywords:
+                continue
+            checks = self._checks.get(kw)
+            if not checks:  # mot-clé sans token: jamais matché (comme avant)
+                continue
+            ok = True
+            for kind, tok in checks:
+                if kind == "word":
+                    if words is None:
+                        words = set(_WORD_RE.findall(t))
+                    ok = tok in words
+                elif kind == "phrase":
+                    ok = tok in t
+                else:
+                    ok = tok.search(t) is not None
+                if not ok:
+                    break
+            if ok:
+                out.append(kw)
+        return out
+
+DURATION_MIN_SECONDS = {"Toutes": 0, "2 min": 120, "5 min": 300, "10 min": 600}
+
+def passes_duration(seconds: int, min_duration: str) -> bool:
+    if min_duration == "Toutes":
+        return True
+    if min_duration == "2 min":
+        return seconds >= 120
+    if min_duration == "5 min":
+        return seconds >= 300
+    if min_duration == "10 min":
+        return seconds >= 600
+    return True
+
+def stars_from_ratio(ratio: Optional[float]) -> str:
+    if ratio is None:
+        return "⭐"
+    if ratio >= 5:
+        return "⭐⭐⭐🔥"
+    if ratio >= 2:
+        return "⭐⭐⭐"
+    if ratio >= 1:
+        return "⭐⭐"
+    return "⭐"
+
+def detect_langs_batch(texts: List[str]) -> List[Tuple[Optional[str], float]]:
+    """
+    Identification n-grammes d'un lot de textes en 1 appel.
+    [(code | None, confiance)]: None si texte trop court ou confiance < LANG_DETECT_MIN_CONFIDENCE.
+    """
+    out: List[Tuple[Optional[str], float]] = []
+    for lang, conf in identify_languages(texts):
+        out.append((lang if conf >= LANG_DETECT_MIN_CONFIDENCE else None, conf))
+    return out
+
+def detect_lang_from_text(text: str) -> Optional[str]:
+    """Retourne le code langue ('fr', 'en', 'es', 'de', 'it', 'pt') ou None."""
+    if not text:
+        return None
+    return detect_langs_batch([text])[0][0]
+
+def text_lang_is_verdict(lang: Optional[str], conf: float, target_code: Optional[str]) -> bool:
+    """
+    Langue inférée du titre/description/tags suffisante pour trancher sans commentaires:
+    même langue que la cible dès LANG_TEXT_MIN_CONFIDENCE, autre langue dès LANG_TEXT_REJECT_CONFIDENCE.
+    """
+    if not lang or conf < LANG_TEXT_MIN_CONFIDENCE:
+        return False
+    return lang == target_code or conf >= LANG_TEXT_REJECT_CONFIDENCE
+
+def language_ok_with_fallback(
+    target_code: Optional[str],
+    default_audio_language: Optional[str],
+    default_language: Optional[str],
+    comments_text: str,
+    require_proof: bool,
+    comments_lang: Optional[Tuple[Optional[str], float]] = None,
+    text_lang: Optional[Tuple[str, float]] = None,
+) -> Tuple[bool, str]:
+    """
+    Ordre:
+    1) meta audio/lang si dispo
+    2) sinon langue inférée du titre/description/tags (text_lang, déjà validée par text_lang_is_verdict)
+    3) sinon comments détectés (comments_lang = résultat déjà calculé par detect_langs_batch)
+    4) sinon => si require_proof=True rejet, sinon accept
+    """
+    if target_code is None:
+        return True, "langue=auto"
+
+    dal = (default_audio_language or "").strip().lower()
+    dl = (default_language or "").strip().lower()
+
+    def matches(code: str) -> bool:
+        return code == target_code or code.startswith(target_code + "-")
+
+    if dal:
+        return (matches(dal), f"meta audio={dal}")
+    if dl:
+        return (matches(dl), f"meta lang={dl}")
+
+    if text_lang:
+        return (text_lang[0] == target_code, f"texte détecté={text_lang[0]} ({text_lang[1]:.2f})")
+
+    if comments_lang is None:
+        comments_lang = detect_langs_batch([comments_text])[0] if comments_text else (None, 0.0)
+    detected, conf = comments_lang
+    if detected:
+        return (detected == target_code, f"comments détecté={detected} ({conf:.2f})")
+
+    if require_proof:
+        return False, "aucune preuve (meta vide + comments indétectable)"
+    return True, "aucune preuve (accepté)"
+
+
+# =========================
+# SEARCH QUERY NORMALIZATION (FIX ORDER)
+# =========================
+def build_stable_api_query(raw_query: str) -> str:
+    """
+    But: "trump epstein" == "epstein trump" (mêmes résultats).
+    - Si l'utilisateur utilise des opérateurs avancés (| ou -), on ne touche pas.
+    - Sinon: on extrait tokens (AND), on les trie, et on reconstruit une requête stable.
+    """
+    if not raw_query:
+        return ""
+
+    q = raw_query.strip()
+
+    # si opérateurs avancés -> on garde la forme
+    if "|" in q or re.search(r"(^|\s)-\w+", q):
+        return q.replace("+", " ").strip()
+
+    toks = parse_and_tokens(q)
+    if not toks:
+        return q.replace("+", " ").strip()
+
+    # reconstruit en gardant les phrases entre guillemets
+    rebuilt: List[str] = []
+    for t in toks:
+        if " " in t:
+            rebuilt.append(f"\"{t}\"")
+        else:
+            rebuilt.append(t)
+
+    # trie stable pour rendre l'ordre indépendant
+    rebuilt_sorted = sorted(set(rebuilt), key=lambda x: x.lower())
+    return " ".join(rebuilt_sorted).strip()
+
+
+# =========================
+# CACHE LOCAL (SQLite) - métadonnées vidéos / chaînes
+# =========================
+VIDEO_SLOW_PARTS = ("snippet", "contentDetails")
+
+def _row_bytes(row: tuple) -> int:
+    """Taille approximative d'une ligne gardée en mémoire: ses chaînes (JSON) + un forfait par ligne."""
+    return 100 + sum(len(v) for v in row if isinstance(v, str))
+
+class MetaCache:
+    """
+    Cache persistant par ID, 2 niveaux de fraîcheur pour les vidéos:
+    - lent  (snippet + contentDetails) -> VIDEO_SLOW_TTL
+    - rapide (statistics)              -> VIDEO_FAST_TTL
+    Chaînes: statistics uniquement -> CHANNEL_TTL.
+    Pages search.list: clé canonique (voir search_page_cache_key), fraîcheur passée à la lecture.
+    Runs complets (run_snapshot), par clé de paramètres de fetch -> RUN_STORE_TTL.
+    Watchlists (yt_watch): par nom, sans expiration.
+    Toute erreur SQLite = cache miss (le cache n'est jamais bloquant).
+    Vidéos / chaînes / pages: lignes aussi gardées en mémoire (LRU, META_MEMORY_ROWS lignes et
+    META_MEMORY_BYTES octets approximatifs par table: les descriptions peuvent être longues),
+    communes à toutes les sessions du process; la fraîcheur se juge sur les horodatages des lignes.
+    """
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._mem = {
+            table: TTLCache(float("inf"), META_MEMORY_ROWS, META_MEMORY_BYTES, _row_bytes)
+            for table in ("videos", "channels", "search_pages")
+        }
+        try:
+            db = sqlite3.connect(path, timeout=5, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS videos ("
+                "id TEXT PRIMARY KEY, slow TEXT, slow_ts REAL, fast TEXT, fast_ts REAL)"
+            )
+            db.execute("CREATE TABLE IF NOT EXISTS channels (id TEXT PRIMARY KEY, data TEXT, ts REAL)")
+            db.execute("CREATE TABLE IF NOT EXISTS search_pages (key TEXT PRIMARY KEY, ids TEXT, next_token TEXT, ts REAL)")
+            db.execute("CREATE TABLE IF NOT EXISTS runs (key TEXT PRIMARY KEY, data TEXT, ts REAL)")
+            db.execute("CREATE TABLE IF NOT EXISTS watchlists (name TEXT PRIMARY KEY, data TEXT, ts REAL)")
+            db.commit()
+            self._db = db
+        except sqlite3.Error:
+            self._db = None
+
+    def _select(self, table: str, cols: str, ids: List[str]) -> List[tuple]:
+        """Lignes (id en 1re colonne): mémoire d'abord, SQLite pour le reste (remontées en mémoire)."""
+        mem = self._mem[table]
+        rows: List[tuple] = []
+        missing: List[str] = []
+        for id_ in ids:
+            hit, row = mem.get(id_)
+            if hit:
+                rows.append(row)
+            else:
+                missing.append(id_)
+        if self._db is None or not missing:
+            return rows
+        found: List[tuple] = []
+        try:
+            with self._lock:
+                for i in range(0, len(missing), 500):
+                    part = missing[i:i+500]
+                    q = f"SELECT {cols} FROM {table} WHERE id IN ({','.join('?' * len(part))})"
+                    found.extend(self._db.execute(q, part).fetchall())
+        except sqlite3.Error:
+            return rows
+        for row in found:
+            mem.put(row[0], row)
+        return rows + found
+
+    def _write(self, sql: str, rows: List[tuple]):
+        if self._db is None or not rows:
+            return
+        try:
+            with self._lock:
+                self._db.executemany(sql, rows)
+                self._db.commit()
+        except sqlite3.Error:
+            pass
+
+    def get_videos(self, ids: List[str]) -> Tuple[Dict[str, dict], Dict[str, dict], List[str]]:
+        """
+        Retourne (frais, stats_perimees, absents):
+        - frais: item complet prêt à l'emploi
+        - stats_perimees: partie lente encore valide -> il ne manque que statistics
+        - absents: à recharger entièrement
+        """
+        now = time.time()
+        fresh: Dict[str, dict] = {}
+        stale_stats: Dict[str, dict] = {}
+        for vid, slow, slow_ts, fast, fast_ts in self._select("videos", "id, slow, slow_ts, fast, fast_ts", ids):
+            if not slow or now - (slow_ts or 0) > VIDEO_SLOW_TTL:
+                continue
+            item = json.loads(slow)
+            if fast and now - (fast_ts or 0) <= VIDEO_FAST_TTL:
+                item["statistics"] = json.loads(fast)
+                fresh[vid] = item
+            else:
+                stale_stats[vid] = item
+        misses = [vid for vid in ids if vid not in fresh and vid not in stale_stats]
+        return fresh, stale_stats, misses
+
+    def put_videos(self, items: List[dict]):
+        now = time.time()
+        rows = []
+        for it in items:
+            slow = {"id": it["id"], **{k: it[k] for k in VIDEO_SLOW_PARTS if k in it}}
+            rows.append((it["id"], json.dumps(slow), now, json.dumps(it.get("statistics") or {}), now))
+        for row in rows:
+            self._mem["videos"].put(row[0], row)
+        self._write("INSERT OR REPLACE INTO videos (id, slow, slow_ts, fast, fast_ts) VALUES (?, ?, ?, ?, ?)", rows)
+
+    def put_video_stats(self, items: List[dict]):
+        now = time.time()
+        rows = [(json.dumps(it.get("statistics") or {}), now, it["id"]) for it in items]
+        mem = self._mem["videos"]
+        for fast, fast_ts, vid in rows:
+            hit, row = mem.get(vid)
+            if hit:
+                mem.put(vid, (vid, row[1], row[2], fast, fast_ts))
+        self._write("UPDATE videos SET fast = ?, fast_ts = ? WHERE id = ?", rows)
+
+    def get_channels(self, ids: List[str]) -> Tuple[Dict[str, dict], List[str]]:
+        now = time.time()
+        fresh: Dict[str, dict] = {}
+        for ch, data, ts in self._select("channels", "id, data, ts", ids):
+            if data and now - (ts or 0) <= CHANNEL_TTL:
+                fresh[ch] = json.loads(data)
+        return fresh, [ch for ch in ids if ch not in fresh]
+
+    def put_channels(self, items: List[dict]):
+        now = time.time()
+        rows = [(it["id"], json.dumps(it), now) for it in items]
+        for row in rows:
+            self._mem["channels"].put(row[0], row)
+        self._write("INSERT OR REPLACE INTO channels (id, data, ts) VALUES (?, ?, ?)", rows)
+
+    def get_search_page(self, key: str, ttl: float) -> Optional[Tuple[List[str], Optional[str]]]:
+        """Page search.list en cache -> (ids, nextPageToken) si plus récente que ttl."""
+        hit, row = self._mem["search_pages"].get(key)
+        if not hit:
+            if self._db is None:
+                return None
+            try:
+                with self._lock:
+                    row = self._db.execute("SELECT ids, next_token, ts FROM search_pages WHERE key = ?", (key,)).fetchone()
+            except sqlite3.Error:
+                return None
+            if row:
+                self._mem["search_pages"].put(key, row)
+        if not row or time.time() - (row[2] or 0) > ttl:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def put_search_page(self, key: str, ids: List[str], next_token: Optional[str]):
+        row = (json.dumps(ids), next_token, time.time())
+        self._mem["search_pages"].put(key, row)
+        self._write("INSERT OR REPLACE INTO search_pages (key, ids, next_token, ts) VALUES (?, ?, ?, ?)", [(key, *row)])
+
+    def get_run(self, key: str) -> Optional[dict]:
+        if self._db is None:
+            return None
+        try:
+            with self._lock:
+                row = self._db.execute("SELECT data, ts FROM runs WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error:
+            return None
+        if not row or time.time() - (row[1] or 0) > RUN_STORE_TTL:
+            return None
+        return json.loads(row[0])
+
+    def put_run(self, key: str, snapshot: dict):
+        self._write("INSERT OR REPLACE INTO runs (key, data, ts) VALUES (?, ?, ?)", [(key, json.dumps(snapshot), time.time())])
+
+    def list_watchlists(self) -> List[str]:
+        if self._db is None:
+            return []
+        try:
+            with self._lock:
+                return [r[0] for r in self._db.execute("SELECT name FROM watchlists ORDER BY ts DESC").fetchall()]
+        except sqlite3.Error:
+            return []
+
+    def get_watchlist(self, name: str) -> Optional[dict]:
+        if self._db is None:
+            return None
+        try:
+            with self._lock:
+                row = self._db.execute("SELECT data FROM watchlists WHERE name = ?", (name,)).fetchone()
+        except sqlite3.Error:
+            return None
+        return json.loads(row[0]) if row else None
+
+    def put_watchlist(self, name: str, watchlist: dict):
+        self._write(
+            "INSERT OR REPLACE INTO watchlists (name, data, ts) VALUES (?, ?, ?)",
+            [(name, json.dumps(watchlist), time.time())],
+        )
+
+    def delete_watchlist(self, name: str):
+        self._write("DELETE FROM watchlists WHERE name = ?", [(name,)])
+
+
+@_singleton
+def meta_cache() -> MetaCache:
+    return MetaCache(state_path(META_CACHE_DB))
+
+
+# =========================
+# CACHE PARTAGÉ ENTRE SESSIONS: SINGLE-FLIGHT + COMPTEURS
+# =========================
+class SingleFlight:
+    """
+    Coalescence des requêtes identiques en vol, pour tout le process (toutes sessions Streamlit):
+    le 1er demandeur d'une clé fait l'appel, les suivants attendent son résultat (0 appel, 0 unité).
+    Les appels ne dépendent jamais d'un autre vol => pas d'interblocage.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[Any, Future] = {}
+
+    def claim(self, keys: List[Any]) -> Tuple[List[Any], Dict[Any, Future]]:
+        """(clés à charger soi-même, {clé: vol en cours d'un autre demandeur})."""
+        own: List[Any] = []
+        waiting: Dict[Any, Future] = {}
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                fut = self._flights.get(key)
+                if fut is None:
+                    self._flights[key] = Future()
+                    own.append(key)
+                else:
+                    waiting[key] = fut
+        return own, waiting
+
+    def resolve(self, keys: List[Any], results: Mapping):
+        """Fin des vols de keys: résultat publié aux demandeurs en attente (absent -> None)."""
+        with self._lock:
+            futs = [self._flights.pop(key) for key in keys]
+        for key, fut in zip(keys, futs):
+            fut.set_result(results.get(key))
+
+    def do(self, key: Any, fn: Callable[[], Any], deadline_t: Optional[float] = None) -> Tuple[Any, bool]:
+        """(résultat de fn() ou du vol déjà en cours, True si partagé). Attente bornée par deadline_t."""
+        own, waiting = self.claim([key])
+        if own:
+            result = None
+            try:
+                result = fn()
+                return result, False
+            finally:
+                self.resolve(own, {key: result})
+        return _wait_flight(waiting[key], deadline_t), True
+
+def _wait_flight(fut: Future, deadline_t: Optional[float]) -> Any:
+    timeout = None if deadline_t is None else min(max(0.0, deadline_t - time.monotonic()), threading.TIMEOUT_MAX)
+    try:
+        return fut.result(timeout=timeout)
+    except FuturesTimeoutError:
+        return None
+
+@_singleton
+def single_flight() -> SingleFlight:
+    return SingleFlight()
+
+def coalesced_fetch(
+    kind: str,
+    ids: List[str],
+    fetch: Callable[[List[str]], Dict[str, dict]],
+    deadline_t: Optional[float] = None,
+) -> Dict[str, dict]:
+    """
+    fetch(ids) par ID avec single-flight: les IDs déjà en vol (autre session, autre chunk) sont attendus,
+    seuls les autres partent. Un ID non obtenu par le vol attendu est absent du résultat.
+    """
+    flights = single_flight()
+    own, waiting = flights.claim([(kind, id_) for id_ in ids])
+    out: Dict[str, dict] = {}
+    stats = cache_stats()
+    stats.incr(kind.split(".")[0], "miss", len(own))
+    stats.incr(kind.split(".")[0], "coalesced", len(waiting))
+    if own:
+        got: Dict[str, dict] = {}
+        try:
+            got = fetch([key[1] for key in own])
+        finally:
+            flights.resolve(own, {(kind, id_): v for id_, v in got.items()})
+        out.update(got)
+    for key, fut in waiting.items():
+        value = _wait_flight(fut, deadline_t)
+        if value is not None:
+            out[key[1]] = value
+    return {id_: out[id_] for id_ in ids if id_ in out}
+
+class CacheStats:
+    """Compteurs hit / miss / coalesced par type de donnée (process entier, pour la sidebar)."""
+
+    KINDS = ("search", "videos", "channels", "comments")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[str, Dict[str, int]] = {k: {"hit": 0, "miss": 0, "coalesced": 0} for k in self.KINDS}
+
+    def incr(self, kind: str, field: str, n: int = 1):
+        if n:
+            with self._lock:
+                self.counters[kind][field] += n
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {k: dict(c) for k, c in self.counters.items()}
+
+@_singleton
+def cache_stats() -> CacheStats:
+    return CacheStats()
+
+
+# =========================
+# BACKENDS (DATA API / YT-DLP)
+# =========================
+YTDLP_TOKEN_PREFIX = "ytdlp:"  # pageToken des pages yt-dlp (= index de la page suivante)
+
+class Backend(abc.ABC):
+    """
+    Source des pages de recherche et des métadonnées vidéo, au format Data API v3:
+    - search_page -> (ids, next_token), next_token None = dernière page
+    - videos -> ({id: item videos.list}, {id: item channels.list} déjà connus, éventuellement vide)
+    Les erreurs remontent (QuotaExhaustedError comprise); cache et logs restent aux appelants.
+    """
+    name = "?"
+    paid = False  # True = consomme du quota
+
+    def available(self) -> bool:
+        return True
+
+    @abc.abstractmethod
+    def search_page(
+        self, q_for_api: str, page_index: int, page_token: Optional[str], per_page: int,
+        relevance_language: Optional[str], region_code: Optional[str], published_after: Optional[datetime],
+        deadline_t: float, logs: List[str],
+    ) -> Tuple[List[str], Optional[str]]:
+        ...
+
+    @abc.abstractmethod
+    def videos(
+        self, ids: List[str], deadline_t: float, logs: List[str], stats_only: bool = False,
+    ) -> Tuple[Dict[str, dict], Dict[str, dict]]:
+        ...
+
+class DataApiBackend(Backend):
+    name = "api"
+    paid = True
+
+    def available(self) -> bool:
+        try:
+            return bool(key_pool().available())
+        except RuntimeError:  # clé ou dépendance manquante
+            return False
+
+    def search_page(self, q_for_api, page_index, page_token, per_page, relevance_language, region_code,
+                    published_after, deadline_t, logs):
+        params = {
+            "part": "id",
+            "q": q_for_api,
+            "type": "video",
+            "maxResults": per_page,
+            "pageToken": page_token,
+            "fields": "nextPageToken,items/id/videoId",
+        }
+
+        # ✅ FIX 2: si période (publishedAfter) -> on trie par date
+        if published_after:
+            params["order"] = "date"
+
+        if relevance_language:
+            params["relevanceLanguage"] = relevance_language
+        if region_code:
+            params["regionCode"] = region_code
+        if published_after:
+            params["publishedAfter"] = dt_to_rfc3339(published_after)  # déjà arrondi par api_search_page
+
+        # 💰 COÛT: Search = 100 unités par page (facturé seulement si la requête part)
+        res = api_execute(
+            "search.list", lambda yt: yt.search().list(**params), 100, keyword=q_for_api, logs=logs, deadline_t=deadline_t
+        )
+        ids: List[str] = []
+        for it in res.get("items") or []:
+            vid = ((it.get("id") or {}).get("videoId"))
+            if vid:
+                ids.append(vid)
+        return ids, res.get("nextPageToken")
+
+    def videos(self, ids, deadline_t, logs, stats_only=False):
+        # 💰 COÛT: Videos List = 1 unité par appel
+        res = api_execute("videos.list", lambda yt: yt.videos().list(
+            part="statistics" if stats_only else "snippet,statistics,contentDetails",
+            id=",".join(ids),
+            fields="items(id,statistics(viewCount))" if stats_only else VIDEOS_FULL_FIELDS,
+        ), 1, logs=logs, deadline_t=deadline_t, span_attrs={"chunk": len(ids), "stats_only": stats_only})
+        return {it["id"]: it for it in res.get("items") or []}, {}
+
+class YtDlpBackend(Backend):
+    """
+    Extraction des pages YouTube via yt-dlp: 0 unité, mais ~1 requête par vidéo (plus lent).
+    Pas de filtre langue/région côté recherche (le filtre langue local fait le tri).
+    """
+    name = "ytdlp"
+
+    def __init__(self):
+        self.extractor = YtDlpExtractor.from_env()
+
+    def available(self) -> bool:
+        return self.extractor.available()
+
+    def search_page(self, q_for_api, page_index, page_token, per_page, relevance_language, region_code,
+                    published_after, deadline_t, logs):
+        # yt-dlp n'a pas de pageToken: page N = tranche N de la liste des (N+1)*per_page premiers résultats,
+        # extraite une fois pour toutes les pages possibles (MAX_PAGES) puis découpée
+        count = (page_index + 1) * per_page
+        with span("yt-dlp.search", cat="api", q=q_for_api, page=page_index + 1) as sp:
+            ids = self.extractor.search(q_for_api, count, by_date=bool(published_after), prefetch=MAX_PAGES * per_page)
+            sp["ids"] = len(ids)
+        page = ids[page_index * per_page:count]
+        next_token = f"{YTDLP_TOKEN_PREFIX}{page_index + 1}" if len(ids) >= count else None
+        return page, next_token
+
+    def videos(self, ids, deadline_t, logs, stats_only=False):
+        # pas d'appel "stats seulement": la page vidéo donne tout d'un coup
+        def _one(vid: str) -> Optional[dict]:
+            if time.monotonic() > deadline_t:
+                return None
+            with span("yt-dlp.video", cat="api", video_id=vid) as sp:
+                info = self.extractor.video(vid)
+                sp["found"] = info is not None
+            return info
+
+        videos: Dict[str, dict] = {}
+        channels: Dict[str, dict] = {}
+        with make_executor(min(YTDLP_MAX_WORKERS, len(ids)), "yt-ytdlp") as pool:
+            for info in pool.map(_one, ids):
+                if not info or not info.get("id"):
+                    continue
+                videos[info["id"]] = normalize_video(info)
+                ch = normalize_channel(info)
+                if ch:
+                    channels[ch["id"]] = ch
+        if time.monotonic() > deadline_t:
+            logs.append("[WARN] deadline pendant l'extraction yt-dlp")
+        return videos, channels
+
+class BackendRouter:
+    """
+    Choix du backend par appel (thread-safe):
+    - BACKEND_MODE "api" / "ytdlp" (ou pinned_backend() autour de l'appel) -> ce backend seulement
+    - "auto", search: Data API tant que les clés ont du quota; yt-dlp seulement quand il n'en reste plus
+      (la recherche yt-dlp ignore langue / région / publishedAfter: les résultats changent de sens)
+    - "auto", videos: Data API si le quota le couvre, sauf si yt-dlp s'est montré plus rapide
+      (latence moyenne EWMA); sinon yt-dlp (0 unité)
+    """
+
+    def __init__(self, backends: List[Backend]):
+        self.backends = {b.name: b for b in backends}
+        self._lock = threading.Lock()
+        self._latency: Dict[Tuple[str, str], float] = {}  # (backend, op) -> EWMA secondes
+        self._calls: Dict[Tuple[str, str], int] = {}
+
+    def free(self) -> Optional[Backend]:
+        """Backend gratuit utilisable (repli quand le quota est épuisé)."""
+        b = self.backends.get("ytdlp")
+        return b if backend_mode() != "api" and b is not None and b.available() else None
+
+    def pick(self, op: str, cost: int, paid_allowed: bool = True, logs: Optional[List[str]] = None) -> Optional[Backend]:
+        """
+        paid_allowed=False (budget du planner): pas d'appel payant, mais pas de bascule sur yt-dlp
+        pour search tant que les clés ont du quota (None = pas de page).
+        """
+        api = self.backends["api"]
+        mode = backend_mode()
+        if mode == "api":
+            return api
+        free = self.free()
+        if mode == "ytdlp":
+            return free
+        has_quota = api.available() and key_pool().remaining() >= cost
+        if op == "search":
+            if has_quota:
+                return api if paid_allowed else None
+            if free is not None and logs is not None:
+                logs.append(f"[WARN] quota épuisé -> search via {free.name} (0 unité, sans langue / région / période)")
+            return free
+        if paid_allowed and has_quota:
+            with self._lock:
+                api_s = self._latency.get((api.name, op))
+                free_s = self._latency.get((free.name, op)) if free else None
+            if free is not None and api_s is not None and free_s is not None and free_s < api_s:
+                return free
+            return api
+        return free
+
+    def record(self, backend: Backend, op: str, seconds: float):
+        key = (backend.name, op)
+        with self._lock:
+            prev = self._latency.get(key)
+            self._latency[key] = seconds if prev is None else prev + BACKEND_LATENCY_ALPHA * (seconds - prev)
+            self._calls[key] = self._calls.get(key, 0) + 1
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """{"backend.op": {"calls": n, "ewma_s": s}} pour le Diagnostic."""
+        with self._lock:
+            return {
+                f"{name}.{op}": {"calls": self._calls.get((name, op), 0), "ewma_s": round(s, 3)}
+                for (name, op), s in self._latency.items()
+            }
+
+_pinned_backend: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("yt_pinned_backend", default=None)
+
+@contextmanager
+def pinned_backend(mode: str) -> Iterator[None]:
+    """
+    BACKEND_MODE imposé au bloc (et aux tâches d'un TracedExecutor lancées depuis ce bloc),
+    ex: "api" pour une watchlist, dont les watermarks n'ont pas de sens côté yt-dlp.
+    """
+    token = _pinned_backend.set(mode)
+    try:
+        yield
+    finally:
+        _pinned_backend.reset(token)
+
+def backend_mode() -> str:
+    return _pinned_backend.get() or BACKEND_MODE
+
+@_singleton
+def backend_router() -> BackendRouter:
+    return BackendRouter([DataApiBackend(), YtDlpBackend()])
+
+def _backend_call(backend: Backend, op: str, fn: Callable[[Backend], Any], logs: List[str]) -> Tuple[Backend, Any]:
+    """
+    fn(backend) avec mesure de latence; quota épuisé sur la Data API -> rejoué sur le backend gratuit.
+    Retourne (backend effectivement utilisé, résultat).
+    """
+    t0 = time.monotonic()
+    try:
+        out = fn(backend)
+    except QuotaExhaustedError:
+        free = backend_router().free() if backend.paid else None
+        if free is None:
+            raise
+        dropped = ", sans langue / région / période" if op == "search" else ""
+        logs.append(f"[WARN] quota épuisé -> {op} via {free.name} (0 unité{dropped})")
+        return _backend_call(free, op, fn, logs)
+    backend_router().record(backend, op, time.monotonic() - t0)
+    return backend, out
+
+
+# =========================
+# API CALLS (AVEC COMPTEUR DE COÛT)
+# =========================
+def published_after_bucket(published_after: Optional[datetime]) -> Optional[datetime]:
+    """
+    Arrondi au jour UTC: "7 derniers jours" donne la même borne toute la journée
+    => même clé de cache et même requête API. Le filtre date exact reste appliqué après.
+    """
+    if not published_after:
+        return None
+    return published_after.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+
+def search_page_cache_key(
+    q_for_api: str,
+    page_index: int,
+    relevance_language: Optional[str],
+    region_code: Optional[str],
+    published_after: Optional[datetime],
+    per_page: int,
+    exact_published_after: bool = False,
+) -> str:
+    if exact_published_after:
+        after = dt_to_rfc3339(published_after) if published_after else None
+    else:
+        bucket = published_after_bucket(published_after)
+        after = bucket.strftime("%Y-%m-%d") if bucket else None
+    return json.dumps([
+        q_for_api,
+        page_index,
+        relevance_language,
+        region_code,
+        after,
+        per_page,
+    ])
+
+class SearchPage(NamedTuple):
+    ids: List[str]
+    next_token: Optional[str]
+    cached: bool         # True = servie par le cache (0 quota)
+    source: str = "api"  # backend qui a servi la page ("api" = facturée 100 unités)
+
+def api_search_page(
+    q_for_api: str,
+    page_index: int,
+    page_token: Optional[str],
+    per_page: int,
+    relevance_language: Optional[str],
+    region_code: Optional[str],
+    published_after: Optional[datetime],
+    deadline_t: float,
+    logs: List[str],
+    cache_ttl: float = SEARCH_CACHE_TTL,
+    allow_fetch: bool = True,
+    exact_published_after: bool = False,
+) -> Optional[SearchPage]:
+    """
+    1 page search via le cache de pages si frais, sinon via le backend choisi par le routeur.
+    allow_fetch=False: pas de page payante (Data API); yt-dlp seulement si les clés n'ont plus de quota.
+    exact_published_after=True: publishedAfter envoyé tel quel (watermark de watchlist), sinon arrondi
+    au jour UTC (published_after_bucket) pour partager les pages en cache.
+    None = page non obtenue (deadline / erreur / aucun backend utilisable) -> la chaîne s'arrête.
+    """
+    with span("search.page", cat="search", q=q_for_api, page=page_index + 1) as sp:
+        key = search_page_cache_key(
+            q_for_api, page_index, relevance_language, region_code, published_after, per_page, exact_published_after
+        )
+        if not exact_published_after:
+            published_after = published_after_bucket(published_after)
+        # une chaîne commencée sur yt-dlp y reste (ses pageTokens n'existent pas côté Data API)
+        from_ytdlp = bool(page_token and page_token.startswith(YTDLP_TOKEN_PREFIX))
+        router = backend_router()
+        backend = router.free() if from_ytdlp else router.pick("search", 100, paid_allowed=allow_fetch, logs=logs)
+        lookups = [] if from_ytdlp else [("api", key)]
+        if backend is not None and not backend.paid:
+            lookups.append((backend.name, YTDLP_TOKEN_PREFIX + key))
+        if cache_ttl > 0:
+            for source, k in lookups:
+                cached = meta_cache().get_search_page(k, cache_ttl)
+                if cached is not None:
+                    cache_stats().incr("search", "hit")
+                    sp.update(cache="hit", ids=len(cached[0]))
+                    logs.append(f"[CACHE] search page {page_index+1}: hit +{len(cached[0])} (q='{q_for_api}')")
+                    return SearchPage(cached[0], cached[1], True, source)
+
+        sp["cache"] = "miss"
+        if backend is None:
+            return None
+
+        if time.monotonic() > deadline_t:
+            logs.append("[WARN] deadline pendant search.list")
+            return None
+
+        def _fetch() -> Optional[SearchPage]:
+            try:
+                used, (ids, next_token) = _backend_call(backend, "search", lambda b: b.search_page(
+                    q_for_api, page_index, page_token, per_page, relevance_language, region_code,
+                    published_after, deadline_t, logs,
+                ), logs)
+            except Exception as ex:
+                logs.append(f"[ERROR] search.list page {page_index+1}: {http_error_to_text(ex)}")
+                return None
+
+            sp.update(ids=len(ids), backend=used.name)
+            meta_cache().put_search_page(key if used.paid else YTDLP_TOKEN_PREFIX + key, ids, next_token)
+            via = "" if used.paid else f" via {used.name}"
+            logs.append(f"[INFO] search page {page_index+1}: +{len(ids)} (q='{q_for_api}'){via}")
+            return SearchPage(ids, next_token, False, used.name)
+
+        # même page déjà demandée par une autre session / un autre mot-clé: on attend son résultat
+        page, shared = single_flight().do(("search", backend.name, key), _fetch, deadline_t)
+        cache_stats().incr("search", "coalesced" if shared else "miss")
+        if shared and page is not None:
+            sp["cache"] = "coalesced"
+            logs.append(f"[CACHE] search page {page_index+1}: partagée (requête identique en vol) +{len(page.ids)} (q='{q_for_api}')")
+            return page._replace(cached=True)  # payée par l'autre demandeur
+        return page
+
+def api_search_video_ids_once(
+    query: str,
+    pages: int,
+    per_page: int,
+    relevance_language: Optional[str],
+    region_code: Optional[str],
+    published_after: Optional[datetime],
+    deadline_t: float,
+    logs: List[str],
+    cache_ttl: float = SEARCH_CACHE_TTL,
+) -> List[str]:
+    # ✅ FIX 1: requête stable (ordre des mots ne change plus rien)
+    q_for_api = build_stable_api_query(query)
+
+    ids: List[str] = []
+    page_token: Optional[str] = None
+
+    # pages déjà en cache = gratuites; seules les pages manquantes partent à l'API
+    for p in range(pages):
+        page = api_search_page(
+            q_for_api, p, page_token, per_page, relevance_language, region_code,
+            published_after, deadline_t, logs, cache_ttl=cache_ttl,
+        )
+        if page is None:
+            break
+        page_token = page.next_token
+        ids.extend(page.ids)
+        if not page_token:
+            break
+
+    # unique
+    seen: Set[str] = set()
+    out: List[str] = []
+    for vid in ids:
+        if vid not in seen:
+            out.append(vid)
+            seen.add(vid)
+    return out
+
+def api_search_video_ids(
+    query: str,
+    pages: int,
+    per_page: int,
+    relevance_language: Optional[str],
+    region_code: Optional[str],
+    published_after: Optional[datetime],
+    deadline_t: float,
+    logs: List[str],
+    cache_ttl: float = SEARCH_CACHE_TTL,
+) -> List[str]:
+    ids = api_search_video_ids_once(
+        query, pages, per_page, relevance_language, region_code, published_after, deadline_t, logs, cache_ttl=cache_ttl
+    )
+
+    # fallback si 0
+    if not ids and (relevance_language or region_code):
+        logs.append("[WARN] 0 résultat avec langue/region -> retry sans langue/region")
+        ids = api_search_video_ids_once(
+            query, pages, per_page, None, None, published_after, deadline_t, logs, cache_ttl=cache_ttl
+        )
+
+    return ids
+
+class _KeywordChain:
+    """Chaîne de pages d'un mot-clé pour le planner (état entre 2 tours)."""
+
+    def __init__(
+        self, kw: str, relevance_language: Optional[str], region_code: Optional[str], published_after: Optional[datetime],
+    ):
+        self.kw = kw
+        self.q_for_api = build_stable_api_query(kw)
+        self.relevance_language = relevance_language
+        self.region_code = region_code
+        self.published_after = published_after
+        self.page_index = 0
+        self.page_token: Optional[str] = None
+        self.ids: List[str] = []
+        self.last_new = 0
+        self.elapsed = 0.0
+        self.done = False
+
+def api_search_many(
+    keywords: List[str],
+    pages: int,
+    per_page: int,
+    relevance_language: Optional[str],
+    region_code: Optional[str],
+    published_after: Optional[datetime],
+    deadline_t: float,
+    logs: List[str],
+    on_keyword_done: Optional[Callable[[str, List[str], int], None]] = None,
+    cache_ttl: float = SEARCH_CACHE_TTL,
+    quota_remaining: Optional[int] = None,
+    published_after_by_kw: Optional[Mapping[str, Optional[datetime]]] = None,
+    stop: Optional[threading.Event] = None,
+) -> Dict[str, List[str]]:
+    """
+    Planner de recherche par tours (1 page par mot-clé actif et par tour, en parallèle):
+    - budget de pages payantes = quota restant (moins une réserve pour videos/channels/comments)
+    - sous budget limité, les mots-clés qui ramènent le plus d'IDs nouveaux passent en premier
+    - un mot-clé s'arrête dès que sa dernière page dépasse PLANNER_DUP_THRESHOLD de doublons
+      (IDs déjà vus via n'importe quel mot-clé)
+    - pages en cache = gratuites, servies même sans budget
+    - 0 résultat en page 1 avec langue/region -> la chaîne repart sans langue/region
+    - published_after_by_kw: publishedAfter exact propre à certains mots-clés (watchlist), sinon published_after
+    - stop levé (consommateur parti): plus aucun tour lancé, les mots-clés en cours rendent leurs IDs
+    Les tours sont traités dans l'ordre des mots-clés => résultat déterministe.
+    Retourne {mot-clé: ids}. on_keyword_done(kw, ids, nb_terminés) est appelé dans le thread appelant.
+    """
+    kws = list(dict.fromkeys(keywords))
+    ids_by_kw: Dict[str, List[str]] = {}
+    if not kws:
+        return ids_by_kw
+
+    if quota_remaining is None:
+        quota_remaining = key_pool().remaining()
+    budget = max(0, (quota_remaining - PLANNER_QUOTA_RESERVE) // 100)
+    logs.append(f"[PLAN] budget: {budget} pages payantes (quota restant {quota_remaining}), max {pages}/mot-clé")
+
+    by_kw = published_after_by_kw or {}
+    chains = [_KeywordChain(kw, relevance_language, region_code, by_kw.get(kw, published_after)) for kw in kws]
+    seen: Set[str] = set()
+    finished = 0
+
+    def _step(chain: _KeywordChain, allow_fetch: bool) -> Tuple[Optional[SearchPage], float]:
+        t0 = time.monotonic()
+        page = api_search_page(
+            chain.q_for_api, chain.page_index, chain.page_token, per_page,
+            chain.relevance_language, chain.region_code, chain.published_after, deadline_t, logs,
+            cache_ttl=cache_ttl, allow_fetch=allow_fetch, exact_published_after=chain.kw in by_kw,
+        )
+        return page, time.monotonic() - t0
+
+    with make_executor(min(SEARCH_MAX_WORKERS, len(chains)), "yt-search") as pool:
+        while True:
+            active = [c for c in chains if not c.done]
+            if not active:
+                break
+            if stop is not None and stop.is_set():
+                logs.append(f"[PLAN] recherche interrompue: {len(active)} mot(s)-clé(s) non terminé(s)")
+                break
+            # priorité: rendement en IDs nouveaux de la dernière page (tour 1: ordre de saisie)
+            order = sorted(active, key=lambda c: -c.last_new)
+            allowed = {}
+            for c in order:
+                allowed[c.kw] = budget > 0
+                if budget > 0:
+                    budget -= 1
+            futs = {c.kw: pool.submit(_step, c, allowed[c.kw]) for c in active}
+
+            for c in active:  # ordre de saisie => déterministe
+                try:
+                    page, elapsed = futs[c.kw].result()
+                except Exception as ex:
+                    logs.append(f"[ERROR] search '{c.kw}': {http_error_to_text(ex)}")
+                    page, elapsed = None, 0.0
+                c.elapsed += elapsed
+                if allowed[c.kw] and (page is None or page.cached or page.source != "api"):
+                    budget += 1  # rien payé: on rend la page au budget
+
+                if page is None:
+                    if not allowed[c.kw]:
+                        logs.append(f"[PLAN] '{c.kw}' stop page {c.page_index+1}: budget quota épuisé")
+                    c.done = True
+                elif c.page_index == 0 and not page.ids and (c.relevance_language or c.region_code) \
+                        and c.kw not in by_kw:  # 0 nouveauté depuis le publishedAfter d'une watchlist: normal
+                    logs.append(f"[WARN] 0 résultat avec langue/region -> retry sans langue/region ('{c.kw}')")
+                    c.relevance_language = None
+                    c.region_code = None
+                    c.page_token = None
+                    continue
+                else:
+                    page_uniq = list(dict.fromkeys(page.ids))
+                    new = [vid for vid in page_uniq if vid not in seen]
+                    seen.update(new)
+                    own = set(c.ids)
+                    c.ids.extend(vid for vid in page_uniq if vid not in own)
+                    c.last_new = len(new)
+                    c.page_index += 1
+                    c.page_token = page.next_token
+                    dup_rate = 1 - len(new) / len(page_uniq) if page_uniq else 1.0
+                    if not c.page_token or c.page_index >= pages:
+                        c.done = True
+                    elif dup_rate >= PLANNER_DUP_THRESHOLD:
+                        logs.append(f"[PLAN] '{c.kw}' stop après page {c.page_index}: {dup_rate:.0%} doublons")
+                        c.done = True
+
+                if c.done:
+                    finished += 1
+                    ids_by_kw[c.kw] = c.ids
+                    logs.append(f"[PERF] search '{c.kw}': {c.elapsed:.2f}s ({len(c.ids)} ids, {c.page_index} pages)")
+                    if on_keyword_done:
+                        on_keyword_done(c.kw, c.ids, finished)
+
+    return {kw: ids_by_kw.get(kw, []) for kw in kws}
+
+
+VIDEOS_FULL_FIELDS = (
+    "items("
+    "id,"
+    "snippet(title,description,tags,channelId,channelTitle,publishedAt,defaultAudioLanguage,defaultLanguage,thumbnails),"
+    "statistics(viewCount),"
+    "contentDetails(duration)"
+    ")"
+)
+
+def _videos_list_chunk(chunk: List[str], deadline_t: float, logs: List[str], stats_only: bool = False) -> Dict[str, dict]:
+    """
+    1 appel videos.list (<= 50 IDs), ou extraction yt-dlp si le routeur la choisit.
+    stats_only=True: seulement statistics (partie lente déjà en cache).
+    IDs déjà en vol ailleurs (autre session / chunk): attendus au lieu d'être redemandés.
+    """
+    if time.monotonic() > deadline_t:
+        logs.append("[WARN] deadline pendant videos.list")
+        return {}
+
+    def _fetch(ids: List[str]) -> Dict[str, dict]:
+        backend = backend_router().pick("videos", 1)
+        if backend is None:
+            return {}
+        try:
+            backend, (items, channels) = _backend_call(
+                backend, "videos", lambda b: b.videos(ids, deadline_t, logs, stats_only=stats_only), logs
+            )
+        except Exception as ex:
+            logs.append(f"[ERROR] videos.list: {http_error_to_text(ex)}")
+            return {}
+
+        if stats_only and backend.paid:
+            meta_cache().put_video_stats(list(items.values()))
+        else:
+            meta_cache().put_videos(list(items.values()))
+        if channels:
+            # abonnés lus sur la page vidéo: l'hydratation des chaînes les trouve en cache
+            meta_cache().put_channels(list(channels.values()))
+        return items
+
+    return coalesced_fetch("videos.stats" if stats_only else "videos", chunk, _fetch, deadline_t)
+
+def _video_stats_chunk(chunk: List[str], deadline_t: float, logs: List[str]) -> Dict[str, dict]:
+    return _videos_list_chunk(chunk, deadline_t, logs, stats_only=True)
+
+def _channels_list_chunk(chunk: List[str], deadline_t: float, logs: List[str]) -> Dict[str, dict]:
+    """1 appel channels.list (<= 50 IDs); IDs déjà en vol ailleurs attendus (single-flight)."""
+    if time.monotonic() > deadline_t:
+        logs.append("[WARN] deadline pendant channels.list")
+        return {}
+
+    def _fetch(ids: List[str]) -> Dict[str, dict]:
+        try:
+            # 💰 COÛT: Channels List = 1 unité par appel
+            res = api_execute("channels.list", lambda yt: yt.channels().list(
+                part="statistics",
+                id=",".join(ids),
+                fields="items(id,statistics(subscriberCount,hiddenSubscriberCount))",
+            ), 1, logs=logs, deadline_t=deadline_t, span_attrs={"chunk": len(ids)})
+        except Exception as ex:
+            logs.append(f"[ERROR] channels.list: {http_error_to_text(ex)}")
+            return {}
+
+        items = res.get("items") or []
+        meta_cache().put_channels(items)
+        return {it["id"]: it for it in items}
+
+    return coalesced_fetch("channels", chunk, _fetch, deadline_t)
+
+def _run_chunks(
+    fn: Callable[[List[str], float, List[str]], Dict[str, dict]],
+    ids: List[str],
+    deadline_t: float,
+    logs: List[str],
+) -> Dict[str, dict]:
+    """Chunks de 50 en parallèle."""
+    chunks = [ids[i:i+50] for i in range(0, len(ids), 50)]
+    if not chunks:
+        return {}
+    found: Dict[str, dict] = {}
+    with make_executor(min(HYDRATE_MAX_WORKERS, len(chunks)), "yt-chunks") as pool:
+        for part in pool.map(lambda c: fn(c, deadline_t, logs), chunks):
+            found.update(part)
+    return found
+
+def _merge_stats(stale: Dict[str, dict], fetched: Dict[str, dict]) -> Dict[str, dict]:
+    """Partie lente en cache + statistics fraîches. Sans stats fraîches -> absent (comme un échec API)."""
+    out: Dict[str, dict] = {}
+    for vid, it in fetched.items():
+        if vid in stale:
+            out[vid] = {**stale[vid], "statistics": it.get("statistics") or {}}
+    return out
+
+def api_videos_list(video_ids: List[str], deadline_t: float, logs: List[str]) -> Dict[str, dict]:
+    fresh, stale, misses = meta_cache().get_videos(video_ids)
+    cache_stats().incr("videos", "hit", len(fresh))
+    logs.append(f"[CACHE] videos: {len(fresh)} hits, {len(stale)} stats à rafraîchir, {len(misses)} misses")
+    found = dict(fresh)
+    found.update(_run_chunks(_videos_list_chunk, misses, deadline_t, logs))
+    found.update(_merge_stats(stale, _run_chunks(_video_stats_chunk, list(stale), deadline_t, logs)))
+    return {vid: found[vid] for vid in video_ids if vid in found}
+
+def api_refresh_video_stats(video_ids: List[str], deadline_t: float, logs: List[str]) -> Dict[str, dict]:
+    """
+    statistics fraîches de vidéos déjà connues, sans passer par le cache (rafraîchissement forcé):
+    lots de 50 IDs = 1 unité par lot; le cache (partie rapide) est mis à jour au passage.
+    """
+    ids = list(dict.fromkeys(video_ids))
+    found = _run_chunks(_video_stats_chunk, ids, deadline_t, logs)
+    logs.append(f"[INFO] stats rafraîchies: {len(found)}/{len(ids)} vidéos ({(len(ids) + 49) // 50} appels)")
+    return found
+
+def api_channels_list(channel_ids: List[str], deadline_t: float, logs: List[str]) -> Dict[str, dict]:
+    found, misses = meta_cache().get_channels(channel_ids)
+    cache_stats().incr("channels", "hit", len(found))
+    logs.append(f"[CACHE] channels: {len(found)} hits, {len(misses)} misses")
+    found.update(_run_chunks(_channels_list_chunk, misses, deadline_t, logs))
+    return {ch: found[ch] for ch in channel_ids if ch in found}
+
+class HydrateEvent(NamedTuple):
+    kind: str                # "videos" | "channels"
+    items: Dict[str, dict]   # vidéos (ordre d'arrivée) ou chaînes reçues
+    done: int                # chunks videos.list terminés
+    total: int               # chunks videos.list au total
+
+def iter_hydrate_videos_and_channels(
+    video_ids: List[str],
+    deadline_t: float,
+    logs: List[str],
+) -> Iterator[HydrateEvent]:
+    """
+    Hydratation en flux:
+    - cache disque d'abord: seuls les absents (et les stats périmées) partent à l'API
+    - plusieurs chunks videos.list en vol en même temps
+    - dès qu'un chunk vidéo revient, ses channelId partent vers le batcher channels.list
+      (lot envoyé dès 50 IDs, le reste à la fin des vidéos)
+    Produit un événement par chunk vidéo / lot de chaînes, dans le thread appelant, dès réception.
+    """
+    cache = meta_cache()
+    with span("videos.cache", cat="cache", ids=len(video_ids)) as sp:
+        fresh, stale, misses = cache.get_videos(video_ids)
+        sp.update(hits=len(fresh), stale=len(stale), misses=len(misses))
+    cache_stats().incr("videos", "hit", len(fresh))
+    logs.append(f"[CACHE] videos: {len(fresh)} hits, {len(stale)} stats à rafraîchir, {len(misses)} misses")
+
+    jobs = [(_videos_list_chunk, misses[i:i+50]) for i in range(0, len(misses), 50)]
+    stale_ids = list(stale)
+    jobs += [(_video_stats_chunk, stale_ids[i:i+50]) for i in range(0, len(stale_ids), 50)]
+
+    pending_ch: List[str] = []
+    seen_ch: Set[str] = set()
+    ch_hits = 0
+    n_videos = n_channels = 0
+    t0 = time.monotonic()
+
+    def _new_channels(items: Dict[str, dict]) -> Dict[str, dict]:
+        """Chaînes pas encore vues: en cache -> retournées, sinon -> file channels.list."""
+        nonlocal ch_hits
+        new_ch = []
+        for it in items.values():
+            ch = (it.get("snippet") or {}).get("channelId")
+            if ch and ch not in seen_ch:
+                seen_ch.add(ch)
+                new_ch.append(ch)
+        cached_ch, missing_ch = cache.get_channels(new_ch)
+        ch_hits += len(cached_ch)
+        cache_stats().incr("channels", "hit", len(cached_ch))
+        pending_ch.extend(missing_ch)
+        return cached_ch
+
+    cached_ch = _new_channels(fresh)
+    n_videos += len(fresh)
+    n_channels += len(cached_ch)
+    if fresh:
+        yield HydrateEvent("videos", fresh, 0, len(jobs))
+    if cached_ch:
+        yield HydrateEvent("channels", cached_ch, 0, len(jobs))
+
+    with make_executor(max(1, min(HYDRATE_MAX_WORKERS, len(jobs))), "yt-videos") as v_pool, \
+            make_executor(CHANNELS_MAX_WORKERS, "yt-channels") as c_pool:
+        v_futs = {v_pool.submit(fn, chunk, deadline_t, logs): fn for fn, chunk in jobs}
+        c_futs = set()
+
+        def _flush(force: bool):
+            while len(pending_ch) >= 50 or (force and pending_ch):
+                batch = pending_ch[:50]
+                del pending_ch[:50]
+                c_futs.add(c_pool.submit(_channels_list_chunk, batch, deadline_t, logs))
+
+        _flush(force=not v_futs)
+        done_n = 0
+        videos_logged = not v_futs
+        if videos_logged:
+            logs.append(f"[PERF] videos.list: 0.00s (0 appels, {n_videos} vidéos)")
+        while v_futs or c_futs:
+            done, _ = wait(set(v_futs) | c_futs, return_when=FIRST_COMPLETED)
+            for fut in done:
+                if fut in c_futs:
+                    c_futs.discard(fut)
+                    items = fut.result()
+                    n_channels += len(items)
+                    if items:
+                        yield HydrateEvent("channels", items, done_n, len(jobs))
+                    continue
+                fn = v_futs.pop(fut)
+                done_n += 1
+                items = fut.result()
+                if fn is _video_stats_chunk:
+                    items = _merge_stats(stale, items)
+                cached_ch = _new_channels(items)
+                n_videos += len(items)
+                n_channels += len(cached_ch)
+                yield HydrateEvent("videos", items, done_n, len(jobs))
+                if cached_ch:
+                    yield HydrateEvent("channels", cached_ch, done_n, len(jobs))
+            if not v_futs and not videos_logged:
+                videos_logged = True
+                logs.append(f"[PERF] videos.list: {time.monotonic() - t0:.2f}s ({len(jobs)} appels, {n_videos} vidéos)")
+            _flush(force=not v_futs)
+
+    logs.append(f"[CACHE] channels: {ch_hits} hits, {len(seen_ch) - ch_hits} misses")
+    logs.append(f"[PERF] hydratation totale: {time.monotonic() - t0:.2f}s ({n_channels} chaînes)")
+
+def api_hydrate_videos_and_channels(
+    video_ids: List[str],
+    deadline_t: float,
+    logs: List[str],
+    on_videos_chunk: Optional[Callable[[int, int], None]] = None,
+) -> Tuple[Dict[str, dict], Dict[str, dict]]:
+    """
+    Version bloquante de iter_hydrate_videos_and_channels.
+    Retourne (videos_map dans l'ordre de video_ids, channels_map).
+    on_videos_chunk(nb_terminés, nb_total) est appelé dans le thread appelant.
+    """
+    videos_found: Dict[str, dict] = {}
+    channels_map: Dict[str, dict] = {}
+    for ev in iter_hydrate_videos_and_channels(video_ids, deadline_t, logs):
+        if ev.kind == "channels":
+            channels_map.update(ev.items)
+            continue
+        videos_found.update(ev.items)
+        if on_videos_chunk and ev.done:
+            on_videos_chunk(ev.done, ev.total)
+    videos_map = {vid: videos_found[vid] for vid in video_ids if vid in videos_found}
+    return videos_map, channels_map
+
+class TTLCache:
+    """
+    Cache mémoire thread-safe: expiration par entrée (ttl) + éviction LRU au-delà de maxsize entrées
+    ou, avec sizeof, au-delà de maxbytes octets (taille approximative de chaque valeur).
+    """
+
+    def __init__(
+        self, ttl: float, maxsize: int, maxbytes: Optional[int] = None, sizeof: Optional[Callable[[object], int]] = None,
+    ):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self._sizeof = sizeof or (lambda value: 0)
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[str, Tuple[float, object, int]]" = OrderedDict()
+        self.nbytes = 0
+
+    def get(self, key: str) -> Tuple[bool, object]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return False, None
+            if time.monotonic() - entry[0] > self.ttl:
+                del self._data[key]
+                self.nbytes -= entry[2]
+                return False, None
+            self._data.move_to_end(key)
+            return True, entry[1]
+
+    def put(self, key: str, value: object):
+        size = self._sizeof(value)
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.nbytes -= old[2]
+            self._data[key] = (time.monotonic(), value, size)
+            self.nbytes += size
+            while len(self._data) > self.maxsize or (
+                self.maxbytes is not None and self.nbytes > self.maxbytes and len(self._data) > 1
+            ):
+                _, evicted = self._data.popitem(last=False)
+                self.nbytes -= evicted[2]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+@_singleton
+def comments_cache() -> TTLCache:
+    return TTLCache(COMMENTS_CACHE_TTL, COMMENTS_CACHE_MAX)
+
+def _comments_request(video_id: str) -> Callable:
+    """Requête commentThreads.list: 20 TOP = order=relevance + 20 premiers."""
+    return lambda yt: yt.commentThreads().list(
+        part="snippet",
+        videoId=video_id,
+        maxResults=20,
+        order="relevance",
+        textFormat="plainText",
+        fields="items(snippet(topLevelComment(snippet(textDisplay))))",
+    )
+
+def _comment_texts(res: dict) -> List[str]:
+    out: List[str] = []
+    for it in (res.get("items") or []):
+        sn = (((it.get("snippet") or {}).get("topLevelComment") or {}).get("snippet") or {})
+        txt = sn.get("textDisplay")
+        if txt:
+            out.append(txt)
+    return out
+
+def api_fetch_top_comments_batch(
+    video_ids: List[str],
+    deadline_t: Optional[float] = None,
+    logs: Optional[List[str]] = None,
+) -> Dict[str, List[str]]:
+    """
+    Top 20 commentaires de plusieurs vidéos: cache (COMMENTS_CACHE_TTL) par vidéo, puis les absentes
+    en 1 requête batch commentThreads.list (1 unité par vidéo).
+    Échec d'une vidéo (commentaires désactivés, erreur...) -> [] pour elle seule, non mis en cache.
+    Vidéos déjà en vol ailleurs (autre session): attendues au lieu d'être redemandées.
+    """
+    out: Dict[str, List[str]] = {}
+    with span("comments.cache", cat="comments", videos=len(video_ids)) as sp:
+        for vid in video_ids:
+            hit, cached = comments_cache().get(vid)
+            if hit:
+                out[vid] = cached
+        misses = [vid for vid in video_ids if vid not in out]
+        sp.update(cache="hit" if not misses else "miss", hits=len(out), misses=len(misses))
+    cache_stats().incr("comments", "hit", len(out))
+    if not misses:
+        return out
+
+    def _fetch(ids: List[str]) -> Dict[str, List[str]]:
+        # 💰 COÛT: CommentThreads = 1 unité par vidéo (facturé seulement pour les vidéos absentes du cache)
+        replies = api_execute_batch(
+            "commentThreads.list", {vid: _comments_request(vid) for vid in ids}, 1,
+            logs=logs, deadline_t=deadline_t, span_attrs={"videos": len(ids)},
+        )
+        got: Dict[str, List[str]] = {}
+        for vid in ids:
+            res = replies.get(vid)
+            if isinstance(res, dict):
+                got[vid] = _comment_texts(res)
+                comments_cache().put(vid, got[vid])
+        return got
+
+    found = coalesced_fetch("comments", misses, _fetch, deadline_t)
+    return {vid: out.get(vid, found.get(vid, [])) for vid in video_ids}
+
+def api_fetch_top_comments_20(video_id: str) -> List[str]:
+    """
+    20 TOP = order=relevance + 20 premiers (en cache COMMENTS_CACHE_TTL)
+    """
+    return api_fetch_top_comments_batch([video_id])[video_id]
+
+
+def iter_fetch_comments(
+    video_ids: List[str],
+    deadline_t: float,
+    logs: List[str],
+    report: Dict[str, int],
+    max_workers: int = COMMENTS_MAX_WORKERS,
+) -> Iterator[Tuple[str, List[str]]]:
+    """
+    Top commentaires pour une liste déjà triée par priorité (classement courant),
+    produits (video_id, commentaires) dans l'ordre d'arrivée.
+    - vidéos en cache d'abord (sans attendre), les autres par lots de COMMENTS_BATCH_SIZE
+      (1 requête batch par lot), lots en parallèle
+    - les lots partent dans l'ordre => les mieux classées d'abord
+    - à la deadline: ce qui n'a pas démarré est annulé, ce qui tourne est abandonné
+    report est rempli en fin de flux: {"done", "dropped"}.
+    """
+    vids = list(dict.fromkeys(video_ids))
+    report.update(done=0, dropped=0)
+    if not vids:
+        return
+
+    t0 = time.monotonic()
+    misses: List[str] = []
+    for vid in vids:
+        hit, cached = comments_cache().get(vid)
+        if hit:
+            cache_stats().incr("comments", "hit")
+            report["done"] += 1
+            yield vid, cached
+        else:
+            misses.append(vid)
+
+    def _batch(chunk: List[str]) -> Optional[Dict[str, List[str]]]:
+        if time.monotonic() > deadline_t:
+            return None
+        return api_fetch_top_comments_batch(chunk, deadline_t, logs)
+
+    chunks = [misses[i:i + COMMENTS_BATCH_SIZE] for i in range(0, len(misses), COMMENTS_BATCH_SIZE)]
+    if chunks:
+        pool = make_executor(min(max_workers, len(chunks)), "yt-comments")
+        try:
+            futs = [pool.submit(_batch, chunk) for chunk in chunks]
+            timeout = min(max(0.0, deadline_t - time.monotonic()), threading.TIMEOUT_MAX)
+            try:
+                for fut in as_completed(futs, timeout=timeout):
+                    found = fut.result() if not fut.exception() else None
+                    for vid, comms in (found or {}).items():
+                        report["done"] += 1
+                        yield vid, comms
+            except FuturesTimeoutError:
+                pass
+        finally:
+            # pas d'attente des lots encore en vol: ils finissent en tâche de fond
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    report["dropped"] = len(vids) - report["done"]
+    logs.append(
+        f"[PERF] comments: {report['done']} ok / {report['dropped']} abandonnés en {time.monotonic() - t0:.2f}s "
+        f"({len(chunks)} requêtes batch)"
+    )
+
+def api_fetch_comments_many(
+    video_ids: List[str],
+    deadline_t: float,
+    logs: List[str],
+    max_workers: int = COMMENTS_MAX_WORKERS,
+) -> Tuple[Dict[str, List[str]], Dict[str, int]]:
+    """
+    Version bloquante de iter_fetch_comments.
+    Retourne (comments_by_video pour les fetchs terminés, rapport {"done", "dropped"}).
+    """
+    report: Dict[str, int] = {}
+    out = dict(iter_fetch_comments(video_ids, deadline_t, logs, report, max_workers))
+    return out, report
+
+
+# =========================
+# FILTRAGE (passe pure + vérif langue différée)
+# =========================
+def rank_key(v: dict) -> tuple:
+    return (v["ratio"] is not None, v["ratio"] or 0, v["views"])
+
+# Tri de l'affichage (la priorité des checks langue reste rank_key)
+SORT_KEYS: Dict[str, Callable[[dict], object]] = {
+    "Ratio vues/abonnés": rank_key,
+    "Vues": lambda v: v["views"],
+    "Date": lambda v: v["published_at"],
+}
+
+def sort_results(items: List[dict], sort_by: str, position: Dict[str, int]) -> List[dict]:
+    """Ordre des IDs de recherche puis tri décroissant (stable) => départage déterministe."""
+    out = sorted(items, key=lambda c: position[c["video_id"]])
+    out.sort(key=SORT_KEYS.get(sort_by, rank_key), reverse=True)
+    return out
+
+def prefilter_video(
+    vid: str,
+    it: dict,
+    channels_map: Dict[str, dict],
+    video_sources: Dict[str, Set[str]],
+    matcher: KeywordMatcher,
+    params: dict,
+    stats: dict,
+) -> Optional[dict]:
+    """
+    Passe pure (aucune I/O): keywords, vues, durée, date + score.
+    Retourne le candidat (langue pas encore vérifiée) ou None si rejeté (compteur stats incrémenté).
+    """
+    sn = it.get("snippet") or {}
+    stt = it.get("statistics") or {}
+    cd = it.get("contentDetails") or {}
+
+    title = sn.get("title", "") or ""
+    desc = sn.get("description", "") or ""
+    tags = sn.get("tags") or []
+    combined = title if params["match_in"] == "Titre seulement" else f"{title}\n{desc}\n{' '.join(tags)}"
+
+    # keyword match (AND), parmi les mots-clés qui ont remonté la vidéo
+    matched_kws = matcher.match(combined, video_sources.get(vid) or set())
+    if not matched_kws:
+        stats["filtered_keywords"] += 1
+        return None
+
+    # views
+    try:
+        views = int(stt.get("viewCount") or 0)
+    except ValueError:
+        views = 0
+    if views < params["min_views"]:
+        stats["filtered_views"] += 1
+        return None
+
+    # duration
+    dur_s = parse_iso8601_duration_to_seconds(cd.get("duration", ""))
+    if not passes_duration(dur_s, params["min_duration"]):
+        stats["filtered_duration"] += 1
+        return None
+
+    # date
+    if params["date_limit"]:
+        published_at = rfc3339_to_dt(sn.get("publishedAt", ""))
+        if published_at and published_at < params["date_limit"]:
+            stats["filtered_date"] += 1
+            return None
+
+    # thumb
+    thumb = None
+    thumbs = (sn.get("thumbnails") or {})
+    for k in ("maxres", "standard", "high", "medium", "default"):
+        if k in thumbs and thumbs[k].get("url"):
+            thumb = thumbs[k]["url"]
+            break
+
+    cand = {
+        "video_id": vid,
+        "title": title,
+        "url": f"https://www.youtube.com/watch?v={vid}",
+        "thumbnail": thumb,
+        "channel_id": sn.get("channelId"),
+        "published_at": sn.get("publishedAt", "") or "",
+        "channel_title": sn.get("channelTitle", "") or "",
+        "views": views,
+        "subs": None,
+        "ratio": None,
+        "stars": stars_from_ratio(None),
+        "lang_reason": "",
+        "matched_kw": ", ".join(matched_kws),
+        "matched_kws": matched_kws,
+        "default_audio_language": sn.get("defaultAudioLanguage"),
+        "default_language": sn.get("defaultLanguage"),
+        # texte pour l'inférence de langue (seulement si la meta langue manque), retiré après vérif
+        "lang_text": None if (sn.get("defaultAudioLanguage") or sn.get("defaultLanguage"))
+        else f"{title}\n{desc[:1500]}\n{' '.join(tags)}",
+    }
+    apply_channel_stats(cand, channels_map)
+    return cand
+
+def apply_channel_stats(c: dict, channels_map: Dict[str, dict]):
+    """subs + ratio vues/abonnés + étoiles; chaîne pas encore chargée => N/A (recalculé à son arrivée)."""
+    subs: Optional[int] = None
+    channel_id = c["channel_id"]
+    if channel_id and channel_id in channels_map:
+        ch_stats = (channels_map[channel_id].get("statistics") or {})
+        sc = ch_stats.get("subscriberCount")
+        if sc is not None:
+            try:
+                subs = int(sc)
+            except ValueError:
+                subs = None
+
+    ratio: Optional[float] = (c["views"] / subs) if (subs and subs > 0) else None
+    c["subs"] = subs
+    c["ratio"] = ratio
+    c["stars"] = stars_from_ratio(ratio)
+
+def precheck_languages(
+    candidates: List[dict],
+    target_code: Optional[str],
+    require_proof: bool,
+    stats: dict,
+) -> Tuple[List[dict], List[dict]]:
+    """
+    Verdicts langue sans I/O (appelable chunk par chunk):
+    - meta audio/lang présente -> verdict immédiat
+    - sinon inférence sur titre + description + tags (1 appel batch), si text_lang_is_verdict:
+      une inférence faible qui rejetterait la vidéo laisse les commentaires trancher
+    Retourne (acceptés, en attente de commentaires); les rejetés sont comptés dans stats.
+    """
+    no_meta: List[dict] = []
+    if target_code is not None:
+        no_meta = [c for c in candidates if not (c["default_audio_language"] or c["default_language"])]
+
+    text_langs: Dict[str, Tuple[Optional[str], float]] = {}
+    for c, (lang, conf) in zip(no_meta, identify_languages([c["lang_text"] or "" for c in no_meta])):
+        if text_lang_is_verdict(lang, conf, target_code):
+            text_langs[c["video_id"]] = (lang, conf)
+    stats["lang_from_text"] += len(text_langs)
+
+    waiting = {c["video_id"] for c in no_meta if c["video_id"] not in text_langs}
+    accepted: List[dict] = []
+    pending: List[dict] = []
+    for c in candidates:
+        vid = c["video_id"]
+        if vid in waiting:
+            pending.append(c)
+            continue
+        ok_lang, reason = language_ok_with_fallback(
+            target_code=target_code,
+            default_audio_language=c["default_audio_language"],
+            default_language=c["default_language"],
+            comments_text="",
+            require_proof=require_proof,
+            text_lang=text_langs.get(vid),
+        )
+        c.pop("lang_text", None)
+        if not ok_lang:
+            stats["filtered_language"] += 1
+            continue
+        c["lang_reason"] = reason
+        accepted.append(c)
+    return accepted, pending
+
+def verify_languages_by_comments(
+    pending: List[dict],
+    target_code: Optional[str],
+    require_proof: bool,
+    deadline_t: float,
+    logs: List[str],
+    stats: dict,
+    comments_by_video: Dict[str, List[str]],
+    allow_fetch: bool = True,
+) -> List[dict]:
+    """
+    Candidats sans verdict après precheck_languages: commentaires déjà dans comments_by_video,
+    sinon fetch en parallèle (les mieux classés d'abord, max MAX_LANG_COMMENT_CHECKS), puis règle de preuve.
+    allow_fetch=False: seulement les commentaires déjà connus (0 appel API).
+    Retourne les acceptés (ordre de pending).
+    """
+    fetched = {c["video_id"]: comments_by_video[c["video_id"]] for c in pending if c["video_id"] in comments_by_video}
+    need_comments = sorted((c for c in pending if c["video_id"] not in fetched), key=rank_key, reverse=True)
+    to_check = [c["video_id"] for c in need_comments[:MAX_LANG_COMMENT_CHECKS]] if allow_fetch else []
+
+    if to_check:
+        stats["lang_comment_checks"] += len(to_check)
+        found, report = api_fetch_comments_many(to_check, deadline_t, logs)
+        stats["comments_used_for_lang"] += report["done"]
+        stats["comments_skipped_deadline"] += report["dropped"]
+        comments_by_video.update(found)
+        fetched.update(found)
+
+    # 1 seul appel d'identification pour tous les textes de commentaires
+    text_by_vid = {vid: " ".join(comms)[:2000] for vid, comms in fetched.items()}
+    detected = dict(zip(text_by_vid, detect_langs_batch(list(text_by_vid.values()))))
+
+    accepted: List[dict] = []
+    for c in pending:
+        vid = c["video_id"]
+        ok_lang, reason = language_ok_with_fallback(
+            target_code=target_code,
+            default_audio_language=c["default_audio_language"],
+            default_language=c["default_language"],
+            comments_text=text_by_vid.get(vid, ""),
+            require_proof=require_proof,
+            comments_lang=detected.get(vid, (None, 0.0)),
+        )
+        c.pop("lang_text", None)
+        if not ok_lang:
+            stats["filtered_language"] += 1
+            continue
+        c["lang_reason"] = reason
+        accepted.append(c)
+    return accepted
+
+def verify_languages(
+    candidates: List[dict],
+    target_code: Optional[str],
+    require_proof: bool,
+    deadline_t: float,
+    logs: List[str],
+    stats: dict,
+    comments_by_video: Dict[str, List[str]],
+) -> List[dict]:
+    """
+    Vérif langue différée, seulement sur les survivants de la passe pure:
+    precheck_languages (0 I/O) puis commentaires pour les indécis.
+    Retourne les candidats acceptés, dans l'ordre de candidates.
+    """
+    accepted, pending = precheck_languages(candidates, target_code, require_proof, stats)
+    accepted += verify_languages_by_comments(pending, target_code, require_proof, deadline_t, logs, stats, comments_by_video)
+    order = {c["video_id"]: i for i, c in enumerate(candidates)}
+    accepted.sort(key=lambda c: order[c["video_id"]])
+    return accepted
+
+
+# =========================
+# BUILD LEFT WINDOW (ONE PROMPT + ALL COMMENTS)
+# =========================
+def build_prompt_plus_comments(
+    videos: List[dict],
+    comments_by_video: Dict[str, List[str]],
+    target_code: Optional[str],
+) -> str:
+    prompt = get_prompt_for_language(target_code)
+    labels = get_labels(target_code)
+
+    blocks: List[str] = []
+    blocks.append(prompt.strip() + "\n\n")
+
+    for idx, v in enumerate(videos, 1):
+        vid = v["video_id"]
+        blocks.append(f"================ {labels['video']} {idx} ================\n")
+        blocks.append(f"{labels['title']}: {v['title']}\n")
+        blocks.append(f"{labels['link']}:  {v['url']}\n\n")
+        blocks.append(f"{labels['comments']}:\n")
+
+        comments = comments_by_video.get(vid, [])
+        if comments:
+            for c in comments:
+                blocks.append(f"- {c.replace(chr(10), ' ').strip()}\n")
+        else:
+            blocks.append("- (aucun commentaire)\n")
+
+        blocks.append("\n")
+    return "".join(blocks).strip()
+
+
+# =========================
+# PIPELINE (sans UI)
+# =========================
+PERIOD_DAYS = {"Tout": None, "7 jours": 7, "30 jours": 30, "6 mois": 180, "1 an": 365}
+
+def date_limit_for_period(period: str) -> Optional[datetime]:
+    days = PERIOD_DAYS.get(period)
+    return now_utc() - timedelta(days=days) if days else None
+
+DEFAULT_PARAMS = {
+    "keywords": [],
+    "language": "Auto (no language filter)",
+    "require_proof": True,
+    "min_views": 0,
+    "min_duration": "Toutes",
+    "date_limit": None,
+    "pages": MAX_PAGES,
+    "per_page": 50,
+    "deadline_seconds": DEADLINE_SECONDS,  # None = pas de coupure
+    "max_display": 15,                     # None = toutes les vidéos validées
+    "sort_by": "Ratio vues/abonnés",       # clé de SORT_KEYS
+    "search_cache_ttl": SEARCH_CACHE_TTL,
+    "match_in": "Titre + Description + Tags",
+    "published_after_by_keyword": None,    # {mot-clé: datetime} -> publishedAfter de ce mot-clé (watchlist)
+}
+
+def new_run_stats() -> Dict[str, int]:
+    return {
+        "ids_found": 0,
+        "videos_meta": 0,
+        "filtered_keywords": 0,
+        "filtered_views": 0,
+        "filtered_duration": 0,
+        "filtered_date": 0,
+        "filtered_language": 0,
+        "passed_total": 0,
+        "comments_used_for_lang": 0,
+        "comments_loaded": 0,
+        "comments_skipped_deadline": 0,
+        "comments_dropped": 0,
+        "lang_comment_checks": 0,
+        "lang_from_text": 0,
+        "deadline_cut": 0,  # 1 = deadline atteinte avant la fin du filtrage (run partiel)
+    }
+
+class PipelineResult(NamedTuple):
+    results: List[dict]                      # vidéos validées, triées (sort_by)
+    display: List[dict]                      # results[:max_display]
+    comments_by_video: Dict[str, List[str]]  # top commentaires chargés (vérif langue + affichées)
+    stats: Dict[str, int]
+    api_stats: Dict[str, int]                # compteurs ApiCallStats de ce run
+    logs: List[str]
+    videos: Dict[str, dict]                  # items videos.list hydratés (ordre des IDs de recherche)
+    channels: Dict[str, dict]                # items channels.list
+    video_sources: Dict[str, List[str]]      # video_id -> mots-clés qui l'ont remontée
+    spans: Optional[List[dict]] = None       # trace du run (yt_trace: étapes, appels API, cache)
+
+class PipelineEvent(NamedTuple):
+    """
+    kind -> data:
+    - "status"   -> libellé d'étape
+    - "progress" -> 0..1
+    - "keyword"  -> (mot-clé, ids, nb_terminés)
+    - "ranking"  -> classement provisoire (top max_display des candidats déjà validés)
+    - "display"  -> classement final (vidéos affichées)
+    - "comments" -> (video_id, commentaires) pour une vidéo affichée
+    - "done"     -> PipelineResult (dernier événement)
+    """
+    kind: str
+    data: Any
+
+def iter_pipeline(params: dict, fetch_comments: bool = True) -> Iterator[PipelineEvent]:
+    """
+    Search -> hydratation -> filtre -> score -> commentaires, en flux (sans aucune dépendance UI).
+    - chaque chunk videos.list est filtré et scoré dès réception (passe pure + langue sans I/O)
+      => 1er classement provisoire dès le 1er chunk, mis à jour à chaque chunk / lot de chaînes
+    - la vérif langue par commentaires (indécis) se fait une fois l'hydratation finie
+    - commentaires des vidéos affichées produits un par un dès réception
+    Résultat final identique à la version bloquante (run_pipeline).
+    params: clés de DEFAULT_PARAMS (les absentes prennent la valeur par défaut).
+    fetch_comments=False: pas de commentaires pour les vidéos affichées (seulement ceux de la vérif langue).
+    Chaque run a son Tracer: étapes + appels API dans PipelineResult.spans.
+    """
+    tracer = Tracer()
+    return tracer.iterate(_iter_pipeline(params, fetch_comments, tracer))
+
+def _iter_pipeline(params: dict, fetch_comments: bool, tracer: Tracer) -> Iterator[PipelineEvent]:
+    params = {**DEFAULT_PARAMS, **params}
+    max_display = params["max_display"]
+
+    start_t = time.monotonic()
+    deadline_s = params["deadline_seconds"]
+    deadline_t = start_t + (deadline_s if deadline_s is not None else 10**9)
+
+    logs: List[str] = []
+    if QUOTA_TZ_FALLBACK:
+        logs.append("[WARN] fuseau America/Los_Angeles introuvable (installer tzdata): jour de quota en UTC-8 fixe, "
+                    "décalé d'1 h en heure d'été")
+    api_stats_before = api_call_stats().snapshot()
+    http_before = api_http().stats.snapshot()
+    stats = new_run_stats()
+
+    videos_map: Dict[str, dict] = {}
+    channels_map: Dict[str, dict] = {}
+    video_sources: Dict[str, Set[str]] = {}
+
+    def _result(results: List[dict], display: List[dict], comments_by_video: Dict[str, List[str]]) -> PipelineEvent:
+        key_pool().flush()
+        api_now = api_call_stats().snapshot()
+        api_run = {k: api_now[k] - api_stats_before.get(k, 0) for k in api_now}
+        for row in reuse_rows(http_stats_delta(http_before, api_http().stats.snapshot())):
+            logs.append(
+                f"[PERF] http {row['hôte']}: {row['requêtes']} requêtes, {row['connexions']} connexions ouvertes "
+                f"(réutilisation {row['réutilisation']})"
+            )
+        logs.append(f"[PERF] pipeline: {time.monotonic() - start_t:.2f}s")
+        videos = {vid: videos_map[vid] for vid in video_sources if vid in videos_map}
+        sources = {vid: sorted(kws) for vid, kws in video_sources.items()}
+        return PipelineEvent("done", PipelineResult(
+            results, display, comments_by_video, stats, api_run, logs, videos, channels_map, sources,
+            tracer.snapshot(),
+        ))
+
+    lang_cfg = LANGUAGE_CONFIG.get(params["language"], {})
+    target_code = lang_cfg.get("code")
+    rel_lang = lang_cfg.get("relevanceLanguage")
+    region = lang_cfg.get("regionCode")
+
+    kw_tokens = {kw: parse_and_tokens(kw) for kw in params["keywords"]}
+    matcher = KeywordMatcher(kw_tokens)
+    all_ids: List[str] = []
+
+    # SEARCH (mots-clés en parallèle, fusion dans l'ordre de saisie)
+    # le planner tourne dans un thread: ses callbacks remontent ici par une file
+    n_kw = len(params["keywords"])
+    events: "queue.Queue[Optional[PipelineEvent]]" = queue.Queue()
+    search_stop = threading.Event()  # générateur fermé pendant la recherche -> le planner s'arrête au tour suivant
+
+    def _on_keyword_done(kw: str, ids: List[str], done_n: int):
+        events.put(PipelineEvent("keyword", (kw, ids, done_n)))
+        events.put(PipelineEvent("progress", min(0.25, done_n / max(1, n_kw) * 0.25)))
+
+    search_t0 = time.monotonic()
+    with span("search", keywords=n_kw, pages=params["pages"]):
+        with make_executor(1, "yt-pipeline") as runner:
+            search_fut = runner.submit(
+                api_search_many,
+                keywords=params["keywords"],
+                pages=params["pages"],
+                per_page=params["per_page"],
+                relevance_language=rel_lang,
+                region_code=region,
+                published_after=params["date_limit"],
+                deadline_t=deadline_t,
+                logs=logs,
+                on_keyword_done=_on_keyword_done,
+                cache_ttl=params["search_cache_ttl"],
+                published_after_by_kw=params["published_after_by_keyword"],
+                stop=search_stop,
+            )
+            search_fut.add_done_callback(lambda _: events.put(None))
+            try:
+                while True:
+                    ev = events.get()
+                    if ev is None:
+                        break
+                    yield ev
+            except GeneratorExit:
+                search_stop.set()
+                raise
+            ids_by_kw = search_fut.result()
+    logs.append(f"[PERF] search total: {time.monotonic() - search_t0:.2f}s ({n_kw} mots-clés)")
+
+    for kw, ids in ids_by_kw.items():
+        logs.append(f"[INFO] ids '{kw}': {len(ids)}")
+        for vid in ids:
+            video_sources.setdefault(vid, set()).add(kw)
+        all_ids.extend(ids)
+
+    # UNIQUE
+    uniq_ids: List[str] = []
+    seen: Set[str] = set()
+    for vid in all_ids:
+        if vid not in seen:
+            uniq_ids.append(vid)
+            seen.add(vid)
+
+    stats["ids_found"] = len(uniq_ids)
+    if not uniq_ids:
+        stats["deadline_cut"] = int(time.monotonic() > deadline_t)
+        yield _result([], [], {})
+        return
+
+    # VIDEOS + CHANNELS META en flux, filtrage + score chunk par chunk
+    yield PipelineEvent("status", "📥 Métadonnées vidéos & chaînes...")
+    position = {vid: i for i, vid in enumerate(uniq_ids)}
+    by_channel: Dict[Optional[str], List[dict]] = {}
+    accepted: List[dict] = []  # langue validée sans I/O
+    pending: List[dict] = []   # langue à vérifier par commentaires
+    last_top: List[Tuple[str, Optional[float]]] = []
+    deadline_logged = False
+
+    def _ranked(items: List[dict]) -> List[dict]:
+        return sort_results(items, params["sort_by"], position)
+
+    with span("hydratation", ids=len(uniq_ids)):
+        for ev in iter_hydrate_videos_and_channels(uniq_ids, deadline_t, logs):
+            if ev.kind == "channels":
+                channels_map.update(ev.items)
+                for ch in ev.items:
+                    for c in by_channel.get(ch, []):
+                        apply_channel_stats(c, channels_map)
+            else:
+                stats["videos_meta"] += len(ev.items)
+                videos_map.update(ev.items)
+                with span("filtre", videos=len(ev.items)) as sp:
+                    new_cands: List[dict] = []
+                    for vid, it in ev.items.items():
+                        if time.monotonic() > deadline_t:
+                            if not deadline_logged:
+                                logs.append("[WARN] deadline pendant filtrage")
+                                deadline_logged = True
+                            break
+                        cand = prefilter_video(vid, it, channels_map, video_sources, matcher, params, stats)
+                        if cand is not None:
+                            new_cands.append(cand)
+                            by_channel.setdefault(cand["channel_id"], []).append(cand)
+                    ok, waiting = precheck_languages(new_cands, target_code, params["require_proof"], stats)
+                    accepted.extend(ok)
+                    pending.extend(waiting)
+                    sp.update(accepted=len(ok), pending=len(waiting))
+                if ev.total:
+                    yield PipelineEvent("progress", 0.25 + 0.4 * ev.done / ev.total)
+
+            top = _ranked(accepted)[:max_display] if max_display is not None else _ranked(accepted)
+            sig = [(c["video_id"], c["ratio"]) for c in top]
+            if top and sig != last_top:
+                if not last_top:
+                    logs.append(f"[PERF] 1er résultat: {time.monotonic() - start_t:.2f}s")
+                last_top = sig
+                yield PipelineEvent("ranking", top)
+    yield PipelineEvent("progress", 0.75)
+
+    # Vérif langue par commentaires pour les indécis (classement final connu)
+    yield PipelineEvent("status", "🗣️ Vérification langue...")
+    comments_by_video: Dict[str, List[str]] = {}
+    pending.sort(key=lambda c: position[c["video_id"]])
+    with span("langue (commentaires)", pending=len(pending)):
+        accepted += verify_languages_by_comments(
+            pending, target_code, params["require_proof"], deadline_t, logs, stats, comments_by_video,
+        )
+
+    # deadline passée ici = recherche, hydratation, filtrage ou vérif langue coupés: run partiel
+    stats["deadline_cut"] = int(time.monotonic() > deadline_t)
+    results = _ranked(accepted)
+    stats["passed_total"] = len(results)
+    display = results if max_display is None else results[:max_display]
+    yield PipelineEvent("display", display)
+    for v in display:
+        if v["video_id"] in comments_by_video:
+            yield PipelineEvent("comments", (v["video_id"], comments_by_video[v["video_id"]]))
+
+    # COMMENTS for displayed videos (parallèle, priorité = classement, coupé à la deadline)
+    if fetch_comments:
+        yield PipelineEvent("status", "💬 Commentaires (top)...")
+        to_fetch = [v["video_id"] for v in display if v["video_id"] not in comments_by_video]
+        comments_report: Dict[str, int] = {}
+        with span("commentaires", videos=len(to_fetch)):
+            for vid, comms in iter_fetch_comments(to_fetch, deadline_t, logs, comments_report):
+                comments_by_video[vid] = comms
+                yield PipelineEvent("comments", (vid, comms))
+        stats["comments_loaded"] += comments_report["done"]
+        stats["comments_dropped"] = comments_report["dropped"]
+        stats["comments_skipped_deadline"] += comments_report["dropped"]
+
+    yield PipelineEvent("progress", 1.0)
+    yield _result(results, display, comments_by_video)
+
+# =========================
+# RUNS STOCKÉS (re-filtrage local, 0 appel API)
+# =========================
+# Paramètres qui changent les appels API; tout le reste se ré-applique sur les données hydratées
+FETCH_PARAM_KEYS = ("keywords", "language", "pages", "per_page")
+# Filtres locaux gardés avec le run: un run partiel (coupé à la deadline) ne sert que des filtres aussi stricts
+FILTER_PARAM_KEYS = ("min_views", "min_duration", "require_proof", "match_in")
+
+def fetch_params_key(params: dict) -> str:
+    params = {**DEFAULT_PARAMS, **params}
+    raw = json.dumps([params[k] for k in FETCH_PARAM_KEYS])
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+def run_snapshot(params: dict, run: PipelineResult) -> dict:
+    """Run sérialisable en JSON (session ou disque): données hydratées + commentaires + diagnostic."""
+    params = {**DEFAULT_PARAMS, **params}
+    date_limit = params["date_limit"]
+    return {
+        "key": fetch_params_key(params),
+        "created": time.time(),
+        "date_limit": date_limit.isoformat() if date_limit else None,
+        "partial": bool(run.stats.get("deadline_cut")),
+        "filters": {k: params[k] for k in FILTER_PARAM_KEYS},
+        "videos": run.videos,
+        "channels": run.channels,
+        "video_sources": run.video_sources,
+        "comments_by_video": run.comments_by_video,
+        "stats": run.stats,
+        "api_stats": run.api_stats,
+        "logs": run.logs,
+        "spans": run.spans or [],
+    }
+
+def filters_at_least_as_strict(params: dict, stored: dict) -> bool:
+    """Toute vidéo admise par les filtres locaux de params l'était aussi par ceux de stored."""
+    return (
+        params["min_views"] >= stored["min_views"]
+        and DURATION_MIN_SECONDS.get(params["min_duration"], 0) >= DURATION_MIN_SECONDS.get(stored["min_duration"], 0)
+        and (params["require_proof"] or not stored["require_proof"])
+        and (params["match_in"] == "Titre seulement" or stored["match_in"] != "Titre seulement")
+    )
+
+def snapshot_covers(snapshot: dict, params: dict) -> bool:
+    """
+    Le run stocké peut servir ces paramètres sans API: même clé de fetch et période au moins
+    aussi stricte (publishedAfter de la recherche = jour UTC, cf. published_after_bucket).
+    Run partiel (coupé à la deadline): filtres locaux au moins aussi stricts, sinon il faut relancer
+    (les vidéos qu'un filtre plus large admettrait n'ont peut-être jamais été cherchées / hydratées).
+    """
+    params = {**DEFAULT_PARAMS, **params}
+    if snapshot.get("key") != fetch_params_key(params):
+        return False
+    if snapshot.get("partial") and not (
+        snapshot.get("filters") and filters_at_least_as_strict(params, snapshot["filters"])
+    ):
+        return False
+    if not snapshot.get("date_limit"):
+        return True
+    date_limit = params["date_limit"]
+    stored = datetime.fromisoformat(snapshot["date_limit"])
+    return date_limit is not None and published_after_bucket(date_limit) >= published_after_bucket(stored)
+
+def run_pipeline(
+    params: dict,
+    on_status: Optional[Callable[[str], None]] = None,
+    on_progress: Optional[Callable[[float], None]] = None,
+    on_keyword_done: Optional[Callable[[str, List[str], int], None]] = None,
+    fetch_comments: bool = True,
+) -> PipelineResult:
+    """
+    Version bloquante de iter_pipeline (CLI, batch).
+    Callbacks (optionnels, appelés dans le thread appelant):
+    - on_status(libellé d'étape), on_progress(0..1), on_keyword_done(mot-clé, ids, nb_terminés)
+    """
+    for ev in iter_pipeline(params, fetch_comments=fetch_comments):
+        if ev.kind == "status" and on_status:
+            on_status(ev.data)
+        elif ev.kind == "progress" and on_progress:
+            on_progress(ev.data)
+        elif ev.kind == "keyword" and on_keyword_done:
+            on_keyword_done(*ev.data)
+        elif ev.kind == "done":
+            return ev.data
+    raise RuntimeError("iter_pipeline terminé sans résultat")
@@ -0,0 +1,216 @@
+"""
+Transport HTTP partagé des clients googleapiclient (remplace httplib2, qui n'est pas thread-safe).
+
+- 1 requests.Session pour tout le process: pool de connexions keep-alive par hôte (urllib3),
+  utilisable depuis tous les threads
+- interface httplib2: request(uri, method, body, headers) -> (httplib2.Response, contenu)
+  => passé tel quel à build(http=...) et à execute(http=...) / BatchHttpRequest.execute(http=...)
+- gzip: Accept-Encoding demandé, réponse décompressée ici
+- timeouts (connexion, lecture) bornés par la deadline courante (deadline(t), portée par contextvars)
+- stats par hôte: requêtes vs connexions ouvertes (= handshakes TLS en https) -> taux de réutilisation
+- abortable(): connexions utilisées dans le bloc coupables depuis un autre thread (requête hedgée perdante)
+"""
+from __future__ import annotations
+import contextvars
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+from yt_trace import add_bytes
+
+CONNECT_TIMEOUT = 5.0    # secondes, plafond
+READ_TIMEOUT = 20.0      # secondes, plafond
+MIN_TIMEOUT = 0.5        # plancher quand la deadline est (presque) passée
+POOL_MAXSIZE = 32        # connexions gardées par hôte (>= threads qui appellent l'API en même temps)
+POOL_HOSTS = 4           # hôtes gardés dans le pool (googleapis.com, serveur batch...)
+
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("yt_http_deadline", default=None)
+_inflight: contextvars.ContextVar[Optional["InFlight"]] = contextvars.ContextVar("yt_http_inflight", default=None)
+
+
+@contextmanager
+def deadline(deadline_t: Optional[float]) -> Iterator[None]:
+    """Requêtes du bloc (et des tâches d'un TracedExecutor lancées depuis ce bloc) bornées par deadline_t."""
+    token = _deadline.set(deadline_t)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+def request_timeout() -> Tuple[float, float]:
+    """(connexion, lecture) = plafonds, réduits au temps restant avant la deadline courante."""
+    deadline_t = _deadline.get()
+    if deadline_t is None:
+        return CONNECT_TIMEOUT, READ_TIMEOUT
+    left = max(MIN_TIMEOUT, deadline_t - time.monotonic())
+    return min(CONNECT_TIMEOUT, left), min(READ_TIMEOUT, left)
+
+
+class InFlight:
+    """
+    Connexions en cours d'utilisation par les requêtes d'un bloc abortable() (thread-safe).
+    Suppose qu'une connexion est rendue au pool par le thread qui l'a prise (requests lit la réponse
+    en entier dans l'appel): c'est ce thread qui voit le bloc et la retire avant qu'elle ne resserve.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._conns: Set[object] = set()
+        self.aborted = False
+
+    def add(self, conn):
+        with self._lock:
+            self._conns.add(conn)
+            if self.aborted:
+                _shutdown(conn)
+
+    def discard(self, conn):
+        # connexion rendue au pool: plus rien à couper (elle peut servir à une autre requête)
+        with self._lock:
+            self._conns.discard(conn)
+
+    def abort(self):
+        """Coupe les connexions en cours: la requête bloquée dans le thread propriétaire échoue tout de suite."""
+        with self._lock:
+            self.aborted = True
+            for conn in self._conns:
+                _shutdown(conn)
+
+
+def _shutdown(conn):
+    sock = getattr(conn, "sock", None)
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+@contextmanager
+def abortable() -> Iterator[InFlight]:
+    """Requêtes du bloc (thread courant) coupables par InFlight.abort() depuis un autre thread."""
+    flight = InFlight()
+    token = _inflight.set(flight)
+    try:
+        yield flight
+    finally:
+        _inflight.reset(token)
+
+
+class HostStats:
+    """Compteurs par hôte (thread-safe): requêtes envoyées, connexions ouvertes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, Dict[str, int]] = {}
+
+    def incr(self, host: str, field: str):
+        with self._lock:
+            counters = self._hosts.setdefault(host, {"requests": 0, "connections": 0})
+            counters[field] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {host: dict(c) for host, c in self._hosts.items()}
+
+
+def http_stats_delta(before: Dict[str, Dict[str, int]], after: Dict[str, Dict[str, int]]) -> Dict[str, Dict[str, int]]:
+    """Compteurs d'une période (ex: 1 run) = après - avant; hôtes sans requête omis."""
+    out = {}
+    for host, c in after.items():
+        prev = before.get(host, {})
+        delta = {k: v - prev.get(k, 0) for k, v in c.items()}
+        if delta.get("requests"):
+            out[host] = delta
+    return out
+
+def reuse_rows(stats: Dict[str, Dict[str, int]]) -> list:
+    """1 ligne par hôte: requêtes, connexions ouvertes, part des requêtes sur une connexion réutilisée."""
+    rows = []
+    for host, c in sorted(stats.items()):
+        reqs, conns = c.get("requests", 0), c.get("connections", 0)
+        rows.append({
+            "hôte": host,
+            "requêtes": reqs,
+            "connexions": conns,
+            "réutilisation": f"{max(0.0, 1 - conns / reqs):.0%}" if reqs else "-",
+        })
+    return rows
+
+
+def _counting_pool(pool_cls, host_stats: HostStats):
+    """
+    Pool urllib3 qui compte chaque connexion ouverte (nouveau handshake) pour son hôte,
+    et déclare les connexions en cours au bloc abortable() de l'appelant.
+    """
+
+    class CountingPool(pool_cls):
+        def _new_conn(self):
+            host_stats.incr(f"{self.scheme}://{self.host}:{self.port}", "connections")
+            return super()._new_conn()
+
+        def _make_request(self, conn, *args, **kwargs):
+            flight = _inflight.get()
+            if flight is not None:
+                flight.add(conn)
+            return super()._make_request(conn, *args, **kwargs)
+
+        def _put_conn(self, conn):
+            # appelé sur le thread qui a pris la connexion (fin de urlopen / release_conn après lecture
+            # complète par requests): son bloc abortable() est donc celui qui l'a déclarée
+            flight = _inflight.get()
+            if flight is not None and conn is not None:
+                flight.discard(conn)
+            super()._put_conn(conn)
+
+    return CountingPool
+
+
+class PooledHttp:
+    """Objet "httplib2.Http" thread-safe adossé à une requests.Session (1 instance par process)."""
+
+    def __init__(self, pool_maxsize: int = POOL_MAXSIZE, pool_hosts: int = POOL_HOSTS):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+        self.stats = HostStats()
+        self.session = requests.Session()
+        # 0 retry ici: retries / backoff / hedge restent dans api_execute
+        adapter = HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=pool_maxsize, max_retries=0)
+        adapter.poolmanager.pool_classes_by_scheme = {
+            "http": _counting_pool(HTTPConnectionPool, self.stats),
+            "https": _counting_pool(HTTPSConnectionPool, self.stats),
+        }
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def request(self, uri, method="GET", body=None, headers=None, redirections=5, connection_type=None):
+        import httplib2
+
+        parts = urlsplit(uri)
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.stats.incr(f"{parts.scheme}://{parts.hostname}:{port}", "requests")
+        headers = {**(headers or {}), "accept-encoding": "gzip"}
+        r = self.session.request(
+            method, uri, data=body, headers=headers, timeout=request_timeout(), allow_redirects=redirections > 0,
+        )
+        content = r.content  # décompressé (gzip) par requests
+        add_bytes(len(content))  # octets de la réponse -> span de l'appel API en cours
+
+        # comme httplib2: en-têtes en minuscules, contenu déjà décodé
+        info = {k.lower(): v for k, v in r.headers.items()}
+        if "content-encoding" in info:
+            info["-content-encoding"] = info.pop("content-encoding")
+            info["content-length"] = str(len(content))
+        info["status"] = str(r.status_code)
+        resp = httplib2.Response(info)
+        resp.reason = r.reason
+        return resp, content
+
+    def close(self):
+        # clients googleapiclient fermés (Resource.close / with): le pool partagé reste ouvert
+        pass
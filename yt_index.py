@@ -0,0 +1,392 @@
+"""
+Index colonnaire en mémoire des vidéos hydratées (re-filtrage instantané, 0 appel API).
+
+- 1 ligne par vidéo, partagée par tous les runs ajoutés (session): vues, durée (s), date de
+  publication, abonnés, ratio vues/abonnés, langue résolue, texte normalisé
+- index inversé mot -> lignes (titre seul / titre + description + tags)
+- filtres de la sidebar (mots-clés, vues, durée, période, langue) = masques booléens numpy,
+  tri = argsort: quelques ms pour des milliers de vidéos
+- tout le coûteux (tokenisation, identification de langue) est fait 1 fois par vidéo à l'ajout
+
+Même sémantique que prefilter_video + precheck_languages + verify_languages_by_comments(allow_fetch=False).
+"""
+
+from __future__ import annotations
+
+import re
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from yt_engine import (
+    DEFAULT_PARAMS,
+    DURATION_MIN_SECONDS,
+    LANG_TEXT_MIN_CONFIDENCE,
+    LANG_TEXT_REJECT_CONFIDENCE,
+    LANGUAGE_CONFIG,
+    ApiCallStats,
+    PipelineResult,
+    _WORD_RE,
+    detect_langs_batch,
+    new_run_stats,
+    normalize_text,
+    parse_and_tokens,
+    parse_iso8601_duration_to_seconds,
+    rfc3339_to_dt,
+    stars_from_ratio,
+)
+from yt_langid import identify_languages
+
+TEXT_FIELDS = ("title", "full")  # match_in: "Titre seulement" / le reste
+
+
+class VideoIndex:
+    """
+    Colonnes en listes (ajout O(1)), figées en tableaux numpy au 1er filtrage qui suit un ajout.
+    Une vidéo revue dans un run plus récent garde sa ligne (stats mises à jour).
+    """
+
+    def __init__(self):
+        self.ids: List[str] = []
+        self._row: Dict[str, int] = {}
+        self._views: List[int] = []
+        self._duration: List[int] = []
+        self._published: List[float] = []      # timestamp, nan si absent
+        self._published_at: List[str] = []    # RFC 3339 brut (tri "Date" identique au pipeline)
+        self._channel: List[Optional[str]] = []
+        self._lang: List[str] = []             # code langue de base ("" = aucune preuve)
+        self._lang_reason: List[str] = []      # format de language_ok_with_fallback
+        self._lang_source: List[str] = []      # "meta" | "text" | "comments" | ""
+        # langue du texte trop incertaine pour rejeter: preuve seulement si c'est la langue cible
+        self._text_hint: List[str] = []
+        self._text_hint_reason: List[str] = []
+        self._text: Dict[str, List[str]] = {f: [] for f in TEXT_FIELDS}
+        self._postings: Dict[str, Dict[str, Set[int]]] = {f: {} for f in TEXT_FIELDS}
+        self._card: List[dict] = []            # champs d'affichage (titre, vignette, chaîne...)
+        self.channels: Dict[str, dict] = {}
+        self.comments: Dict[str, List[str]] = {}
+        # par run: lignes dans l'ordre des IDs de recherche + lignes remontées par chaque mot-clé
+        self._runs: Dict[str, Tuple[np.ndarray, Dict[str, Set[int]]]] = {}
+        self._run_tags: Dict[str, float] = {}
+        self._cols: Optional[Dict[str, np.ndarray]] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    # ---------- ajout ----------
+    def add_snapshot(self, snapshot: dict) -> bool:
+        """Indexe un run stocké (run_snapshot); False si cette version du run est déjà indexée."""
+        key = snapshot["key"]
+        if self._run_tags.get(key) == snapshot["created"]:
+            return False
+        new_rows: List[int] = []
+        rows: List[int] = []
+        for vid, it in snapshot["videos"].items():
+            row, is_new = self._upsert(vid, it)
+            rows.append(row)
+            if is_new:
+                new_rows.append(row)
+        self._infer_text_langs(new_rows)
+
+        sources: Dict[str, Set[int]] = {}
+        for vid, kws in snapshot["video_sources"].items():
+            row = self._row.get(vid)
+            if row is None:  # ID sans meta (deadline): hors index
+                continue
+            for kw in kws:
+                sources.setdefault(kw, set()).add(row)
+        self._runs[key] = (np.asarray(rows, dtype=np.int64), sources)
+        self._run_tags[key] = snapshot["created"]
+
+        self.channels.update(snapshot["channels"])
+        self.add_comments(snapshot["comments_by_video"])
+        self._cols = None
+        return True
+
+    def _upsert(self, vid: str, it: dict) -> Tuple[int, bool]:
+        sn = it.get("snippet") or {}
+        stt = it.get("statistics") or {}
+        cd = it.get("contentDetails") or {}
+        try:
+            views = int(stt.get("viewCount") or 0)
+        except ValueError:
+            views = 0
+
+        row = self._row.get(vid)
+        if row is not None:
+            self._views[row] = views
+            return row, False
+
+        row = len(self.ids)
+        self.ids.append(vid)
+        self._row[vid] = row
+        self._views.append(views)
+        self._duration.append(parse_iso8601_duration_to_seconds(cd.get("duration", "")))
+        published_at = rfc3339_to_dt(sn.get("publishedAt", ""))
+        self._published.append(published_at.timestamp() if published_at else np.nan)
+        self._published_at.append(sn.get("publishedAt", "") or "")
+        self._channel.append(sn.get("channelId"))
+
+        title = sn.get("title", "") or ""
+        desc = sn.get("description", "") or ""
+        tags = sn.get("tags") or []
+        for field, text in (("title", title), ("full", f"{title}\n{desc}\n{' '.join(tags)}")):
+            t = normalize_text(text)
+            self._text[field].append(t)
+            postings = self._postings[field]
+            for w in set(_WORD_RE.findall(t)):
+                postings.setdefault(w, set()).add(row)
+
+        # langue: meta audio puis meta lang (même priorité que language_ok_with_fallback)
+        dal = (sn.get("defaultAudioLanguage") or "").strip().lower()
+        dl = (sn.get("defaultLanguage") or "").strip().lower()
+        self._text_hint.append("")
+        self._text_hint_reason.append("")
+        if dal or dl:
+            code = dal or dl
+            self._lang.append(code.split("-")[0])
+            self._lang_reason.append(f"meta audio={dal}" if dal else f"meta lang={dl}")
+            self._lang_source.append("meta")
+            lang_text = ""
+        else:
+            self._lang.append("")
+            self._lang_reason.append("")
+            self._lang_source.append("")
+            lang_text = f"{title}\n{desc[:1500]}\n{' '.join(tags)}"
+
+        thumb = None
+        thumbs = (sn.get("thumbnails") or {})
+        for k in ("maxres", "standard", "high", "medium", "default"):
+            if k in thumbs and thumbs[k].get("url"):
+                thumb = thumbs[k]["url"]
+                break
+        self._card.append({
+            "title": title,
+            "thumbnail": thumb,
+            "channel_title": sn.get("channelTitle", "") or "",
+            "default_audio_language": sn.get("defaultAudioLanguage"),
+            "default_language": sn.get("defaultLanguage"),
+            "lang_text": lang_text,
+        })
+        return row, True
+
+    def _infer_text_langs(self, rows: List[int]):
+        """
+        Langue du titre/description/tags pour les nouvelles lignes sans meta (1 appel batch).
+        La cible n'est connue qu'au filtrage (text_lang_is_verdict): une inférence sûre tranche,
+        une inférence faible ne sert qu'à accepter la langue cible (sinon commentaires / règle de preuve).
+        """
+        rows = [r for r in rows if self._card[r]["lang_text"]]
+        for r, (lang, conf) in zip(rows, identify_languages([self._card[r]["lang_text"] for r in rows])):
+            self._card[r]["lang_text"] = ""
+            if not lang or conf < LANG_TEXT_MIN_CONFIDENCE:
+                continue
+            reason = f"texte détecté={lang} ({conf:.2f})"
+            if conf >= LANG_TEXT_REJECT_CONFIDENCE:
+                self._set_lang(r, lang, reason, "text")
+            else:
+                self._text_hint[r] = lang
+                self._text_hint_reason[r] = reason
+
+    def add_comments(self, comments_by_video: Dict[str, List[str]]):
+        """Commentaires connus; servent de preuve de langue aux lignes sans meta ni langue du texte."""
+        self.comments.update(comments_by_video)
+        rows = [
+            self._row[vid] for vid in comments_by_video
+            if vid in self._row and not self._lang_source[self._row[vid]]
+        ]
+        texts = [" ".join(self.comments[self.ids[r]])[:2000] for r in rows]
+        for r, (lang, conf) in zip(rows, detect_langs_batch(texts)):
+            if lang:
+                self._set_lang(r, lang, f"comments détecté={lang} ({conf:.2f})", "comments")
+        self._cols = None
+
+    def _set_lang(self, row: int, lang: str, reason: str, source: str):
+        self._lang[row] = lang
+        self._lang_reason[row] = reason
+        self._lang_source[row] = source
+
+    def _columns(self) -> Dict[str, np.ndarray]:
+        if self._cols is None:
+            subs = np.full(len(self.ids), np.nan)
+            for row, channel_id in enumerate(self._channel):
+                sc = ((self.channels.get(channel_id) or {}).get("statistics") or {}).get("subscriberCount")
+                if sc is not None:
+                    try:
+                        subs[row] = int(sc)
+                    except ValueError:
+                        pass
+            views = np.asarray(self._views, dtype=np.int64)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                ratio = np.where(subs > 0, views / subs, np.nan)
+            self._cols = {
+                "views": views,
+                "duration": np.asarray(self._duration, dtype=np.int64),
+                "published": np.asarray(self._published, dtype=np.float64),
+                "published_at": np.asarray(self._published_at, dtype=object),
+                "subs": subs,
+                "ratio": ratio,
+                "lang": np.asarray(self._lang, dtype=object),
+                "lang_source": np.asarray(self._lang_source, dtype=object),
+                "text_hint": np.asarray(self._text_hint, dtype=object),
+            }
+        return self._cols
+
+    # ---------- filtrage ----------
+    def _rows_mask(self, rows) -> np.ndarray:
+        mask = np.zeros(len(self.ids), dtype=bool)
+        if rows:
+            mask[np.fromiter(rows, dtype=np.int64, count=len(rows))] = True
+        return mask
+
+    def _keyword_mask(self, kw: str, field: str, scope: np.ndarray) -> np.ndarray:
+        """Lignes de scope dont le texte contient tous les tokens de kw (sémantique de KeywordMatcher)."""
+        toks = [tok for tok in parse_and_tokens(kw) if tok]
+        if not toks:  # mot-clé sans token: jamais matché
+            return np.zeros(len(self.ids), dtype=bool)
+        mask = scope.copy()
+        postings = self._postings[field]
+        slow: List[str] = []
+        for tok in toks:
+            if _WORD_RE.fullmatch(tok):
+                mask &= self._rows_mask(postings.get(tok, ()))
+            else:
+                slow.append(tok)
+        # phrases / tokens avec ponctuation: vérifiés seulement sur les lignes restantes
+        texts = self._text[field]
+        for tok in slow:
+            if " " in tok:
+                keep = [r for r in np.flatnonzero(mask) if tok in texts[r]]
+            else:
+                rx = re.compile(rf"\b{re.escape(tok)}\b")
+                keep = [r for r in np.flatnonzero(mask) if rx.search(texts[r])]
+            mask = self._rows_mask(keep)
+        return mask
+
+    def query(self, run_key: str, params: dict) -> Tuple[List[int], Dict[str, List[str]], Dict[str, int]]:
+        """
+        Filtre + tri des vidéos d'un run indexé.
+        Retourne (lignes validées triées, mots-clés matchés par vidéo validée, compteurs de rejet).
+        """
+        params = {**DEFAULT_PARAMS, **params}
+        cols = self._columns()
+        run_rows, sources = self._runs[run_key]
+        n = len(self.ids)
+        stats = new_run_stats()
+
+        in_run = np.zeros(n, dtype=bool)
+        in_run[run_rows] = True
+        field = "title" if params["match_in"] == "Titre seulement" else "full"
+        kw_masks: Dict[str, np.ndarray] = {}
+        keep = np.zeros(n, dtype=bool)
+        for kw in params["keywords"]:
+            if kw in kw_masks:
+                continue
+            kw_masks[kw] = self._keyword_mask(kw, field, in_run & self._rows_mask(sources.get(kw, ())))
+            keep |= kw_masks[kw]
+
+        # rejets comptés dans l'ordre du pipeline (1er filtre qui échoue)
+        checks = [("filtered_keywords", keep), ("filtered_views", cols["views"] >= params["min_views"])]
+        min_duration = DURATION_MIN_SECONDS.get(params["min_duration"], 0)
+        checks.append(("filtered_duration", cols["duration"] >= min_duration))
+        if params["date_limit"]:
+            limit = params["date_limit"].timestamp()
+            checks.append(("filtered_date", ~(cols["published"] < limit)))  # date absente: gardée
+        target_code = LANGUAGE_CONFIG.get(params["language"], {}).get("code")
+        if target_code is not None:
+            from_hint = cols["text_hint"] == target_code  # prioritaire sur les commentaires (cf. precheck_languages)
+            lang_ok = from_hint | (cols["lang"] == target_code)
+            if not params["require_proof"]:
+                lang_ok |= cols["lang_source"] == ""
+            checks.append(("filtered_language", lang_ok))
+        alive = in_run.copy()
+        for stat, ok in checks:
+            if stat == "filtered_language":
+                stats["lang_from_text"] = int((alive & ((cols["lang_source"] == "text") | from_hint)).sum())
+            stats[stat] = int((alive & ~ok).sum())
+            alive &= ok
+        stats["ids_found"] = stats["videos_meta"] = len(run_rows)
+
+        # tri décroissant stable, départage = ordre des IDs de recherche du run
+        rows = run_rows[alive[run_rows]]
+        pos = np.arange(len(rows))
+        sort_by = params["sort_by"]
+        if sort_by == "Vues":
+            order = np.lexsort((pos, -cols["views"][rows]))
+        elif sort_by == "Date":
+            published_at = cols["published_at"][rows]
+            rank = np.unique(published_at, return_inverse=True)[1].reshape(-1)
+            order = np.lexsort((pos, -rank))
+        else:
+            ratio = cols["ratio"][rows]
+            has_ratio = ~np.isnan(ratio)
+            order = np.lexsort((pos, -cols["views"][rows], -np.where(has_ratio, ratio, 0.0), ~has_ratio))
+        rows = rows[order].tolist()
+
+        matched = {self.ids[r]: [kw for kw, m in kw_masks.items() if m[r]] for r in rows}
+        stats["passed_total"] = len(rows)
+        return rows, matched, stats
+
+    def video(self, row: int, matched_kws: List[str], target_code: Optional[str]) -> dict:
+        """Dict vidéo au format du pipeline (cartes, prompt)."""
+        cols = self._columns()
+        vid = self.ids[row]
+        card = self._card[row]
+        subs = None if np.isnan(cols["subs"][row]) else int(cols["subs"][row])
+        ratio = None if np.isnan(cols["ratio"][row]) else float(cols["ratio"][row])
+        if target_code is None:
+            lang_reason = "langue=auto"
+        elif self._text_hint[row] == target_code:
+            lang_reason = self._text_hint_reason[row]
+        else:
+            lang_reason = self._lang_reason[row] or "aucune preuve (accepté)"
+        return {
+            "video_id": vid,
+            "title": card["title"],
+            "url": f"https://www.youtube.com/watch?v={vid}",
+            "thumbnail": card["thumbnail"],
+            "channel_id": self._channel[row],
+            "published_at": self._published_at[row],
+            "channel_title": card["channel_title"],
+            "views": self._views[row],
+            "subs": subs,
+            "ratio": ratio,
+            "stars": stars_from_ratio(ratio),
+            "lang_reason": lang_reason,
+            "matched_kw": ", ".join(matched_kws),
+            "matched_kws": matched_kws,
+            "default_audio_language": card["default_audio_language"],
+            "default_language": card["default_language"],
+        }
+
+
+def refilter_run(snapshot: dict, params: dict, index: Optional[VideoIndex] = None) -> PipelineResult:
+    """
+    Ré-applique localement filtres et affichage (mots-clés, vues, durée, date, preuve langue, tri,
+    max affiché) sur un run stocké, via l'index (indexé à la volée s'il ne l'est pas): 0 appel API.
+    """
+    params = {**DEFAULT_PARAMS, **params}
+    t0 = time.monotonic()
+    index = index if index is not None else VideoIndex()
+    index.add_snapshot(snapshot)
+    t1 = time.monotonic()
+    rows, matched, stats = index.query(snapshot["key"], params)
+    stats["ids_found"] = len(snapshot["video_sources"])
+    stats["deadline_cut"] = int(bool(snapshot.get("partial")))
+    target_code = LANGUAGE_CONFIG.get(params["language"], {}).get("code")
+    results = [index.video(r, matched[index.ids[r]], target_code) for r in rows]
+    display = results if params["max_display"] is None else results[: params["max_display"]]
+
+    comments_by_video = {vid: index.comments[vid] for vid in snapshot["videos"] if vid in index.comments}
+    stats["comments_loaded"] = sum(1 for v in results if v["video_id"] in comments_by_video)
+    logs = list(snapshot["logs"])
+    logs.append(
+        f"[CACHE] run stocké re-filtré localement en {time.monotonic() - t0:.3f}s "
+        f"(index {len(index)} vidéos, filtres {(time.monotonic() - t1) * 1000:.1f}ms, 0 appel API)"
+    )
+    api_run = {k: 0 for k in ApiCallStats.FIELDS}
+    return PipelineResult(
+        results, display, comments_by_video, stats, api_run, logs,
+        snapshot["videos"], snapshot["channels"], snapshot["video_sources"], snapshot.get("spans"),
+    )
@@ -0,0 +1,191 @@
+"""
+Identification de langue hors-ligne par n-grammes de caractères (1 à 3).
+
+- profils précalculés livrés avec le dépôt (yt_langid_profiles.json.gz): fréquences de n-grammes
+  mesurées sur Wikipédia (profils du projet langdetect, Apache 2.0), ~2000 n-grammes par langue,
+  25 langues (les 3 langues cibles + celles qu'on risque de confondre avec elles)
+- chargés 1 fois par process, en une matrice log P(n-gramme | langue)
+- un lot de textes = 1 produit creux (textes x n-grammes) . (n-grammes x langues) en numpy
+- déterministe, retourne (langue, confiance) avec confiance dans [0, 1]
+
+Licence des profils: yt_langid_profiles.NOTICE / yt_langid_profiles.LICENSE (Apache 2.0).
+Regénérer les profils (langdetect requis seulement pour ça, cf. requirements-dev.txt),
+puis mettre à jour PROFILES_SHA256 dans tests/test_langid.py:
+    python yt_langid.py --out yt_langid_profiles.json.gz
+"""
+from __future__ import annotations
+
+import argparse
+import functools
+import gzip
+import json
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+NGRAM_MAX = 3
+MIN_CHARS = 12          # en dessous: pas de verdict
+PRUNED_FLOOR = 1.0      # n-gramme absent d'un profil = PRUNED_FLOOR x le plus petit compte gardé (profils élagués)
+CONFIDENCE_TEMPERATURE = 2.0  # écart de log-vraisemblance par sqrt(n-grammes); calibré sur tests/fixtures/langid
+SCORE_BLOCK = 65536     # n-grammes notés par produit matriciel (borne la mémoire des gros lots)
+WORD_CACHE_SIZE = 50000  # mots -> n-grammes connus (LRU)
+
+PROFILES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "yt_langid_profiles.json.gz")
+PROFILE_LANGS = (
+    "ar", "ca", "cs", "da", "de", "el", "en", "es", "fi", "fr", "hi", "hu", "id",
+    "it", "nl", "no", "pl", "pt", "ro", "ru", "sv", "tl", "tr", "uk", "vi",
+)
+
+_CLEAN_RE = re.compile(r"https?://\S+|[^\w']+|[\d_]+")
+
+
+def _clean(text: str) -> str:
+    return _CLEAN_RE.sub(" ", (text or "").lower()).strip()
+
+
+def _word_ngrams(word: str) -> List[str]:
+    """n-grammes 1..NGRAM_MAX d'un mot encadré d'espaces (" le ", "le ", " l"...)."""
+    w = f" {word} "
+    return [w[i:i + n] for n in range(1, NGRAM_MAX + 1) for i in range(len(w) - n + 1) if n > 1 or w[i] != " "]
+
+
+class NgramLanguageIdentifier:
+    """
+    Naive Bayes sur n-grammes de caractères.
+    logp[index[gramme], j] = log P(gramme | self.langs[j]) parmi les n-grammes du même ordre;
+    un n-gramme absent de tous les profils n'apporte rien (ignoré).
+    """
+
+    def __init__(self, profiles: Dict[str, dict]):
+        self.langs: List[str] = sorted(profiles)
+        vocab = sorted(set().union(*(p["freq"] for p in profiles.values())))
+        self.index: Dict[str, int] = {g: i for i, g in enumerate(vocab)}
+        order = np.array([len(g) for g in vocab]) - 1
+        self.logp = np.empty((len(vocab), len(self.langs)), dtype=np.float64)
+        # mot -> colonnes de ses n-grammes connus (les mots reviennent d'un titre / commentaire à l'autre)
+        self._word_cols = functools.lru_cache(maxsize=WORD_CACHE_SIZE)(self._known_cols)
+        for j, lang in enumerate(self.langs):
+            freq = profiles[lang]["freq"]
+            own = np.fromiter((self.index[g] for g in freq), dtype=np.int64, count=len(freq))
+            counts = np.zeros(len(vocab), dtype=np.float64)
+            counts[own] = np.fromiter(freq.values(), dtype=np.float64, count=len(freq))
+            floor = np.ones(NGRAM_MAX)
+            for n in range(NGRAM_MAX):
+                kept = counts[own][order[own] == n]
+                if kept.size:
+                    floor[n] = PRUNED_FLOOR * kept.min()
+            n_words = np.array(profiles[lang]["n_words"], dtype=np.float64)
+            self.logp[:, j] = np.log((counts + floor[order]) / n_words[order])
+
+    def _known_cols(self, word: str) -> Tuple[int, ...]:
+        index = self.index
+        return tuple(index[g] for g in _word_ngrams(word) if g in index)
+
+    def identify_batch(self, texts: Sequence[str]) -> List[Tuple[Optional[str], float]]:
+        """[(langue | None, confiance)] dans l'ordre des textes."""
+        out: List[Tuple[Optional[str], float]] = [(None, 0.0)] * len(texts)
+        rows: List[int] = []     # textes notés
+        starts: List[int] = []   # 1re colonne de chaque texte noté dans cols
+        cols: List[int] = []     # n-grammes connus, 1 entrée par occurrence
+        for i, text in enumerate(texts):
+            cleaned = _clean(text)
+            if len(cleaned) < MIN_CHARS:
+                continue
+            start = len(cols)
+            for word in cleaned.split():
+                cols.extend(self._word_cols(word))
+            if len(cols) == start:
+                continue
+            rows.append(i)
+            starts.append(start)
+            if len(cols) >= SCORE_BLOCK:
+                self._score(rows, starts, cols, out)
+                rows, starts, cols = [], [], []
+        if rows:
+            self._score(rows, starts, cols, out)
+        return out
+
+    def _score(self, rows: List[int], starts: List[int], cols: List[int], out: List[Tuple[Optional[str], float]]):
+        """scores[t, j] = somme des log P(n-gramme | langue j) des n-grammes du texte t (segments de cols)."""
+        scores = np.add.reduceat(self.logp[cols], starts, axis=0)  # textes x langues
+        n_grams = np.diff(np.append(starts, len(cols)))
+        best = scores.argmax(axis=1)  # égalité -> ordre alphabétique des langues
+        # postérieur tempéré: évite des confiances de 1.0 sur 3 mots
+        z = (scores - scores[np.arange(len(rows)), best][:, None]) * (CONFIDENCE_TEMPERATURE / np.sqrt(n_grams))[:, None]
+        conf = 1.0 / np.exp(z).sum(axis=1)  # exp(0) = 1 pour la meilleure langue
+        for i, j, c in zip(rows, best.tolist(), conf.tolist()):
+            out[i] = (self.langs[j], c)
+
+    def identify(self, text: str) -> Tuple[Optional[str], float]:
+        return self.identify_batch([text])[0]
+
+
+def load_profiles(path: str = PROFILES_PATH) -> Dict[str, dict]:
+    """{langue: {"n_words": [n 1-grammes, 2-grammes, 3-grammes], "freq": {n-gramme: compte}}}"""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return json.load(f)["profiles"]
+
+
+_identifier: Optional[NgramLanguageIdentifier] = None
+_identifier_lock = threading.Lock()
+
+
+def get_identifier() -> NgramLanguageIdentifier:
+    """Profils chargés une seule fois par process (thread-safe)."""
+    global _identifier
+    if _identifier is None:
+        with _identifier_lock:
+            if _identifier is None:
+                _identifier = NgramLanguageIdentifier(load_profiles())
+    return _identifier
+
+
+def identify_languages(texts: Sequence[str]) -> List[Tuple[Optional[str], float]]:
+    return get_identifier().identify_batch(texts)
+
+
+# =========================
+# CONSTRUCTION DES PROFILS
+# =========================
+def build_profiles(langs: Sequence[str] = PROFILE_LANGS) -> Dict[str, dict]:
+    """
+    Profils du paquet langdetect (n-grammes 1..3 comptés sur Wikipédia, déjà élagués),
+    ramenés aux conventions de _word_ngrams: minuscules (comptes fusionnés), mêmes n-grammes.
+    """
+    import langdetect  # dépendance de construction seulement
+
+    src = os.path.join(os.path.dirname(langdetect.__file__), "profiles")
+    profiles: Dict[str, dict] = {}
+    for lang in langs:
+        with open(os.path.join(src, lang), encoding="utf-8") as f:
+            raw = json.load(f)
+        freq: Dict[str, int] = {}
+        for g, c in raw["freq"].items():
+            g = g.lower()
+            if len(g) > NGRAM_MAX:  # ex: "İ".lower() = 2 caractères
+                continue
+            freq[g] = freq.get(g, 0) + c
+        profiles[lang] = {"n_words": raw["n_words"], "freq": dict(sorted(freq.items()))}
+    return profiles
+
+
+def main():
+    p = argparse.ArgumentParser(description="Regénère les profils de langue livrés avec yt_langid")
+    p.add_argument("--out", default=PROFILES_PATH)
+    p.add_argument("--langs", default=",".join(PROFILE_LANGS))
+    args = p.parse_args()
+
+    profiles = build_profiles(args.langs.split(","))
+    data = {"source": "langdetect profiles (Wikipedia, Apache 2.0)", "profiles": profiles}
+    # mtime=0: fichier identique d'une génération à l'autre
+    with open(args.out, "wb") as raw, gzip.GzipFile(filename="", fileobj=raw, mode="wb", mtime=0) as gz:
+        gz.write(json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+    n_grams = sum(len(pr["freq"]) for pr in profiles.values())
+    print(f"{args.out}: {len(profiles)} langues, {n_grams} n-grammes, {os.path.getsize(args.out)} octets")
+
+
+if __name__ == "__main__":
+    main()
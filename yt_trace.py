@@ -0,0 +1,181 @@
+"""
+Spans structurés du pipeline (étapes, appels API, cache) pour le Diagnostic et l'analyse hors ligne.
+
+- span(name, cat, **attrs): début/fin (s depuis le début du run), thread, parent, attributs
+  (endpoint, taille de chunk, octets, cache hit/miss, retries...)
+- tracer et span parent portés par contextvars; TracedExecutor copie le contexte à chaque submit
+  => un appel API fait dans un thread de pool est rattaché au span qui l'a lancé
+- sans Tracer actif, span() ne coûte qu'une lecture de ContextVar
+- export Chrome trace (chrome://tracing, Perfetto) et résumé p50/p95 par endpoint
+
+Pas de dépendance (importable partout).
+"""
+from __future__ import annotations
+import contextvars
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+_tracer: contextvars.ContextVar[Optional["Tracer"]] = contextvars.ContextVar("yt_tracer", default=None)
+_current: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar("yt_span", default=None)
+
+
+class Tracer:
+    """Spans terminés d'un run (liste de dicts sérialisables en JSON)."""
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.spans: List[dict] = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def iterate(self, gen: Iterator[T]) -> Iterator[T]:
+        """
+        gen avancé pas à pas dans sa propre copie de contexte, où ce tracer est actif (et dans les tâches
+        soumises à un TracedExecutor depuis gen): tracer et spans ouverts ne fuient jamais dans le
+        contexte du consommateur entre deux yields; fermeture (close) dans ce même contexte.
+        """
+        ctx = contextvars.copy_context()
+        ctx.run(_tracer.set, self)
+        try:
+            while True:
+                try:
+                    item = ctx.run(next, gen)
+                except StopIteration:
+                    return
+                yield item
+        finally:
+            ctx.run(gen.close)
+
+    def now(self) -> float:
+        return time.perf_counter() - self.t0
+
+    def snapshot(self) -> List[dict]:
+        with self._lock:
+            return sorted(self.spans, key=lambda s: s["start"])
+
+    def _add(self, record: dict):
+        with self._lock:
+            self.spans.append(record)
+
+
+@contextmanager
+def span(name: str, cat: str = "stage", **attrs) -> Iterator[dict]:
+    """
+    Mesure le bloc; le dict produit reçoit les attributs connus en cours de route
+    (ex: attrs["cache"] = "hit"). Une exception est notée dans attrs["error"] puis propagée.
+    """
+    tracer = _tracer.get()
+    if tracer is None:
+        yield attrs
+        return
+    parent = _current.get()
+    record = {
+        "id": next(tracer._ids),
+        "parent": parent["id"] if parent else None,
+        "name": name,
+        "cat": cat,
+        "thread": threading.current_thread().name,
+        "start": tracer.now(),
+        "end": None,
+        "attrs": attrs,
+    }
+    token = _current.set(record)
+    try:
+        yield attrs
+    except BaseException as ex:
+        attrs.setdefault("error", type(ex).__name__)
+        raise
+    finally:
+        record["end"] = tracer.now()
+        _current.reset(token)
+        tracer._add(record)
+
+
+def annotate(**attrs):
+    """Attributs ajoutés au span courant (s'il y en a un)."""
+    record = _current.get()
+    if record is not None:
+        record["attrs"].update(attrs)
+
+def add_bytes(n: int):
+    """Octets reçus, imputés au span courant (appel API en cours)."""
+    record = _current.get()
+    if record is not None:
+        record["attrs"]["bytes"] = record["attrs"].get("bytes", 0) + n
+
+
+class TracedExecutor(ThreadPoolExecutor):
+    """ThreadPoolExecutor dont les tâches tournent dans une copie du contexte de l'appelant."""
+
+    def submit(self, fn, /, *args, **kwargs):
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+# =========================
+# ANALYSE / EXPORT
+# =========================
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[idx]
+
+def span_summary(spans: List[dict]) -> List[dict]:
+    """
+    1 ligne par (catégorie, nom): nombre, p50 / p95 / max / total (ms), octets, retries, erreurs,
+    cache hit/miss. Appels API d'abord, puis étapes, puis le reste.
+    """
+    groups: Dict[tuple, List[dict]] = {}
+    for s in spans:
+        if s.get("end") is not None:
+            groups.setdefault((s["cat"], s["name"]), []).append(s)
+    order = {"api": 0, "stage": 1}
+    rows: List[dict] = []
+    for (cat, name), items in sorted(groups.items(), key=lambda kv: (order.get(kv[0][0], 2), kv[0][1])):
+        ms = sorted((s["end"] - s["start"]) * 1000 for s in items)
+        attrs = [s["attrs"] for s in items]
+        rows.append({
+            "cat": cat,
+            "name": name,
+            "count": len(items),
+            "p50_ms": round(_percentile(ms, 0.5), 1),
+            "p95_ms": round(_percentile(ms, 0.95), 1),
+            "max_ms": round(ms[-1], 1),
+            "total_ms": round(sum(ms), 1),
+            "bytes": sum(a.get("bytes", 0) for a in attrs),
+            "retries": sum(a.get("retries", 0) for a in attrs),
+            "errors": sum(1 for a in attrs if a.get("error")),
+            "cache_hits": sum(1 for a in attrs if a.get("cache") == "hit"),
+            "cache_misses": sum(1 for a in attrs if a.get("cache") == "miss"),
+        })
+    return rows
+
+def chrome_trace(spans: List[dict]) -> dict:
+    """Format Chrome trace ("X" = événement complet, µs); 1 ligne (tid) par thread."""
+    tids: Dict[str, int] = {}
+    events: List[dict] = []
+    for s in spans:
+        if s.get("end") is None:
+            continue
+        tid = tids.setdefault(s["thread"], len(tids) + 1)
+        events.append({
+            "name": s["name"],
+            "cat": s["cat"],
+            "ph": "X",
+            "ts": round(s["start"] * 1e6),
+            "dur": round((s["end"] - s["start"]) * 1e6),
+            "pid": 1,
+            "tid": tid,
+            "args": {**s["attrs"], "span_id": s["id"], "parent": s["parent"]},
+        })
+    events += [
+        {"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": thread}}
+        for thread, tid in tids.items()
+    ]
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
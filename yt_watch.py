@@ -0,0 +1,156 @@
+"""
+Watchlists: mêmes lignes de mots-clés relancées toutes les quelques heures, en incrémental.
+
+- créée depuis un run complet: par mot-clé, watermark = publishedAt le plus récent vu,
+  + vues de chaque vidéo classée (référence pour "en hausse")
+- rafraîchissement, toujours sur la Data API (yt-dlp ne sait appliquer ni publishedAfter ni le tri par date):
+  1) search.list 1 page par mot-clé, publishedAfter = son watermark exact (tri par date, pas de cache de pages):
+     seules les nouveautés sont hydratées / filtrées par le pipeline habituel
+  2) vues des IDs déjà classés: videos.list statistics seulement, lots de 50 (1 unité par lot)
+  3) diff: nouvelles vidéos validées + vidéos connues dont les vues montent vite
+  => ~100 unités par mot-clé + quelques unités, au lieu de toutes les pages à chaque fois
+     (la page search.list reste payée plein tarif, même sans aucune nouveauté)
+Stockage: table watchlists du cache SQLite (partagé app / CLI, survit aux redémarrages).
+"""
+from __future__ import annotations
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+from yt_engine import (
+    DEADLINE_SECONDS,
+    DEFAULT_PARAMS,
+    PipelineResult,
+    api_refresh_video_stats,
+    meta_cache,
+    pinned_backend,
+    quota_scope,
+    rfc3339_to_dt,
+    run_pipeline,
+)
+
+# Paramètres gardés avec la watchlist (filtres + affichage; les pages / périodes sont remplacées)
+WATCH_PARAM_KEYS = ("keywords", "language", "require_proof", "min_views", "min_duration", "per_page", "sort_by", "match_in")
+WATCH_PAGES = 1                 # pages search.list par mot-clé et par rafraîchissement
+WATCH_SEARCH_PAGE_UNITS = 100   # coût d'une page search.list, nouveautés ou non
+WATCH_RISING_MIN_GROWTH = 0.2   # "en hausse" = +20% de vues depuis le dernier rafraîchissement...
+WATCH_RISING_MIN_DELTA = 1000   # ... et au moins +1000 vues
+
+
+class WatchDiff(NamedTuple):
+    new: List[dict]        # vidéos validées jamais classées (ordre du tri de la watchlist)
+    rising: List[dict]     # vidéos connues, vues en forte hausse (delta décroissant)
+    refreshed: int         # vidéos connues dont les vues ont été relues
+    units: int             # unités de quota consommées par ce rafraîchissement (pas les autres sessions)
+    units_by_endpoint: Dict[str, int]
+    run: PipelineResult    # run incrémental (logs, stats, trace)
+
+
+def _video_entry(v: dict, keywords: List[str]) -> dict:
+    return {
+        "title": v["title"],
+        "url": v["url"],
+        "channel_title": v["channel_title"],
+        "published_at": v["published_at"],
+        "views": v["views"],
+        "keywords": keywords,
+    }
+
+def _keywords_of(vid: str, run: PipelineResult, v: dict) -> List[str]:
+    return list(run.video_sources.get(vid) or v.get("matched_kws") or [])
+
+def _merge_run(watchlist: dict, run: PipelineResult) -> List[dict]:
+    """Watermarks et vues de référence mis à jour avec un run; retourne les nouvelles vidéos validées."""
+    for vid, item in run.videos.items():
+        published = (item.get("snippet") or {}).get("publishedAt") or ""
+        for kw in run.video_sources.get(vid) or []:
+            state = watchlist["keywords"].get(kw)
+            if state is not None and published > (state["watermark"] or ""):
+                state["watermark"] = published  # RFC 3339 UTC ("...Z"): ordre lexical = ordre chronologique
+
+    new: List[dict] = []
+    for v in run.results:
+        vid = v["video_id"]
+        kws = _keywords_of(vid, run, v)
+        if vid not in watchlist["videos"]:
+            new.append({**v, "keywords": kws})
+        watchlist["videos"][vid] = _video_entry(v, kws)
+    return new
+
+def new_watchlist(name: str, params: dict, run: PipelineResult) -> dict:
+    """Watchlist sérialisable en JSON, initialisée avec un run complet (référence des vues = ce run)."""
+    params = {**DEFAULT_PARAMS, **params}
+    watchlist = {
+        "name": name,
+        "params": {k: params[k] for k in WATCH_PARAM_KEYS},
+        "created": time.time(),
+        "refreshed": time.time(),
+        "keywords": {kw: {"watermark": ""} for kw in params["keywords"]},
+        "videos": {},
+    }
+    _merge_run(watchlist, run)
+    return watchlist
+
+def save_watchlist(watchlist: dict):
+    meta_cache().put_watchlist(watchlist["name"], watchlist)
+
+def load_watchlist(name: str) -> Optional[dict]:
+    return meta_cache().get_watchlist(name)
+
+def refresh_watchlist(watchlist: dict, deadline_seconds: Optional[float] = DEADLINE_SECONDS) -> WatchDiff:
+    """
+    Rafraîchissement incrémental (watchlist modifiée sur place, à sauvegarder avec save_watchlist).
+    Un mot-clé sans watermark (aucune vidéo vue) repart d'une recherche sans publishedAfter.
+    Quota épuisé: pages / stats non obtenues (loguées), pas de repli sur yt-dlp.
+    """
+    t0 = time.monotonic()
+    deadline_t = t0 + (deadline_seconds if deadline_seconds is not None else 10**9)
+
+    watermarks = {
+        kw: rfc3339_to_dt(state["watermark"])
+        for kw, state in watchlist["keywords"].items() if state["watermark"]
+    }
+    params = {
+        **watchlist["params"],
+        "keywords": list(watchlist["keywords"]),
+        "pages": WATCH_PAGES,
+        "search_cache_ttl": 0,   # les nouveautés ne sont jamais dans le cache
+        "date_limit": None,
+        "published_after_by_keyword": watermarks,
+        "max_display": None,
+        "deadline_seconds": deadline_seconds,
+    }
+    with pinned_backend("api"), quota_scope() as scope:
+        run = run_pipeline(params, fetch_comments=False)
+
+        # vues des vidéos déjà classées (celles revues par la recherche ont déjà des stats fraîches)
+        known = [vid for vid in watchlist["videos"] if vid not in run.videos]
+        stats = api_refresh_video_stats(known, deadline_t, run.logs)
+    hours = max(1e-6, (time.time() - watchlist["refreshed"]) / 3600)
+    views_now = {vid: int((it.get("statistics") or {}).get("viewCount") or 0) for vid, it in stats.items()}
+    views_now.update({v["video_id"]: v["views"] for v in run.results})
+
+    rising: List[dict] = []
+    for vid, entry in watchlist["videos"].items():
+        if vid not in views_now:
+            continue
+        before, after = entry["views"], views_now[vid]
+        delta = after - before
+        growth = delta / max(1, before)
+        if delta >= WATCH_RISING_MIN_DELTA and growth >= WATCH_RISING_MIN_GROWTH:
+            rising.append({
+                "video_id": vid, **entry, "views_before": before, "views": after,
+                "delta": delta, "growth": growth, "per_hour": delta / hours,
+            })
+        entry["views"] = after
+    rising.sort(key=lambda r: -r["delta"])
+
+    new = _merge_run(watchlist, run)
+    watchlist["refreshed"] = time.time()
+    units, by_endpoint = scope.total(), scope.by_endpoint()
+    run.logs.append(
+        f"[PERF] watchlist '{watchlist['name']}': {len(new)} nouvelles, {len(rising)} en hausse, "
+        f"{len(stats)} vues relues, {units} unités ("
+        + ", ".join(f"{ep} {u}" for ep, u in sorted(by_endpoint.items()))
+        + f") en {time.monotonic() - t0:.2f}s"
+    )
+    return WatchDiff(new, rising, len(stats), units, by_endpoint, run)
@@ -0,0 +1,235 @@
+"""
+Extracteur yt-dlp (0 unité de quota): recherche et métadonnées vidéo au format Data API v3.
+
+- search(q, n): IDs de "ytsearchN:q" (ou de l'URL de résultats triée par date), entrées lues à la demande
+- video(id): page de la vidéo -> item videos.list (snippet / statistics / contentDetails)
+  + item channels.list (abonnés) quand la page le donne
+- 1 YoutubeDL par thread (pas thread-safe); yt_dlp n'est importé qu'au 1er appel
+
+Fixtures (tests hors ligne): fixtures_dir = sorties brutes d'extract_info enregistrées (sanitize_info,
+allégées des clés volumineuses), rejouées sans réseau; record=True enregistre les extractions réelles
+dans ce dossier. Live et replay passent par le même code (IDs des entrées, vignette, langue audio).
+Réglages par environnement: YT_RESEARCH_YTDLP_FIXTURES=<dossier>, YT_RESEARCH_YTDLP_RECORD=1.
+Fixtures des tests: tests/fixtures/ytdlp (requête "trump epstein", rejouée par tests/test_ytdlp.py).
+"""
+from __future__ import annotations
+import hashlib
+import importlib.util
+import itertools
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote_plus
+
+# Champs rendus par video() (tout ce que normalize_video / normalize_channel lisent)
+VIDEO_FIELDS = (
+    "id", "title", "description", "tags", "channel_id", "channel", "uploader", "upload_date", "timestamp",
+    "view_count", "duration", "thumbnail", "channel_follower_count", "language",
+)
+# Enregistrement: clés volumineuses retirées, formats réduits à ce qui sert à déduire la langue audio
+RECORD_DROP_KEYS = (
+    "automatic_captions", "subtitles", "heatmap", "chapters", "requested_formats", "_format_sort_fields",
+)
+RECORD_FORMAT_FIELDS = ("format_id", "acodec", "vcodec", "language", "language_preference")
+# yt-dlp n'a plus de préfixe "ytsearchdate": tri par date = URL de résultats (sp = date + vidéos seulement)
+SEARCH_BY_DATE_URL = "https://www.youtube.com/results?search_query={query}&sp=CAISAhAB"
+SEARCH_CACHE_MAX = 256  # listes de recherche gardées en mémoire (pages suivantes sans nouvel appel)
+
+
+class ExtractorError(RuntimeError):
+    pass
+
+
+def ytdlp_installed() -> bool:
+    return importlib.util.find_spec("yt_dlp") is not None
+
+
+def seconds_to_iso8601(seconds: Optional[float]) -> str:
+    s = int(seconds or 0)
+    return f"PT{s // 3600}H{s % 3600 // 60}M{s % 60}S"
+
+
+def _published_at(info: dict) -> str:
+    if info.get("timestamp"):
+        dt = datetime.fromtimestamp(int(info["timestamp"]), tz=timezone.utc)
+    elif info.get("upload_date"):
+        dt = datetime.strptime(str(info["upload_date"]), "%Y%m%d").replace(tzinfo=timezone.utc)
+    else:
+        return ""
+    return dt.isoformat().replace("+00:00", "Z")
+
+
+def normalize_video(info: dict) -> dict:
+    """Info yt-dlp -> item videos.list (mêmes clés que VIDEOS_FULL_FIELDS)."""
+    snippet = {
+        "title": info.get("title") or "",
+        "description": info.get("description") or "",
+        "tags": list(info.get("tags") or []),
+        "channelId": info.get("channel_id"),
+        "channelTitle": info.get("channel") or info.get("uploader") or "",
+        "publishedAt": _published_at(info),
+    }
+    if info.get("thumbnail"):
+        snippet["thumbnails"] = {"high": {"url": info["thumbnail"]}}
+    if info.get("language"):
+        snippet["defaultAudioLanguage"] = info["language"]
+    return {
+        "id": info["id"],
+        "snippet": snippet,
+        "statistics": {"viewCount": str(int(info.get("view_count") or 0))},
+        "contentDetails": {"duration": seconds_to_iso8601(info.get("duration"))},
+    }
+
+
+def normalize_channel(info: dict) -> Optional[dict]:
+    """Info yt-dlp -> item channels.list, None si la page ne donne pas les abonnés."""
+    if not info.get("channel_id") or info.get("channel_follower_count") is None:
+        return None
+    return {"id": info["channel_id"], "statistics": {"subscriberCount": str(int(info["channel_follower_count"]))}}
+
+
+def audio_language(formats: Optional[list]) -> Optional[str]:
+    """Langue de la piste audio préférée (language_preference la plus haute), None si aucune n'est déclarée."""
+    tracks = [f for f in formats or () if f.get("language") and f.get("acodec") not in (None, "none")]
+    if not tracks:
+        return None
+    best = max(tracks, key=lambda f: -1 if f.get("language_preference") is None else f["language_preference"])
+    return best["language"]
+
+
+def reduce_video_info(info: dict) -> dict:
+    """Info brute de la page vidéo -> champs VIDEO_FIELDS (vignette et langue déduites si absentes)."""
+    info = dict(info)
+    if not info.get("thumbnail") and info.get("thumbnails"):  # info non "processée": liste seulement
+        info["thumbnail"] = (info["thumbnails"][-1] or {}).get("url")
+    if not info.get("language"):
+        info["language"] = audio_language(info.get("formats"))
+    return {k: info.get(k) for k in VIDEO_FIELDS if info.get(k) is not None}
+
+
+def search_entry_ids(info: dict) -> List[str]:
+    return [e["id"] for e in (info.get("entries") or []) if e and e.get("id")]
+
+
+def recorded_info(info: dict) -> dict:
+    """Info sanitize_info -> fixture: clés volumineuses retirées, formats réduits à RECORD_FORMAT_FIELDS."""
+    out = {k: v for k, v in info.items() if k not in RECORD_DROP_KEYS}
+    if out.get("formats"):
+        out["formats"] = [{k: f[k] for k in RECORD_FORMAT_FIELDS if k in f} for f in out["formats"]]
+    return out
+
+
+class YtDlpExtractor:
+    """Thread-safe; les listes de recherche déjà obtenues servent les pages suivantes."""
+
+    def __init__(self, fixtures_dir: Optional[str] = None, record: bool = False, socket_timeout: float = 10.0):
+        self.fixtures_dir = fixtures_dir
+        self.record = record
+        self.socket_timeout = socket_timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._searches: Dict[str, Tuple[List[str], bool]] = {}  # spec -> (ids, liste complète)
+
+    @classmethod
+    def from_env(cls) -> "YtDlpExtractor":
+        return cls(
+            fixtures_dir=os.environ.get("YT_RESEARCH_YTDLP_FIXTURES") or None,
+            record=os.environ.get("YT_RESEARCH_YTDLP_RECORD") == "1",
+        )
+
+    @property
+    def replay(self) -> bool:
+        return bool(self.fixtures_dir) and not self.record
+
+    def available(self) -> bool:
+        return self.replay or ytdlp_installed()
+
+    # ---------- API ----------
+    def search(self, query: str, count: int, by_date: bool = False, prefetch: int = 0) -> List[str]:
+        """
+        Les count premiers IDs (moins si la recherche n'en a pas autant).
+        yt-dlp repart toujours du 1er résultat: la 1re extraction va jusqu'à max(count, prefetch)
+        résultats et les pages suivantes sont découpées dans cette liste (1 extraction par requête).
+        """
+        spec = f"ytsearch{'date' if by_date else ''}:{query}"
+        with self._lock:
+            ids, complete = self._searches.get(spec, ([], False))
+        if len(ids) >= count or complete:
+            return ids[:count]
+
+        if self.replay:
+            ids, complete = search_entry_ids(self._load("search", spec)), True  # enregistrement = tout pour le replay
+        else:
+            want = max(count, prefetch, 2 * len(ids))  # au-delà du prefetch: fenêtre doublée
+            url = SEARCH_BY_DATE_URL.format(query=quote_plus(query)) if by_date else f"ytsearch{want}:{query}"
+            info = self._extract(url, limit=want)
+            ids = search_entry_ids(info)
+            complete = len(ids) < want
+            if self.record:
+                self._save("search", spec, recorded_info(self._ydl().sanitize_info(info)))
+        with self._lock:
+            if len(self._searches) >= SEARCH_CACHE_MAX:
+                self._searches.pop(next(iter(self._searches)))
+            self._searches[spec] = (ids, complete)
+        return ids[:count]
+
+    def video(self, video_id: str) -> Optional[dict]:
+        """Info réduite à VIDEO_FIELDS; None si la vidéo est indisponible (privée, supprimée...)."""
+        try:
+            if self.replay:
+                info = self._load("video", video_id)
+            else:
+                info = self._extract(f"https://www.youtube.com/watch?v={video_id}")
+        except ExtractorError:
+            return None
+        if self.record:
+            self._save("video", video_id, recorded_info(self._ydl().sanitize_info(info)))
+        return reduce_video_info(info)
+
+    # ---------- yt-dlp ----------
+    def _ydl(self):
+        ydl = getattr(self._local, "ydl", None)
+        if ydl is None:
+            from yt_dlp import YoutubeDL
+
+            opts = {
+                "quiet": True,
+                "no_warnings": True,
+                "skip_download": True,
+                "socket_timeout": self.socket_timeout,
+            }
+            ydl = self._local.ydl = YoutubeDL(opts)
+        return ydl
+
+    def _extract(self, url: str, limit: Optional[int] = None) -> dict:
+        from yt_dlp.utils import DownloadError, ExtractorError as YtDlpExtractorError
+
+        try:
+            # process=False: pas de résolution des formats (inutile ici, et lente); les entrées d'une
+            # recherche sont générées page par page -> seules les limit premières sont demandées
+            info = self._ydl().extract_info(url, download=False, process=False) or {}
+            if limit is not None:
+                info["entries"] = list(itertools.islice(info.get("entries") or (), limit))
+            return info
+        except (DownloadError, YtDlpExtractorError) as ex:
+            raise ExtractorError(str(ex)) from None
+
+    # ---------- fixtures ----------
+    def _fixture_path(self, kind: str, key: str) -> str:
+        name = key if kind == "video" else hashlib.sha1(key.encode()).hexdigest()[:16]
+        return os.path.join(self.fixtures_dir, f"{kind}-{name}.json")
+
+    def _load(self, kind: str, key: str) -> dict:
+        path = self._fixture_path(kind, key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise ExtractorError(f"fixture absente: {path}") from None
+
+    def _save(self, kind: str, key: str, data: dict):
+        os.makedirs(self.fixtures_dir, exist_ok=True)
+        with open(self._fixture_path(kind, key), "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)